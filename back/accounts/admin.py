@@ -2,8 +2,13 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.utils.translation import gettext_lazy as _
-from django.utils.html import format_html
-from .models import CustomUser, UserProfile
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from collections import Counter
+from .models import CustomUser, RequestProfile, SlowQuery, UserProfile
 
 class CustomUserCreationForm(UserCreationForm):
     class Meta:
@@ -106,4 +111,157 @@ class UserProfileAdmin(admin.ModelAdmin):
     def user_email(self, obj):
         return obj.user.email
     user_email.short_description = _('User Email')
-    user_email.admin_order_field = 'user__email'
\ No newline at end of file
+    user_email.admin_order_field = 'user__email'
+
+
+def render_call_tree(nodes):
+    """Nested <details> list; the first branch of each level starts open."""
+    items = []
+    for index, node in enumerate(nodes):
+        label = format_html(
+            '<code>{}</code> — {} ms cumulative, {} ms own, {} calls',
+            node['function'], node['cumulative_ms'], node['own_ms'], node['calls'],
+        )
+        if node['children']:
+            items.append(format_html(
+                '<li><details{}><summary>{}</summary>{}</details></li>',
+                ' open' if index == 0 else '', label, render_call_tree(node['children']),
+            ))
+        else:
+            items.append(format_html('<li>{}</li>', label))
+    return format_html('<ul style="margin-left: 1em;">{}</ul>', mark_safe(''.join(items)))
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'db_queries', 'db_time_ms', 'user')
+    list_filter = ('method', 'status_code', 'view_name', 'created_at')
+    search_fields = ('path', 'view_name', 'user__email')
+    date_hierarchy = 'created_at'
+    list_select_related = ('user',)
+    exclude = ('top_functions', 'call_tree', 'sql_queries', 'stats_data')
+    readonly_fields = (
+        'user', 'method', 'path', 'query_string', 'view_name', 'status_code', 'duration_ms',
+        'db_queries', 'db_time_ms', 'created_at', 'download_link',
+        'call_tree_display', 'top_cumulative_display', 'top_own_display', 'sql_display',
+    )
+    fieldsets = (
+        (_('Request'), {'fields': ('user', 'method', 'path', 'query_string', 'view_name', 'status_code', 'created_at')}),
+        (_('Timing'), {'fields': ('duration_ms', 'db_queries', 'db_time_ms', 'download_link')}),
+        (_('Call tree'), {'fields': ('call_tree_display',)}),
+        (_('Top functions'), {'fields': ('top_cumulative_display', 'top_own_display'), 'classes': ('collapse',)}),
+        (_('SQL'), {'fields': ('sql_display',), 'classes': ('collapse',)}),
+    )
+
+    def has_add_permission(self, request):
+        return False  # Profiles are recorded by RequestProfilingMiddleware
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/', self.admin_site.admin_view(self.download_view), name='accounts_requestprofile_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        """Raw stats in pstats format, for snakeviz or pstats.Stats()."""
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(bytes(profile.stats_data), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="request-profile-{profile.pk}.prof"'
+        return response
+
+    def download_link(self, obj):
+        url = reverse('admin:accounts_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, _('Download .prof'))
+    download_link.short_description = _('Raw stats')
+
+    def call_tree_display(self, obj):
+        return render_call_tree(obj.call_tree) if obj.call_tree else '-'
+    call_tree_display.short_description = _('Call tree')
+
+    def _functions_table(self, rows):
+        body = format_html_join(
+            '', '<tr><td><code>{}</code></td><td>{}</td><td>{}</td><td>{}</td></tr>',
+            ((row['function'], row['calls'], row['own_ms'], row['cumulative_ms']) for row in rows),
+        )
+        return format_html(
+            '<table><thead><tr><th>{}</th><th>{}</th><th>{}</th><th>{}</th></tr></thead><tbody>{}</tbody></table>',
+            _('Function'), _('Calls'), _('Own ms'), _('Cumulative ms'), body,
+        )
+
+    def top_cumulative_display(self, obj):
+        return self._functions_table(obj.top_functions.get('cumulative', []))
+    top_cumulative_display.short_description = _('By cumulative time')
+
+    def top_own_display(self, obj):
+        return self._functions_table(obj.top_functions.get('own', []))
+    top_own_display.short_description = _('By own time')
+
+    def sql_display(self, obj):
+        """Statements in execution order; repeats flag N+1 patterns."""
+        repeats = Counter(query['sql'] for query in obj.sql_queries)
+        body = format_html_join(
+            '', '<tr><td>{}</td><td>{}</td><td>{}</td><td><code>{}</code></td></tr>',
+            (
+                (index, query['time_ms'], repeats[query['sql']], query['sql'])
+                for index, query in enumerate(obj.sql_queries, start=1)
+            ),
+        )
+        return format_html(
+            '<table><thead><tr><th>#</th><th>{}</th><th>{}</th><th>SQL</th></tr></thead><tbody>{}</tbody></table>',
+            _('ms'), _('Repeats'), body,
+        )
+    sql_display.short_description = _('Queries')
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('short_sql', 'count', 'total_time_ms', 'avg_time', 'max_time_ms', 'view_name', 'last_seen')
+    list_filter = ('vendor', 'view_name', 'last_seen')
+    search_fields = ('normalized_sql', 'view_name')
+    ordering = ('-total_time_ms',)
+    readonly_fields = (
+        'fingerprint', 'vendor', 'count', 'total_time_ms', 'max_time_ms', 'avg_time', 'view_name',
+        'first_seen', 'last_seen', 'sql_display', 'sample_display', 'explain_display', 'stack_display',
+    )
+    exclude = ('normalized_sql', 'sample_sql', 'explain', 'stack')
+    fieldsets = (
+        (_('Statement'), {'fields': ('fingerprint', 'vendor', 'sql_display', 'sample_display')}),
+        (_('Timing'), {'fields': ('count', 'total_time_ms', 'avg_time', 'max_time_ms', 'first_seen', 'last_seen')}),
+        (_('Origin'), {'fields': ('view_name', 'stack_display')}),
+        (_('Query plan'), {'fields': ('explain_display',)}),
+    )
+
+    def has_add_permission(self, request):
+        return False  # Recorded by the slow query log
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def short_sql(self, obj):
+        return obj.normalized_sql[:120]
+    short_sql.short_description = _('SQL')
+
+    def avg_time(self, obj):
+        return round(obj.avg_time_ms, 1)
+    avg_time.short_description = _('Avg time (ms)')
+
+    def _pre(self, text):
+        return format_html('<pre style="white-space: pre-wrap;">{}</pre>', text) if text else '-'
+
+    def sql_display(self, obj):
+        return self._pre(obj.normalized_sql)
+    sql_display.short_description = _('Normalized SQL')
+
+    def sample_display(self, obj):
+        return self._pre(obj.sample_sql)
+    sample_display.short_description = _('Latest statement')
+
+    def explain_display(self, obj):
+        return self._pre(obj.explain)
+    explain_display.short_description = _('EXPLAIN')
+
+    def stack_display(self, obj):
+        return self._pre(obj.stack)
+    stack_display.short_description = _('Stack')
@@ -0,0 +1,384 @@
+"""
+Two-tier cache backend: a bounded in-process LRU (L1) in front of a shared
+backend (L2, the database cache or Redis).
+
+Only keys matching one of the L1_PREFIXES options are kept in L1, each prefix
+with its own L1 lifetime; everything else goes straight to L2. The longest
+matching prefix wins and a lifetime of 0 keeps a narrower prefix out of L1.
+
+Writes go to L2 first. Other processes learn about them through version
+stamps kept in L2: every key hashes to one of STAMP_SHARDS stamps of its
+prefix, and each write, delete or increment sets that stamp to a new token.
+Processes read all stamps in one get_many at most once every CHECK_INTERVAL
+seconds and drop the L1 entries of every stamp that changed, so another
+process's write is seen within CHECK_INTERVAL. The writing process flushes the
+other entries of the stamp it set (they may be stale too, since its last
+check) and keeps the value it wrote.
+
+The stamps work the same on every L2 (no pub/sub server is needed), and
+losing them (cache clear, culling) only flushes L1.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'accounts.cache.TwoTierCache',
+            'OPTIONS': {
+                'L2': 'shared',
+                'L1_PREFIXES': {'chart:': 300, 'login_attempts_': 60},
+            },
+        },
+        'shared': {'BACKEND': '...DatabaseCache', 'LOCATION': 'cache_table'},
+    }
+
+BulkDatabaseCache is a DatabaseCache writing set_many with a single upsert.
+"""
+
+import base64
+import pickle
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router
+from django.db.models.constants import OnConflict
+from django.utils.timezone import now as tz_now
+
+L1_MAX_ENTRIES = 1000
+CHECK_INTERVAL = 1.0
+STAMP_SHARDS = 16
+STAMP_KEY_PREFIX = ':l1stamp:'
+
+_MISSING = object()
+
+# One L1 per cache alias and process, shared by every thread like LocMemCache
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalStore:
+    """Bounded LRU of pickled values plus the stamps it was filled under."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # full key -> (expires at, pickled value, stamp key)
+        self.stamps = {}  # stamp key -> token read from L2
+        self.next_check = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return _MISSING
+            self.entries.move_to_end(key)
+            pickled = entry[1]
+        return pickle.loads(pickled)
+
+    def set(self, key, value, lifetime, stamp_key):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + lifetime, pickled, stamp_key)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def invalidate(self, stamp_keys):
+        with self.lock:
+            stale = [key for key, entry in self.entries.items() if entry[2] in stamp_keys]
+            for key in stale:
+                del self.entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.stamps.clear()
+            self.next_check = 0.0
+
+
+class TwoTierCache(BaseCache):
+    """
+    Cache backend keeping hot keys in process memory in front of another cache alias.
+
+    OPTIONS:
+        L2: alias of the shared cache (required)
+        L1_PREFIXES: {key prefix: L1 lifetime in seconds}; other keys skip L1
+        L1_MAX_ENTRIES: LRU size per process
+        CHECK_INTERVAL: seconds between version stamp checks
+        STAMP_SHARDS: stamps per prefix; a write flushes 1/STAMP_SHARDS of it
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options['L2']
+        self._l2 = None
+        self.check_interval = options.get('CHECK_INTERVAL', CHECK_INTERVAL)
+        self.stamp_shards = options.get('STAMP_SHARDS', STAMP_SHARDS)
+        prefixes = options.get('L1_PREFIXES', {})
+        self.prefixes = sorted(prefixes.items(), key=lambda item: len(item[0]), reverse=True)
+        self.stamp_keys = [
+            f'{STAMP_KEY_PREFIX}{prefix}:{shard}'
+            for prefix, lifetime in self.prefixes if lifetime
+            for shard in range(self.stamp_shards)
+        ]
+        name = location or self._l2_alias
+        with _stores_lock:
+            if name not in _stores:
+                _stores[name] = LocalStore(options.get('L1_MAX_ENTRIES', L1_MAX_ENTRIES))
+            self.local = _stores[name]
+
+    @property
+    def l2(self):
+        if self._l2 is None:
+            from django.core.cache import caches
+            self._l2 = caches[self._l2_alias]
+        return self._l2
+
+    def l1_rule(self, key):
+        """(L1 lifetime, stamp key) for the key, or None when it skips L1."""
+        for prefix, lifetime in self.prefixes:
+            if key.startswith(prefix):
+                if not lifetime:
+                    return None
+                shard = zlib.crc32(key.encode('utf-8')) % self.stamp_shards
+                return lifetime, f'{STAMP_KEY_PREFIX}{prefix}:{shard}'
+        return None
+
+    def make_key(self, key, version=None):
+        return self.l2.make_key(key, version=version)
+
+    def validate_key(self, key):
+        self.l2.validate_key(key)
+
+    # ---------------------------------------------------------------------
+    # Version stamps
+    # ---------------------------------------------------------------------
+
+    def check_stamps(self):
+        """Drop the L1 entries of every stamp changed in L2 since the last check."""
+        from .metrics import CACHE_L1
+
+        now = time.monotonic()
+        if now < self.local.next_check or not self.stamp_keys:
+            return
+        self.local.next_check = now + self.check_interval
+        current = self.l2.get_many(self.stamp_keys)
+        changed = {
+            stamp_key for stamp_key in self.stamp_keys
+            if current.get(stamp_key) != self.local.stamps.get(stamp_key, _MISSING)
+        }
+        self.local.stamps = {stamp_key: current.get(stamp_key) for stamp_key in self.stamp_keys}
+        if changed:
+            CACHE_L1.labels('invalidated').inc(self.local.invalidate(changed))
+
+    def bump(self, stamp_keys):
+        """Publish a change to the keys behind these stamps."""
+        token = uuid.uuid4().hex
+        self.l2.set_many({stamp_key: token for stamp_key in stamp_keys}, timeout=None)
+        # Entries read under the old stamps may predate other processes' writes
+        self.local.invalidate(stamp_keys)
+        self.local.stamps.update(dict.fromkeys(stamp_keys, token))
+
+    def l1_lifetime(self, lifetime, timeout):
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            return min(lifetime, timeout)
+        if timeout is DEFAULT_TIMEOUT and self.l2.default_timeout is not None:
+            return min(lifetime, self.l2.default_timeout)
+        return lifetime
+
+    # ---------------------------------------------------------------------
+    # Reads
+    # ---------------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        from .metrics import CACHE_L1
+
+        rule = self.l1_rule(key)
+        if rule is None:
+            return self.l2.get(key, default, version=version)
+
+        self.check_stamps()
+        full_key = self.make_key(key, version)
+        value = self.local.get(full_key)
+        if value is not _MISSING:
+            CACHE_L1.labels('hit').inc()
+            return value
+
+        CACHE_L1.labels('miss').inc()
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        lifetime, stamp_key = rule
+        self.local.set(full_key, value, lifetime, stamp_key)
+        return value
+
+    def get_many(self, keys, version=None):
+        from .metrics import CACHE_L1
+
+        keys = list(keys)
+        rules = {key: self.l1_rule(key) for key in keys}
+        if any(rules.values()):
+            self.check_stamps()
+
+        found, remote = {}, []
+        for key in keys:
+            if rules[key] is None:
+                remote.append(key)
+                continue
+            value = self.local.get(self.make_key(key, version))
+            if value is _MISSING:
+                CACHE_L1.labels('miss').inc()
+                remote.append(key)
+            else:
+                CACHE_L1.labels('hit').inc()
+                found[key] = value
+
+        if remote:
+            fetched = self.l2.get_many(remote, version=version)
+            for key, value in fetched.items():
+                if rules[key] is not None:
+                    lifetime, stamp_key = rules[key]
+                    self.local.set(self.make_key(key, version), value, lifetime, stamp_key)
+            found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        if self.l1_rule(key) is not None:
+            self.check_stamps()
+            if self.local.get(self.make_key(key, version)) is not _MISSING:
+                return True
+        return self.l2.has_key(key, version=version)
+
+    # ---------------------------------------------------------------------
+    # Writes
+    # ---------------------------------------------------------------------
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout=timeout, version=version)
+        self.changed({key: value}, version, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout=timeout, version=version)
+        if added:
+            self.changed({key: value}, version, timeout)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout=timeout, version=version)
+        self.changed({key: value for key, value in data.items() if key not in failed}, version, timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.discard(self.make_key(key, version))
+        return self.l2.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        deleted = self.l2.delete(key, version=version)
+        self.changed({key: _MISSING}, version)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.l2.delete_many(keys, version=version)
+        self.changed(dict.fromkeys(keys, _MISSING), version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version=version)
+        # The L2 expiry is unknown here, so the value is not kept
+        self.changed({key: _MISSING}, version)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        value = self.l2.decr(key, delta, version=version)
+        self.changed({key: _MISSING}, version)
+        return value
+
+    def changed(self, values, version, timeout=DEFAULT_TIMEOUT):
+        """
+        Flush the written keys from every process and keep the new values here.
+
+        values maps each key to its new value, or _MISSING when it was deleted.
+        """
+        written = []
+        for key, value in values.items():
+            rule = self.l1_rule(key)
+            if rule is not None:
+                written.append((self.make_key(key, version), value, *rule))
+        if not written:
+            return
+        self.bump({stamp_key for _key, _value, _lifetime, stamp_key in written})
+        for full_key, value, lifetime, stamp_key in written:
+            if value is _MISSING:
+                self.local.discard(full_key)
+            else:
+                self.local.set(full_key, value, self.l1_lifetime(lifetime, timeout), stamp_key)
+
+    def clear(self):
+        # Removes the stamps too, which flushes every other process
+        self.l2.clear()
+        self.local.clear()
+
+    def close(self, **kwargs):
+        # The L2 alias is closed by the cache handler itself
+        pass
+
+
+class BulkDatabaseCache(DatabaseCache):
+    """
+    DatabaseCache whose set_many writes every key with one upsert.
+
+    DatabaseCache.set_many calls set() per key, three statements each, so
+    storing a page of serializer fragments would cost three queries per row.
+    Backends without INSERT ... ON CONFLICT support keep the per-key path.
+    """
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        if not data or not connection.features.supports_update_conflicts_with_target:
+            return super().set_many(data, timeout=timeout, version=version)
+
+        timeout = self.get_backend_timeout(timeout)
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        if timeout is None:
+            expires = datetime.max
+        else:
+            expires = datetime.fromtimestamp(timeout, tz=timezone.utc if settings.USE_TZ else None)
+        expires = connection.ops.adapt_datetimefield_value(expires.replace(microsecond=0))
+        rows = [
+            (
+                self.make_and_validate_key(key, version=version),
+                base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1'),
+                expires,
+            )
+            for key, value in data.items()
+        ]
+        upsert = connection.ops.on_conflict_suffix_sql(
+            None, OnConflict.UPDATE, ['value', 'expires'], ['cache_key'],
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            num = cursor.fetchone()[0]
+            if num > self._max_entries:
+                self._cull(db, cursor, tz_now().replace(microsecond=0), num)
+            cursor.executemany(
+                f'INSERT INTO {table} ({quote_name("cache_key")}, {quote_name("value")}, '
+                f'{quote_name("expires")}) VALUES (%s, %s, %s) {upsert}',
+                rows,
+            )
+        return []
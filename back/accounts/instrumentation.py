@@ -0,0 +1,266 @@
+"""
+Per-request instrumentation for RequestLogMiddleware.
+
+A RequestMetrics object is bound to the current request through a context
+variable. Three kinds of hook add to it while it is active:
+
+- a database execute wrapper, installed on every connection for the length of
+  the request: query count, total SQL time and the slowest statement
+- InstrumentedCacheMixin on the cache backends: hits, misses and time spent in
+  cache calls
+- a wrapper around DRF's BaseSerializer.data (install_serializer_timing):
+  time spent building serializer output
+
+Serializers evaluate querysets and read the cache while they run. That time is
+already counted as SQL or cache time, so it is subtracted from serializer time.
+The remainder of the request (total minus SQL, cache and serialization) is
+reported as 'app': view code, permissions, rendering and middleware.
+
+Hooks do nothing when no metrics are bound, so unsampled requests only pay for
+a context variable lookup.
+"""
+
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+
+from .cache import BulkDatabaseCache, TwoTierCache
+
+# Longest SQL text kept for the slowest statement
+SLOWEST_SQL_MAX_LENGTH = 500
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters collected while one request is handled."""
+
+    __slots__ = (
+        'started', 'db_queries', 'db_time', 'slowest_sql', 'slowest_sql_time',
+        'cache_hits', 'cache_misses', 'cache_time', 'cache_depth',
+        'serializer_time', 'serializer_depth', 'nested_time',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.slowest_sql = None
+        self.slowest_sql_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.cache_depth = 0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        # SQL and cache time spent inside serializers
+        self.nested_time = 0.0
+
+    def record_query(self, sql, duration):
+        if self.cache_depth:
+            # Run by a database cache backend: already counted as cache time
+            return
+        self.db_queries += 1
+        self.db_time += duration
+        if self.serializer_depth:
+            self.nested_time += duration
+        if duration > self.slowest_sql_time:
+            self.slowest_sql_time = duration
+            self.slowest_sql = sql[:SLOWEST_SQL_MAX_LENGTH]
+
+    def record_cache(self, duration, hits=0, misses=0):
+        self.cache_time += duration
+        self.cache_hits += hits
+        self.cache_misses += misses
+        if self.serializer_depth:
+            self.nested_time += duration
+
+    def timings(self):
+        """Durations in milliseconds: db, cache, serialize, app and total."""
+        total = time.perf_counter() - self.started
+        serialize = max(self.serializer_time - self.nested_time, 0.0)
+        app = max(total - self.db_time - self.cache_time - serialize, 0.0)
+        return {
+            'db': self.db_time * 1000,
+            'cache': self.cache_time * 1000,
+            'serialize': serialize * 1000,
+            'app': app * 1000,
+            'total': total * 1000,
+        }
+
+    def as_dict(self):
+        """Flat fields for structured logging."""
+        timings = self.timings()
+        return {
+            'duration_ms': round(timings['total'], 1),
+            'db_queries': self.db_queries,
+            'db_time_ms': round(timings['db'], 1),
+            'db_slowest_ms': round(self.slowest_sql_time * 1000, 1),
+            'db_slowest_sql': self.slowest_sql,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_time_ms': round(timings['cache'], 1),
+            'serializer_time_ms': round(timings['serialize'], 1),
+            'app_time_ms': round(timings['app'], 1),
+        }
+
+    def server_timing(self):
+        """Value of the Server-Timing response header."""
+        timings = self.timings()
+        entries = [
+            f'db;dur={timings["db"]:.1f};desc="{self.db_queries} queries"',
+            f'db-slowest;dur={self.slowest_sql_time * 1000:.1f}',
+            f'cache;dur={timings["cache"]:.1f};desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'serialize;dur={timings["serialize"]:.1f}',
+            f'app;dur={timings["app"]:.1f}',
+            f'total;dur={timings["total"]:.1f}',
+        ]
+        return ', '.join(entries)
+
+
+def current_metrics():
+    """The metrics of the request being handled, or None when it is not sampled."""
+    return _current.get()
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - started)
+
+
+def start_request_metrics():
+    """
+    Bind new metrics to the current context and hook every database connection.
+
+    Returns:
+        (RequestMetrics, finish): call finish() once the response is ready
+    """
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(_execute_wrapper))
+
+    def finish():
+        stack.close()
+        _current.reset(token)
+
+    return metrics, finish
+
+
+@contextmanager
+def timed_serializer():
+    """Count the block as serializer time (outermost serializer only)."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+def install_serializer_timing():
+    """Wrap BaseSerializer.data so building serializer output is timed (idempotent)."""
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, 'instrumented', False):
+        return
+
+    def data(self):
+        with timed_serializer():
+            return original.fget(self)
+
+    data.instrumented = True
+    BaseSerializer.data = property(data, doc=original.__doc__)
+
+
+# -------------------------------------------------------------------------
+# Cache backends
+# -------------------------------------------------------------------------
+
+_MISSING = object()
+
+# Cache methods timed without hit/miss accounting
+TIMED_CACHE_METHODS = (
+    'set', 'add', 'delete', 'touch', 'incr', 'decr', 'has_key',
+    'set_many', 'delete_many', 'clear',
+)
+
+
+class InstrumentedCacheMixin:
+    """
+    Cache backend mixin reporting hits, misses and time to the request metrics.
+
+    Backends implement some calls on top of others (DatabaseCache.get calls
+    get_many), so only the outermost call of a request is recorded.
+    """
+
+    def _record(self, method, args, kwargs, count_hits=None):
+        metrics = _current.get()
+        if metrics is None or metrics.cache_depth:
+            return method(*args, **kwargs)
+
+        metrics.cache_depth += 1
+        started = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            metrics.cache_depth -= 1
+        hits, misses = count_hits(result) if count_hits else (0, 0)
+        metrics.record_cache(time.perf_counter() - started, hits, misses)
+        return result
+
+    def get(self, key, default=None, version=None):
+        def count_hits(result):
+            return (0, 1) if result is _MISSING else (1, 0)
+
+        value = self._record(super().get, (key, _MISSING, version), {}, count_hits)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+
+        def count_hits(result):
+            return len(result), len(keys) - len(result)
+
+        return self._record(super().get_many, (keys,), {'version': version}, count_hits)
+
+
+def _timed_cache_method(name):
+    def method(self, *args, **kwargs):
+        return self._record(getattr(super(InstrumentedCacheMixin, self), name), args, kwargs)
+    method.__name__ = name
+    return method
+
+
+for _name in TIMED_CACHE_METHODS:
+    setattr(InstrumentedCacheMixin, _name, _timed_cache_method(_name))
+
+
+class InstrumentedDatabaseCache(InstrumentedCacheMixin, BulkDatabaseCache):
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
+
+
+class InstrumentedTwoTierCache(InstrumentedCacheMixin, TwoTierCache):
+    # L1 hits count as cache hits; L2 calls run nested and are not recorded twice
+    pass
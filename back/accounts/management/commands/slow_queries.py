@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import SlowQuery
+from accounts.slow_queries import top_slow_queries
+
+
+class Command(BaseCommand):
+    help = 'Show the slowest statements recorded by the slow query log, grouped by SQL fingerprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of statements to show')
+        parser.add_argument('--order', choices=['total', 'count', 'max', 'avg'], default='total',
+                            help='Rank by total, count, maximum or average time')
+        parser.add_argument('--explain', action='store_true', help='Print the query plan and stack of each statement')
+        parser.add_argument('--reset', action='store_true', help='Delete every recorded statement instead')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} slow query records'))
+            return
+
+        rows = list(top_slow_queries(options['order'], options['limit']))
+        if not rows:
+            self.stdout.write('No slow queries recorded')
+            return
+
+        self.stdout.write(f"{'#':>3} {'count':>7} {'total ms':>11} {'avg ms':>9} {'max ms':>9}  view / SQL")
+        for rank, row in enumerate(rows, start=1):
+            self.stdout.write(
+                f"{rank:>3} {row.count:>7} {row.total_time_ms:>11.1f} {row.avg_time_ms:>9.1f} "
+                f"{row.max_time_ms:>9.1f}  {row.view_name or '-'}"
+            )
+            self.stdout.write(f"{'':>43}{row.normalized_sql[:300]}")
+            if options['explain']:
+                for title, text in (('EXPLAIN', row.explain), ('Stack', row.stack)):
+                    if text:
+                        self.stdout.write(self.style.MIGRATE_HEADING(f'    {title}'))
+                        self.stdout.write('\n'.join(f'      {line}' for line in text.splitlines()))
@@ -0,0 +1,215 @@
+"""
+Prometheus metrics, exposed at /metrics.
+
+- HTTP: request latency per view name and method, responses per status code
+  (recorded by RequestLogMiddleware)
+- WebSockets: open connections per process and per auction group
+- Bids: accepted and rejected bids by rejection code, for the REST endpoint
+  and the WebSocket consumer
+- Channel layer: group_send latency
+- DashboardMetrics: cache hits, misses and recompute time per metric type
+- Database: open connections per alias, and pool usage when a connection pool
+  is configured
+
+Under gunicorn or uvicorn with several workers every process has its own
+counters. When PROMETHEUS_MULTIPROC_DIR is set (before the workers start, see
+gunicorn.conf.py and entrypoint.sh), prometheus_client writes every value to
+memory-mapped files in that directory and render_metrics() aggregates the
+files of all processes, so any worker can answer a scrape.
+
+prometheus_client is optional: without it every metric is a no-op and
+/metrics answers 503.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+# Label used for requests that did not resolve to a URL pattern (404s), so
+# arbitrary paths cannot create new series
+UNRESOLVED_VIEW = '<unresolved>'
+
+CHANNEL_SEND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+RECOMPUTE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _NullMetric:
+    """Stands in for every metric when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, amount):
+        pass
+
+
+def _metric(kind, name, documentation, labelnames=(), **kwargs):
+    if prometheus_client is None:
+        return _NullMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labelnames, **kwargs)
+
+
+REQUEST_LATENCY = _metric(
+    'Histogram', 'http_request_duration_seconds',
+    'Time to produce a response, by URL name and method', ('view', 'method'),
+)
+RESPONSES = _metric(
+    'Counter', 'http_responses',
+    'Responses by URL name, method and status code', ('view', 'method', 'status'),
+)
+
+# 'all' keeps one series per process (pid label); 'livesum' adds up live processes
+WEBSOCKET_CONNECTIONS = _metric(
+    'Gauge', 'websocket_connections',
+    'Open WebSocket connections in this process', multiprocess_mode='all',
+)
+WEBSOCKET_GROUP_CONNECTIONS = _metric(
+    'Gauge', 'websocket_group_connections',
+    'Open WebSocket connections per auction group', ('group',), multiprocess_mode='livesum',
+)
+CHANNEL_SEND_LATENCY = _metric(
+    'Histogram', 'channel_layer_send_duration_seconds',
+    'Time spent in channel layer sends', ('operation',), buckets=CHANNEL_SEND_BUCKETS,
+)
+
+BIDS = _metric(
+    'Counter', 'auction_bids',
+    'Bids placed, by result and rejection code', ('source', 'result', 'code'),
+)
+
+DASHBOARD_LOOKUPS = _metric(
+    'Counter', 'dashboard_metrics_lookups',
+    'DashboardMetrics lookups by metric type and result (hit, miss, expired)', ('metric_type', 'result'),
+)
+DASHBOARD_RECOMPUTE = _metric(
+    'Histogram', 'dashboard_metrics_recompute_seconds',
+    'Time to recompute DashboardMetrics', ('metric_type',), buckets=RECOMPUTE_BUCKETS,
+)
+
+CONDITIONAL_REQUESTS = _metric(
+    'Counter', 'conditional_requests',
+    'Requests carrying If-None-Match or If-Modified-Since, answered with 304 (not_modified) or rendered (modified)',
+    ('result',),
+)
+RESPONSE_CACHE = _metric(
+    'Counter', 'response_cache_requests',
+    'Anonymous response cache lookups answered from the cache (hit) or stored (miss)', ('result',),
+)
+CACHE_L1 = _metric(
+    'Counter', 'cache_l1_events',
+    'In-process cache tier events (hit, miss, invalidated entries)', ('event',),
+)
+
+DB_CONNECTIONS = _metric(
+    'Gauge', 'django_db_connections',
+    'Database connections by alias and state (open, pool_size, pool_available, pool_waiting)',
+    ('alias', 'state'), multiprocess_mode='livesum',
+)
+
+
+def metrics_available():
+    return prometheus_client is not None
+
+
+# -------------------------------------------------------------------------
+# Recording helpers
+# -------------------------------------------------------------------------
+
+def observe_request(request, status_code, duration):
+    """Record one HTTP response; duration in seconds."""
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match and match.view_name else UNRESOLVED_VIEW
+    REQUEST_LATENCY.labels(view, request.method).observe(duration)
+    RESPONSES.labels(view, request.method, str(status_code)).inc()
+
+
+def record_bid(source, code=None):
+    """Record a placed bid (code None) or a rejected one with its error code."""
+    if code is None:
+        BIDS.labels(source, 'accepted', '').inc()
+    else:
+        BIDS.labels(source, 'rejected', code).inc()
+
+
+def websocket_connected(group):
+    WEBSOCKET_CONNECTIONS.inc()
+    WEBSOCKET_GROUP_CONNECTIONS.labels(group).inc()
+
+
+def websocket_disconnected(group):
+    WEBSOCKET_CONNECTIONS.dec()
+    WEBSOCKET_GROUP_CONNECTIONS.labels(group).dec()
+
+
+@contextmanager
+def timed_channel_send(operation='group_send'):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        CHANNEL_SEND_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+
+def update_db_connection_metrics():
+    """
+    Publish the connection state of this process.
+
+    Django connections are per thread; gunicorn sync workers and the thread
+    uvicorn runs sync views in handle requests on one thread, so that thread's
+    connections are the process's.
+    """
+    for connection in connections.all(initialized_only=True):
+        alias = connection.alias
+        DB_CONNECTIONS.labels(alias, 'open').set(1 if connection.connection is not None else 0)
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            stats = pool.get_stats()
+            DB_CONNECTIONS.labels(alias, 'pool_size').set(stats.get('pool_size', 0))
+            DB_CONNECTIONS.labels(alias, 'pool_available').set(stats.get('pool_available', 0))
+            DB_CONNECTIONS.labels(alias, 'pool_waiting').set(stats.get('requests_waiting', 0))
+
+
+# -------------------------------------------------------------------------
+# Exposition
+# -------------------------------------------------------------------------
+
+def render_metrics():
+    """
+    Metrics of every worker in the Prometheus text format.
+
+    Returns:
+        (bytes, content type)
+    """
+    if multiprocess_mode():
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def multiprocess_mode():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def mark_process_dead(pid):
+    """Drop the live gauges of a worker that exited (gunicorn child_exit hook)."""
+    if prometheus_client is not None and multiprocess_mode():
+        multiprocess.mark_process_dead(pid)
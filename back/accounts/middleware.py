@@ -1,5 +1,6 @@
 import json
 import logging
+import random
 import time
 import re
 from django.conf import settings
@@ -10,10 +11,23 @@ from django.urls import reverse
 from django.contrib import messages
 from django.http import HttpResponseForbidden
 
+from .instrumentation import install_serializer_timing, start_request_metrics
+from .metrics import observe_request, update_db_connection_metrics
+from .profiling import profile_request, profiling_requested, profiling_user
+from .slow_queries import finish_request_capture, start_request_capture
+
 logger = logging.getLogger(__name__)
 
 class RequestLogMiddleware(MiddlewareMixin):
-    """Middleware to log API requests and responses with timing - SYNC VERSION"""
+    """
+    Middleware to log API requests and responses with timing - SYNC VERSION
+
+    A sample of requests (REQUEST_METRICS_SAMPLE_RATE) is instrumented: SQL,
+    cache and serializer time are collected (see instrumentation.py), sent in
+    a Server-Timing header and added to the response log record as fields.
+    Every request is counted in the Prometheus metrics (see metrics.py), and
+    its slow queries are stored once the response is ready (slow_queries.py).
+    """
     
     def __init__(self, get_response):
         self.get_response = get_response
@@ -21,6 +35,9 @@ class RequestLogMiddleware(MiddlewareMixin):
         self.excluded_paths = [re.compile(p) for p in getattr(settings, 'LOGGING_EXCLUDED_PATHS', [
             r'^/admin/', r'^/static/', r'^/media/', r'^/favicon\.ico$'
         ])]
+        self.sample_rate = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 1.0)
+        if self.sample_rate > 0:
+            install_serializer_timing()
         super().__init__(get_response)
 
     def is_excluded_path(self, path):
@@ -46,6 +63,9 @@ class RequestLogMiddleware(MiddlewareMixin):
             return None
 
         request.req_start_time = time.monotonic()
+        request.slow_query_token = start_request_capture()
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            request.request_metrics, request.finish_request_metrics = start_request_metrics()
 
         if settings.DEBUG:
             # Log request details
@@ -79,19 +99,66 @@ class RequestLogMiddleware(MiddlewareMixin):
         # Add duration header
         response['X-Request-Duration-Ms'] = str(duration_ms)
         status_code = getattr(response, 'status_code', 0)
+        observe_request(request, status_code, duration)
+        update_db_connection_metrics()
+
+        metrics = getattr(request, 'request_metrics', None)
+        fields, breakdown = {}, ''
+        if metrics is not None:
+            request.finish_request_metrics()
+            response['Server-Timing'] = metrics.server_timing()
+            fields = metrics.as_dict()
+            breakdown = (
+                f" (db {fields['db_queries']}q {fields['db_time_ms']}ms, "
+                f"cache {fields['cache_hits']}/{fields['cache_misses']} {fields['cache_time_ms']}ms, "
+                f"serialize {fields['serializer_time_ms']}ms, app {fields['app_time_ms']}ms)"
+            )
+
+        # After the metrics are finished: storing slow queries is not part of the request
+        match = getattr(request, 'resolver_match', None)
+        finish_request_capture(request.slow_query_token, match.view_name if match else '')
 
         # Log level based on status code
         log_level = logging.INFO if status_code < 400 else logging.WARNING if status_code < 500 else logging.ERROR
-        logger.log(log_level, f"RESPONSE: {request.method} {request.path_info} - Status {status_code} in {duration_ms}ms")
+        logger.log(
+            log_level,
+            f"RESPONSE: {request.method} {request.path_info} - Status {status_code} in {duration_ms}ms{breakdown}",
+            extra={'method': request.method, 'path': request.path_info, 'status_code': status_code, **fields},
+        )
 
         # Log slow requests
         slow_threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 1000)
         if duration_ms > slow_threshold:
-            logger.warning(f"SLOW REQUEST: {request.method} {request.path_info} took {duration:.3f}s")
+            slowest = f"; slowest query {fields['db_slowest_ms']}ms: {fields['db_slowest_sql']}" if fields.get('db_slowest_sql') else ''
+            logger.warning(f"SLOW REQUEST: {request.method} {request.path_info} took {duration:.3f}s{slowest}")
 
         return response
 
 
+class RequestProfilingMiddleware:
+    """
+    Profile a request with cProfile when a superuser asks for it with the
+    X-Profile header or the _profile query parameter (see profiling.py).
+
+    Listed last in MIDDLEWARE so the profile covers the view, not middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_PROFILING_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled or not profiling_requested(request):
+            return self.get_response(request)
+
+        user = profiling_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        logger.info(f"PROFILING: {request.method} {request.path_info} for {user.email}")
+        return profile_request(self.get_response, request, user)
+
+
 class LoginTrackingMiddleware(MiddlewareMixin):
     """Middleware to extract client IP and User-Agent for login attempts - SYNC VERSION"""
     
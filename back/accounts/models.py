@@ -5,7 +5,7 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.validators import RegexValidator, MinValueValidator
-from base.models import Property, Auction, Bid
+from base.models import Property, Auction, Bid, Payment
 from PIL import Image
 from io import BytesIO
 from django.core.files.base import ContentFile
@@ -331,6 +331,10 @@ class CustomUser(AbstractUser):
         else:  # tenant, user, data_entry, inspector, maintenance_manager, and unknown roles
             return Bid.objects.filter(bidder=self)
 
+    def get_accessible_payments(self):
+        """Get payments accessible to the user: their own, whatever the role"""
+        return Payment.objects.filter(user=self)
+
 
 
 class UserProfile(models.Model):
@@ -443,3 +447,62 @@ class UserProfile(models.Model):
         return None
 
 
+class RequestProfile(models.Model):
+    """cProfile run of one request, recorded on demand for a superuser (see profiling.py)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='request_profiles', verbose_name=_('المستخدم'))
+    method = models.CharField(max_length=10, verbose_name=_('الطريقة'))
+    path = models.CharField(max_length=500, verbose_name=_('المسار'))
+    query_string = models.TextField(blank=True, verbose_name=_('معاملات الاستعلام'))
+    view_name = models.CharField(max_length=200, blank=True, verbose_name=_('اسم العرض'))
+    status_code = models.PositiveSmallIntegerField(verbose_name=_('رمز الحالة'))
+    duration_ms = models.FloatField(verbose_name=_('المدة (مللي ثانية)'))
+    db_queries = models.PositiveIntegerField(default=0, verbose_name=_('عدد الاستعلامات'))
+    db_time_ms = models.FloatField(default=0, verbose_name=_('وقت قاعدة البيانات (مللي ثانية)'))
+    top_functions = models.JSONField(default=dict, verbose_name=_('أعلى الدوال'))
+    call_tree = models.JSONField(default=list, verbose_name=_('شجرة الاستدعاءات'))
+    sql_queries = models.JSONField(default=list, verbose_name=_('استعلامات SQL'))
+    stats_data = models.BinaryField(verbose_name=_('بيانات الإحصاءات'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('تاريخ الإنشاء'))
+
+    class Meta:
+        verbose_name = _('ملف أداء الطلب')
+        verbose_name_plural = _('ملفات أداء الطلبات')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='accounts_reqprof_created_idx'),
+            models.Index(fields=['view_name'], name='accounts_reqprof_view_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f}ms)"
+
+
+class SlowQuery(models.Model):
+    """Slow statements aggregated by normalized SQL fingerprint (see slow_queries.py)"""
+    fingerprint = models.CharField(max_length=40, unique=True, verbose_name=_('البصمة'))
+    normalized_sql = models.TextField(verbose_name=_('الاستعلام الموحد'))
+    sample_sql = models.TextField(verbose_name=_('آخر استعلام'))
+    vendor = models.CharField(max_length=20, verbose_name=_('قاعدة البيانات'))
+    count = models.PositiveIntegerField(default=0, verbose_name=_('العدد'))
+    total_time_ms = models.FloatField(default=0, verbose_name=_('إجمالي الوقت (مللي ثانية)'))
+    max_time_ms = models.FloatField(default=0, verbose_name=_('أقصى وقت (مللي ثانية)'))
+    explain = models.TextField(blank=True, verbose_name=_('خطة التنفيذ'))
+    stack = models.TextField(blank=True, verbose_name=_('مسار الاستدعاء'))
+    view_name = models.CharField(max_length=200, blank=True, verbose_name=_('اسم العرض'))
+    first_seen = models.DateTimeField(auto_now_add=True, verbose_name=_('أول ظهور'))
+    last_seen = models.DateTimeField(default=timezone.now, verbose_name=_('آخر ظهور'))
+
+    class Meta:
+        verbose_name = _('استعلام بطيء')
+        verbose_name_plural = _('الاستعلامات البطيئة')
+        indexes = [
+            models.Index(fields=['-total_time_ms'], name='accounts_slowq_total_idx'),
+            models.Index(fields=['last_seen'], name='accounts_slowq_last_seen_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.normalized_sql[:80]} ({self.count}x)"
+
+    @property
+    def avg_time_ms(self):
+        return self.total_time_ms / self.count if self.count else 0
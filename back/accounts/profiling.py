@@ -0,0 +1,192 @@
+"""
+On-demand request profiling for superusers.
+
+A request is profiled when it carries the X-Profile header or the _profile
+query parameter and comes from a superuser (session or JWT). The view runs
+under cProfile while every SQL statement is recorded; the result is saved as a
+RequestProfile and browsed in the admin: call tree, top functions, SQL list,
+and the raw stats as a .prof download (snakeviz, pstats).
+
+Other requests only pay for a header and query-string lookup. JWT
+authentication normally happens inside DRF views, so the middleware
+authenticates flagged requests itself before deciding.
+"""
+
+import cProfile
+import logging
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_PARAM = '_profile'
+
+TOP_FUNCTIONS_LIMIT = 50
+SQL_QUERIES_LIMIT = 1000
+SQL_MAX_LENGTH = 2000
+# Call tree edges below this share of the total time are pruned
+CALL_TREE_MIN_FRACTION = 0.005
+CALL_TREE_MAX_DEPTH = 100
+
+
+def profiling_requested(request):
+    return PROFILE_HEADER in request.META or PROFILE_QUERY_PARAM in request.GET
+
+
+def profiling_user(request):
+    """The superuser sending the request, or None."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_superuser else None
+
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except Exception:
+        return None
+    if result and result[0].is_superuser:
+        return result[0]
+    return None
+
+
+def function_label(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-ins: cProfile stores the name only
+        return name
+    return f"{name} ({filename}:{line})"
+
+
+def top_functions(stats, sort_key, limit=TOP_FUNCTIONS_LIMIT):
+    """Rows for the most expensive functions; sort_key is 'own' or 'cumulative'."""
+    index = 2 if sort_key == 'own' else 3
+    ranked = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+    return [
+        {
+            'function': function_label(func),
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        }
+        for func, (primitive_calls, calls, own, cumulative, _callers) in ranked
+    ]
+
+
+def call_tree(stats, total, min_fraction=CALL_TREE_MIN_FRACTION, max_depth=CALL_TREE_MAX_DEPTH):
+    """
+    Nested call tree rebuilt from the caller edges cProfile keeps.
+
+    Each node's time is the time spent in the function when called from its
+    parent; cProfile stores caller edges as (calls, primitive calls, own,
+    cumulative). Recursive edges and edges below min_fraction of the total
+    are dropped, so the tree stays readable.
+    """
+    children = {}
+    roots = []
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge))
+
+    threshold = total * min_fraction
+
+    def build(func, calls, own, cumulative, path):
+        node = {
+            'function': function_label(func),
+            'calls': calls,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+            'children': [],
+        }
+        if len(path) >= max_depth:
+            return node
+        branches = sorted(children.get(func, ()), key=lambda child: child[1][3], reverse=True)
+        for child, (child_calls, _cc, child_own, child_cumulative) in branches:
+            if child in path or child_cumulative < threshold:
+                continue
+            node['children'].append(build(child, child_calls, child_own, child_cumulative, path | {child}))
+        return node
+
+    return [
+        build(func, stats.stats[func][1], stats.stats[func][2], stats.stats[func][3], {func})
+        for func in sorted(roots, key=lambda func: stats.stats[func][3], reverse=True)
+        if stats.stats[func][3] >= threshold
+    ]
+
+
+class QueryRecorder:
+    """Execute wrapper collecting every SQL statement with its duration."""
+
+    def __init__(self):
+        self.queries = []
+        self.total = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.total += 1
+            self.time += duration
+            if len(self.queries) < SQL_QUERIES_LIMIT:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql[:SQL_MAX_LENGTH],
+                    'time_ms': round(duration * 1000, 3),
+                })
+
+
+def profile_request(get_response, request, user):
+    """Run the request under cProfile and store a RequestProfile."""
+    from .models import RequestProfile
+
+    recorder = QueryRecorder()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration = time.perf_counter() - started
+
+    try:
+        stats = pstats.Stats(profiler)
+        match = getattr(request, 'resolver_match', None)
+        profile = RequestProfile.objects.create(
+            user=user,
+            method=request.method,
+            path=request.path[:500],
+            query_string=request.META.get('QUERY_STRING', '')[:1000],
+            view_name=(match.view_name if match else '')[:200],
+            status_code=response.status_code,
+            duration_ms=round(duration * 1000, 3),
+            db_queries=recorder.total,
+            db_time_ms=round(recorder.time * 1000, 3),
+            top_functions={
+                'cumulative': top_functions(stats, 'cumulative'),
+                'own': top_functions(stats, 'own'),
+            },
+            call_tree=call_tree(stats, stats.total_tt),
+            sql_queries=recorder.queries,
+            # Same format as pstats.Stats.dump_stats()
+            stats_data=marshal.dumps(stats.stats),
+        )
+    except Exception as e:
+        logger.error(f"Could not store request profile for {request.path}: {e}")
+        return response
+
+    response['X-Profile-Id'] = str(profile.pk)
+    return response
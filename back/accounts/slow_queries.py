@@ -0,0 +1,270 @@
+"""
+Slow query log.
+
+An execute wrapper is added to every database connection when it is created
+(AccountsConfig.ready). Statements slower than SLOW_QUERY_THRESHOLD_MS are
+captured with:
+
+- their EXPLAIN (EXPLAIN QUERY PLAN on SQLite, EXPLAIN (FORMAT JSON) on
+  PostgreSQL), taken at most once per fingerprint every
+  SLOW_QUERY_EXPLAIN_INTERVAL seconds per process
+- a short stack snippet of project frames
+- the view that ran them, for queries run during a request
+
+Captures are aggregated into SlowQuery rows keyed by a fingerprint of the
+normalized SQL (literals and IN lists collapsed), with count, total and
+maximum time. `manage.py slow_queries` prints the top N; the admin lists them
+too.
+
+During a request captures are buffered and stored by RequestLogMiddleware
+once the response is ready, outside the view's transaction. Elsewhere (Celery
+tasks, commands) they are stored at once, or on commit inside an atomic block.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import traceback
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STACK_FRAMES = 8
+SAMPLE_SQL_MAX_LENGTH = 4000
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN (FORMAT JSON) ',
+    'mysql': 'EXPLAIN FORMAT=JSON ',
+}
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w".])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+# Buffer of the current request (None outside requests)
+_pending = ContextVar('slow_queries_pending', default=None)
+# Set while capturing, so EXPLAIN and storage queries are not captured themselves
+_capturing = ContextVar('slow_queries_capturing', default=False)
+# fingerprint -> monotonic time of the last EXPLAIN in this process
+_explained = {}
+
+
+def normalize_sql(sql):
+    """SQL with literals replaced by ? and value lists collapsed."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def stack_snippet(limit=STACK_FRAMES):
+    """
+    The innermost project frames that led to the query.
+
+    Querysets are often evaluated by library code (DRF pagination, generic
+    views) with no project frame below the middleware; the innermost library
+    frames outside django.db are shown instead.
+    """
+    base_dir = str(settings.BASE_DIR)
+    site_packages = f'{os.sep}site-packages{os.sep}'
+    stack = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename != __file__ and f'{os.sep}django{os.sep}db{os.sep}' not in frame.filename
+    ]
+    project = [
+        frame for frame in stack
+        if frame.filename.startswith(base_dir) and site_packages not in frame.filename
+        and not frame.filename.endswith(f'accounts{os.sep}middleware.py')
+    ]
+    return ''.join(traceback.format_list((project or stack)[-limit:]))
+
+
+def explain(connection, sql, params):
+    """Query plan as text, or '' when the backend or statement is not supported."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if not prefix or not EXPLAINABLE.match(sql) or connection.needs_rollback:
+        return ''
+
+    # A bare backend cursor: no execute wrappers, no debug query log
+    cursor = connection.create_cursor()
+    savepoint = connection.vendor == 'postgresql' and connection.in_atomic_block
+    try:
+        if savepoint:
+            # A failed EXPLAIN must not abort the surrounding transaction
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        except Exception as e:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            return f'EXPLAIN failed: {e}'
+        finally:
+            if savepoint:
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    finally:
+        cursor.close()
+
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail): indent each step under its parent
+        depth = {0: -1}
+        lines = []
+        for row_id, parent, _notused, detail in rows:
+            depth[row_id] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[row_id] + detail)
+        return '\n'.join(lines)
+    plan = rows[0][0] if rows else ''
+    return plan if isinstance(plan, str) else json.dumps(plan, indent=2)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    if _capturing.get():
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100):
+            token = _capturing.set(True)
+            try:
+                capture(context['connection'], sql, params, many, duration_ms)
+            except Exception as e:
+                logger.error(f"Could not capture slow query: {e}")
+            finally:
+                _capturing.reset(token)
+
+
+def capture(connection, sql, params, many, duration_ms):
+    normalized = normalize_sql(sql)
+    key = fingerprint(normalized)
+    logger.warning(f"SLOW QUERY: {duration_ms:.1f}ms on {connection.alias}: {normalized[:500]}")
+
+    plan = ''
+    interval = getattr(settings, 'SLOW_QUERY_EXPLAIN_INTERVAL', 300)
+    last = _explained.get(key)
+    if not many and (last is None or time.monotonic() - last >= interval):
+        plan = explain(connection, sql, params)
+        _explained[key] = time.monotonic()
+
+    entry = {
+        'fingerprint': key,
+        'normalized_sql': normalized,
+        'sample_sql': f'{sql} -- params: {params!r}'[:SAMPLE_SQL_MAX_LENGTH],
+        'vendor': connection.vendor,
+        'duration_ms': duration_ms,
+        'explain': plan,
+        'stack': stack_snippet(),
+        'view_name': '',
+    }
+    pending = _pending.get()
+    if pending is not None:
+        pending.append(entry)
+    elif connection.in_atomic_block:
+        transaction.on_commit(lambda: store([entry]), using=connection.alias)
+    else:
+        store([entry])
+
+
+def store(entries):
+    """Add the captures to their SlowQuery rows."""
+    from .models import SlowQuery
+
+    token = _capturing.set(True)
+    try:
+        for entry in entries:
+            duration = entry['duration_ms']
+            updates = {
+                'count': F('count') + 1,
+                'total_time_ms': F('total_time_ms') + duration,
+                'max_time_ms': Greatest(F('max_time_ms'), Value(duration)),
+                'last_seen': timezone.now(),
+                'sample_sql': entry['sample_sql'],
+                'stack': entry['stack'],
+                'view_name': entry['view_name'],
+            }
+            if entry['explain']:
+                updates['explain'] = entry['explain']
+            if SlowQuery.objects.filter(fingerprint=entry['fingerprint']).update(**updates):
+                continue
+            try:
+                with transaction.atomic():
+                    SlowQuery.objects.create(
+                        fingerprint=entry['fingerprint'],
+                        normalized_sql=entry['normalized_sql'],
+                        sample_sql=entry['sample_sql'],
+                        vendor=entry['vendor'],
+                        count=1,
+                        total_time_ms=duration,
+                        max_time_ms=duration,
+                        explain=entry['explain'],
+                        stack=entry['stack'],
+                        view_name=entry['view_name'],
+                    )
+            except IntegrityError:
+                # Created by another process in the meantime
+                SlowQuery.objects.filter(fingerprint=entry['fingerprint']).update(**updates)
+    finally:
+        _capturing.reset(token)
+
+
+def start_request_capture():
+    """Buffer captures until finish_request_capture(); returns a reset token."""
+    return _pending.set([])
+
+
+def finish_request_capture(token, view_name=''):
+    pending = _pending.get()
+    _pending.reset(token)
+    if not pending:
+        return
+    for entry in pending:
+        entry['view_name'] = view_name
+    try:
+        store(pending)
+    except Exception as e:
+        logger.error(f"Could not store slow queries: {e}")
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver: add the wrapper once per connection."""
+    if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', True):
+        return
+    if slow_query_wrapper not in connection.execute_wrappers:
+        # First in the list, so outermost (Django applies the wrappers in
+        # reverse): execute_wrapper() context managers active right now pop
+        # the last entry when they exit, which must still be their own
+        connection.execute_wrappers.insert(0, slow_query_wrapper)
+
+
+def top_slow_queries(order='total', limit=20):
+    """SlowQuery rows ordered by 'total', 'count', 'max' or 'avg' time."""
+    from .models import SlowQuery
+
+    if order == 'avg':
+        queryset = SlowQuery.objects.annotate(average=F('total_time_ms') / F('count')).order_by('-average')
+    else:
+        field = {'total': 'total_time_ms', 'count': 'count', 'max': 'max_time_ms'}[order]
+        queryset = SlowQuery.objects.order_by(f'-{field}')
+    return queryset[:limit]
@@ -5,6 +5,9 @@ from django.shortcuts import get_object_or_404
 from django.core.cache import cache
 from django.conf import settings
 from django.core.exceptions import ValidationError, PermissionDenied
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views import View
 from datetime import timedelta
 import logging
 
@@ -24,6 +27,7 @@ from .serializers import (
 )
 from .utils import send_verification_email, send_password_reset_email, EmailRateLimitExceeded, create_response, debug_request
 from .middleware import track_successful_login
+from .metrics import metrics_available, render_metrics
 from .permissions import IsOwnerOrAdmin, IsAdminUser
 
 logger = logging.getLogger(__name__)
@@ -1044,4 +1048,28 @@ class HealthCheckView(APIView):
             )
 
 
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint (text exposition format).
+
+    Scrapers must send METRICS_AUTH_TOKEN as a bearer token. Without a token
+    the endpoint is only open when DEBUG is on.
+    """
+
+    def get(self, request):
+        token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+        if token:
+            supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+            if not constant_time_compare(supplied, token):
+                return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+        elif not settings.DEBUG:
+            return HttpResponse('METRICS_AUTH_TOKEN is not set', status=403, content_type='text/plain')
+
+        if not metrics_available():
+            return HttpResponse('prometheus_client is not installed', status=503, content_type='text/plain')
+
+        body, content_type = render_metrics()
+        return HttpResponse(body, content_type=content_type)
+
+
 # -------------------------------------------------------------------------
@@ -242,6 +242,7 @@ MIDDLEWARE = [
     'accounts.middleware.RequestLogMiddleware',
     'accounts.middleware.LoginTrackingMiddleware',
     'accounts.middleware.SuperuserOnlyAdminMiddleware',  # ✅ NEW: Superuser only admin access
+    'accounts.middleware.RequestProfilingMiddleware',  # Keep last: profiles the view only
 ]
 
 ROOT_URLCONF = 'back.urls'
@@ -310,7 +311,7 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': ('rest_framework.permissions.IsAuthenticatedOrReadOnly',),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'base.pagination.StandardPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -375,36 +376,103 @@ CHANNEL_LAYERS = get_channel_layers_config()
 
 # CACHE CONFIGURATION
 # ===================
+# Key prefixes kept in each process's in-memory tier, with their L1 lifetime
+# in seconds (0 keeps a narrower prefix out). Writes in other processes are
+# seen within CACHE_L1_CHECK_INTERVAL seconds. Every write also updates a
+# version stamp in the shared cache, so keys written on each request (DRF
+# throttle histories, rate_limit_ counters) stay out: L1 would save their
+# read but double their write. Lockout counters are read on every attempt and
+# only change on failures, and while an IP is locked out they are only read.
+CACHE_L1_PREFIXES = {
+    'login_attempts_': 60,
+    'registration_attempts_': 60,
+    'verification_attempts_': 60,
+    'worker_analytics': 300,
+    'chart:': 300,
+    'response_tag:': 60,
+}
+
 def get_cache_config():
     """Get cache configuration based on environment"""
     # Default to database cache for SQLite compatibility
     if os.getenv('USE_REDIS_CACHE', 'False').lower() == 'true':
         print("🔥 CACHE: Using Redis cache")
-        return {
-            'default': {
-                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-                'LOCATION': REDIS_URL,
-                'KEY_PREFIX': f'auction_{ENVIRONMENT}',
-                'TIMEOUT': 300,
-            }
+        shared = {
+            'BACKEND': 'accounts.instrumentation.InstrumentedRedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': f'auction_{ENVIRONMENT}',
+            'TIMEOUT': 300,
         }
     else:
         # Use database cache (SQLite compatible)
         print("🔥 CACHE: Using database cache (SQLite compatible)")
-        return {
-            'default': {
-                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-                'LOCATION': 'cache_table',
-                'TIMEOUT': 300,
-                'KEY_PREFIX': f'auction_{ENVIRONMENT}',
-            }
+        shared = {
+            'BACKEND': 'accounts.instrumentation.InstrumentedDatabaseCache',
+            'LOCATION': 'cache_table',
+            'TIMEOUT': 300,
+            'KEY_PREFIX': f'auction_{ENVIRONMENT}',
         }
 
+    if os.getenv('CACHE_L1_ENABLED', 'True').lower() != 'true':
+        return {'default': shared}
+
+    # In-process LRU in front of the shared cache
+    return {
+        'default': {
+            'BACKEND': 'accounts.instrumentation.InstrumentedTwoTierCache',
+            'OPTIONS': {
+                'L2': 'shared',
+                'L1_PREFIXES': CACHE_L1_PREFIXES,
+                'L1_MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', '1000')),
+                'CHECK_INTERVAL': float(os.getenv('CACHE_L1_CHECK_INTERVAL', '1.0')),
+            },
+        },
+        'shared': shared,
+    }
+
 CACHES = get_cache_config()
 
 # Create cache table for database cache (will be ignored if not using db cache)
 # Note: You'll need to run 'python manage.py createcachetable' for this to work
 
+# CELERY CONFIGURATION
+# ====================
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', REDIS_URL)
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TIMEZONE = TIME_ZONE
+
+# Run tasks inline for local development (no worker/broker needed)
+CELERY_TASK_ALWAYS_EAGER = os.getenv(
+    'CELERY_TASK_ALWAYS_EAGER',
+    str(ENVIRONMENT == 'development' and not RUNNING_IN_DOCKER)
+).lower() == 'true'
+print(f"🔥 CELERY: {'Eager (inline) mode' if CELERY_TASK_ALWAYS_EAGER else 'Broker ' + CELERY_BROKER_URL}")
+
+# Tasks are queued from request handlers (report generation, media imports):
+# with the broker or the result backend down, .delay() must fail fast so the
+# view can mark the work failed instead of blocking the request through
+# kombu's and the redis backend's default retries
+CELERY_BROKER_TIMEOUT = float(os.getenv('CELERY_BROKER_TIMEOUT', 2))
+CELERY_BROKER_CONNECTION_TIMEOUT = CELERY_BROKER_TIMEOUT
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'socket_connect_timeout': CELERY_BROKER_TIMEOUT,
+    'max_retries': 1,
+}
+CELERY_TASK_PUBLISH_RETRY_POLICY = {
+    'max_retries': 1,
+    'interval_start': 0,
+    'interval_step': 0.2,
+    'interval_max': 0.2,
+}
+CELERY_REDIS_SOCKET_CONNECT_TIMEOUT = CELERY_BROKER_TIMEOUT
+CELERY_REDIS_SOCKET_TIMEOUT = CELERY_BROKER_TIMEOUT
+CELERY_RESULT_BACKEND_TRANSPORT_OPTIONS = {
+    'retry_policy': {'max_retries': 1, 'interval_start': 0, 'interval_max': 0.2},
+}
+
 # SESSION CONFIGURATION
 # ====================
 def get_session_config():
@@ -478,13 +546,37 @@ FILE_UPLOAD_PERMISSIONS = 0o644
 # ====================
 LOGGING_EXCLUDED_PATHS = [
     r'^/admin/', r'^/static/', r'^/media/', r'^/favicon\.ico$',
-    r'^/test/', r'^/debug/',
+    r'^/test/', r'^/debug/', r'^/metrics$',
 ]
 
 LOGIN_PATH_REGEX = r'/api/accounts/login/?$'
 SLOW_REQUEST_THRESHOLD_MS = 1000
+# Share of requests instrumented with DB/cache/serializer timings (Server-Timing header)
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '1.0' if DEBUG else '0.1'))
 LOGIN_SECURITY_ALERTS = not DEBUG
 
+# PROMETHEUS METRICS
+# ==================
+# Scrapers send "Authorization: Bearer <token>". Without a token /metrics is
+# only served when DEBUG is on; in production it answers 403 until one is set.
+# Multi-worker servers must export PROMETHEUS_MULTIPROC_DIR before starting
+# (see gunicorn.conf.py); it is read by prometheus_client, not by Django.
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN', '')
+
+# Superusers can profile a request with the X-Profile header or ?_profile=1
+# (stored as RequestProfile in the admin)
+REQUEST_PROFILING_ENABLED = os.getenv('REQUEST_PROFILING_ENABLED', 'True').lower() == 'true'
+
+# Slow query log (SlowQuery in the admin, manage.py slow_queries)
+SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'True').lower() == 'true'
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))
+# Seconds before the same statement is EXPLAINed again by a process
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 300))
+
+# Rendered responses of anonymous GETs on the public property and auction views
+# (base/response_cache.py)
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+
 # Create logs directory
 LOGS_DIR = os.path.join(BASE_DIR, 'logs')
 if not os.path.exists(LOGS_DIR):
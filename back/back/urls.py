@@ -19,10 +19,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from accounts.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('base.urls')),
     path('api/accounts/', include('accounts.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 # ✅ FIXED: Always serve media files in development
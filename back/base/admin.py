@@ -290,6 +290,13 @@ class ReportAdmin(admin.ModelAdmin):
         return False  # Reports are auto-generated
 
 
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_value', 'updated_at')
+    search_fields = ('name',)
+    readonly_fields = ('updated_at',)
+
+
 # -------------------------------------------------------------------------
 # Accounts Models Admin (BankAccount, Payment, UserProfile)
 # -------------------------------------------------------------------------
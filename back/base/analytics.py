@@ -0,0 +1,736 @@
+"""
+Columnar portfolio analytics.
+
+Per-property metrics are bulk-loaded with one grouped query per source table
+(properties, expenses, maintenance requests, payments, leases) into pandas
+columns keyed by property id. Derived metrics (income, ROI, occupancy, ...) are
+then computed vectorized, so the number of queries does not grow with the
+portfolio size.
+
+The same frame is materialized into PropertyAnalytics rows. Rows are refreshed
+incrementally: only properties whose leases, expenses, payments or maintenance
+requests changed after their row was written are recomputed.
+
+numpy and pandas are imported at module level; views import this module
+inside their optional-dependency guard.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Avg, Count, DurationField, Exists, ExpressionWrapper, F, OuterRef, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import (
+    Expense, Lease, MaintenanceRequest, Payment, Property, PropertyAnalytics, RentalProperty, Worker,
+)
+from .occupancy import OCCUPYING_LEASE_STATUSES, covered_days, merge_intervals
+
+logger = logging.getLogger(__name__)
+
+# Rows are streamed from the database in chunks of this size
+ITERATOR_CHUNK_SIZE = 2000
+
+# Payment rows listed by the payment analytics view (latest first); the full
+# listing is paginated at /payments/ and streamed by /payments/export/
+RECENT_PAYMENTS_LIMIT = 100
+
+# Properties are materialized in chunks of this size
+MATERIALIZE_CHUNK_SIZE = 1000
+
+# Reads queue the refresh task at most once per this many seconds
+REFRESH_QUEUED_CACHE_KEY = 'property_analytics:refresh_queued'
+REFRESH_QUEUE_INTERVAL = 60
+
+# roi_percentage and tenant_turnover_rate are DecimalField(max_digits=5, decimal_places=2)
+PERCENTAGE_LIMIT = 999.99
+
+# PropertyAnalytics columns rewritten on every materialization
+MATERIALIZED_FIELDS = [
+    'rental_property', 'total_revenue', 'total_expenses', 'net_income', 'roi_percentage',
+    'occupancy_rate', 'vacancy_days', 'maintenance_cost', 'maintenance_requests_count',
+    'average_repair_time', 'period_start', 'period_end', 'additional_metrics', 'calculation_date',
+]
+
+PROPERTY_COLUMNS = [
+    'property_id', 'property_title', 'property_type', 'property_value',
+    'city', 'latitude', 'longitude', 'rental_id', 'monthly_rent', 'rental_status',
+]
+
+
+# -------------------------------------------------------------------------
+# Loaders
+# -------------------------------------------------------------------------
+
+def _property_ids(properties):
+    """Return an id-only subquery for a property queryset."""
+    return properties.order_by().values('id')
+
+
+def _day_bounds(period_start, period_end):
+    """Convert an inclusive date range into aware datetime bounds [start, end)."""
+    start = timezone.make_aware(datetime.combine(period_start, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(period_end + timedelta(days=1), datetime.min.time()))
+    return start, end
+
+
+def load_property_columns(properties):
+    """
+    Load the static property columns in a single query.
+
+    Args:
+        properties: Property queryset (already scoped to the requesting user)
+
+    Returns:
+        DataFrame: One row per property, indexed by property id
+    """
+    rows = (
+        properties.order_by('id')
+        .prefetch_related(None)
+        .values_list(
+            'id', 'title', 'property_type', 'market_value',
+            'location__city', 'location__latitude', 'location__longitude',
+            'rental_info__id', 'rental_info__monthly_rent', 'rental_info__rental_status',
+        )
+    )
+    frame = pd.DataFrame.from_records(
+        rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE), columns=PROPERTY_COLUMNS
+    )
+    for column in ('property_value', 'latitude', 'longitude', 'monthly_rent'):
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('float64')
+    frame['city'] = frame['city'].fillna('Unknown')
+    return frame.set_index('property_id', drop=False)
+
+
+def load_expense_columns(properties, period_start, period_end):
+    """
+    Aggregate expenses per property for the period in one grouped query.
+
+    Returns:
+        DataFrame: Columns total_expenses and maintenance_cost, indexed by property id
+    """
+    rows = (
+        Expense.objects.filter(
+            expense_property__in=_property_ids(properties),
+            expense_date__range=[period_start, period_end],
+        )
+        .order_by()
+        .values('expense_property')
+        .annotate(
+            total_expenses=Sum('total_amount'),
+            maintenance_cost=Sum('total_amount', filter=Q(expense_type='maintenance')),
+        )
+        .values_list('expense_property', 'total_expenses', 'maintenance_cost')
+    )
+    frame = pd.DataFrame.from_records(
+        list(rows), columns=['property_id', 'total_expenses', 'maintenance_cost']
+    )
+    return frame.set_index('property_id').astype('float64')
+
+
+def load_maintenance_columns(properties, period_start, period_end):
+    """
+    Aggregate maintenance requests per property for the period in one grouped query.
+
+    Returns:
+        DataFrame: Columns maintenance_requests, avg_maintenance_cost and
+        avg_repair_days (completed requests only), indexed by property id
+    """
+    start, end = _day_bounds(period_start, period_end)
+    rows = (
+        MaintenanceRequest.objects.filter(
+            maintenance_property__in=_property_ids(properties),
+            reported_date__gte=start,
+            reported_date__lt=end,
+        )
+        .order_by()
+        .values('maintenance_property')
+        .annotate(
+            maintenance_requests=Count('id'),
+            avg_maintenance_cost=Avg('actual_cost'),
+            avg_repair_time=Avg(
+                ExpressionWrapper(F('completed_date') - F('reported_date'), output_field=DurationField()),
+                filter=Q(status='completed', completed_date__isnull=False),
+            ),
+        )
+        .values_list('maintenance_property', 'maintenance_requests', 'avg_maintenance_cost', 'avg_repair_time')
+    )
+    frame = pd.DataFrame.from_records(
+        list(rows), columns=['property_id', 'maintenance_requests', 'avg_maintenance_cost', 'avg_repair_time']
+    ).set_index('property_id')
+    frame['avg_repair_days'] = pd.to_timedelta(frame.pop('avg_repair_time')).dt.total_seconds() / 86400
+    return frame.astype('float64')
+
+
+def load_payment_columns(properties, period_start, period_end):
+    """
+    Sum paid payments per property for the period in one grouped query.
+
+    Returns:
+        DataFrame: Column collected_revenue, indexed by property id
+    """
+    rows = (
+        Payment.objects.filter(
+            property_reference__in=_property_ids(properties),
+            status='paid',
+            payment_date__range=[period_start, period_end],
+        )
+        .order_by()
+        .values('property_reference')
+        .annotate(collected_revenue=Sum('amount'))
+        .values_list('property_reference', 'collected_revenue')
+    )
+    frame = pd.DataFrame.from_records(list(rows), columns=['property_id', 'collected_revenue'])
+    return frame.set_index('property_id').astype('float64')
+
+
+def load_occupied_days(properties, period_start, period_end):
+    """
+    Count leased days per property within the period.
+
+    Lease intervals overlapping the period are loaded in one query and merged
+    per property with the occupancy engine (occupancy.merge_intervals), so
+    overlapping or back-to-back leases are counted once, as everywhere else.
+
+    Returns:
+        Series: Occupied days indexed by property id
+    """
+    rows = (
+        Lease.objects.filter(
+            rental_property__base_property__in=_property_ids(properties),
+            status__in=OCCUPYING_LEASE_STATUSES,
+            start_date__lte=period_end,
+            end_date__gte=period_start,
+        )
+        .order_by()
+        .values_list('rental_property__base_property_id', 'start_date', 'end_date')
+    )
+    intervals = {}
+    for property_id, start, end in rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        intervals.setdefault(property_id, []).append((start, end))
+
+    return pd.Series(
+        {
+            property_id: covered_days(merge_intervals(property_intervals), period_start, period_end)
+            for property_id, property_intervals in intervals.items()
+        },
+        dtype='float64',
+        name='occupied_days',
+    )
+
+
+# -------------------------------------------------------------------------
+# Portfolio Frame
+# -------------------------------------------------------------------------
+
+def load_portfolio_frame(properties, period_start, period_end):
+    """
+    Build the per-property analytics frame for a portfolio.
+
+    Args:
+        properties: Property queryset (already scoped to the requesting user)
+        period_start: First day of the analytics period (date)
+        period_end: Last day of the analytics period (date)
+
+    Returns:
+        DataFrame: One row per property with financial, occupancy and
+        maintenance metrics, indexed by property id
+    """
+    frame = load_property_columns(properties)
+    if frame.empty:
+        return frame
+
+    frame = frame.join(load_expense_columns(properties, period_start, period_end))
+    frame = frame.join(load_maintenance_columns(properties, period_start, period_end))
+    frame = frame.join(load_payment_columns(properties, period_start, period_end))
+    frame = frame.join(load_occupied_days(properties, period_start, period_end).rename('occupied_days'))
+
+    fill_zero = [
+        'property_value', 'monthly_rent', 'total_expenses', 'maintenance_cost',
+        'maintenance_requests', 'avg_maintenance_cost', 'avg_repair_days',
+        'collected_revenue', 'occupied_days',
+    ]
+    frame[fill_zero] = frame[fill_zero].fillna(0.0)
+    frame['maintenance_requests'] = frame['maintenance_requests'].astype('int64')
+
+    total_days = (period_end - period_start).days + 1
+    value = frame['property_value'].to_numpy()
+
+    frame['annual_income'] = frame['monthly_rent'] * 12
+    frame['net_income'] = frame['annual_income'] - frame['total_expenses']
+    frame['roi'] = np.round(
+        np.divide(
+            frame['net_income'].to_numpy() * 100, value,
+            out=np.zeros(len(frame)), where=value > 0,
+        ),
+        2,
+    )
+    frame['occupancy_rate'] = np.round(frame['occupied_days'] / total_days * 100, 2)
+    frame['vacancy_days'] = np.where(
+        frame['rental_id'].notna(), total_days - frame['occupied_days'], 0
+    ).astype('int64')
+    frame['has_rental'] = frame['rental_id'].notna()
+    return frame
+
+
+def normalize_rows(matrix):
+    """
+    Min-max normalize each row of a 2D array onto a 0-100 scale.
+
+    Rows with no spread are mapped to zeros.
+    """
+    matrix = np.asarray(matrix, dtype='float64')
+    if matrix.size == 0:
+        return matrix
+    low = matrix.min(axis=1, keepdims=True)
+    spread = matrix.max(axis=1, keepdims=True) - low
+    return np.divide(
+        (matrix - low) * 100, spread,
+        out=np.zeros_like(matrix), where=spread > 0,
+    )
+
+
+def scale_rows_to_max(matrix, invert_rows=()):
+    """
+    Scale each row of a 2D array to a percentage of its maximum.
+
+    Rows listed in `invert_rows` are flipped (100 - score) for metrics where
+    lower is better. Rows whose maximum is not positive are mapped to zeros.
+    """
+    matrix = np.asarray(matrix, dtype='float64')
+    if matrix.size == 0:
+        return matrix
+    peak = matrix.max(axis=1, keepdims=True)
+    scaled = np.divide(matrix * 100, peak, out=np.zeros_like(matrix), where=peak > 0)
+    for row in invert_rows:
+        if peak[row, 0] > 0:
+            scaled[row] = 100 - scaled[row]
+    return scaled
+
+
+def frame_to_records(frame, columns):
+    """Convert selected frame columns to JSON-safe records (NaN becomes None)."""
+    subset = frame[columns].astype(object)
+    return subset.where(subset.notna(), None).to_dict('records')
+
+
+def truncate_labels(labels, length=20):
+    """Shorten chart axis labels, matching the existing heat map formatting."""
+    labels = pd.Series(labels, dtype='object').fillna('').astype(str)
+    return labels.where(labels.str.len() <= length, labels.str.slice(0, length) + '...').tolist()
+
+
+# -------------------------------------------------------------------------
+# Materialization
+# -------------------------------------------------------------------------
+
+def analytics_period(today=None):
+    """Return the (start, end) dates of the materialized period: the current calendar year."""
+    today = today or timezone.now().date()
+    return today.replace(month=1, day=1), today.replace(month=12, day=31)
+
+
+def _changed_since_materialized(model, property_lookup):
+    """Exists() clause for rows of `model` updated after the property's analytics row."""
+    return Exists(model.objects.filter(**{
+        property_lookup: OuterRef('pk'),
+        'updated_at__gt': OuterRef('analytics__updated_at'),
+    }))
+
+
+def stale_property_ids(properties, period_start, period_end):
+    """
+    Return ids of properties whose materialized analytics are missing or outdated.
+
+    A row is outdated when it covers another period, or when the property
+    (market value), its rental terms (monthly rent) or any lease, expense,
+    payment or maintenance request of the property was updated after the row
+    was written.
+    """
+    stale = (
+        Q(analytics__isnull=True)
+        | ~Q(analytics__period_start=period_start)
+        | ~Q(analytics__period_end=period_end)
+        | Q(updated_at__gt=F('analytics__updated_at'))
+        | _changed_since_materialized(RentalProperty, 'base_property')
+        | _changed_since_materialized(Lease, 'rental_property__base_property')
+        | _changed_since_materialized(Expense, 'expense_property')
+        | _changed_since_materialized(Payment, 'property_reference')
+        | _changed_since_materialized(MaintenanceRequest, 'maintenance_property')
+    )
+    return list(properties.order_by().filter(stale).values_list('id', flat=True))
+
+
+def materialize_property_analytics(property_ids, period_start, period_end):
+    """
+    Recompute and upsert PropertyAnalytics rows for the given properties.
+
+    Args:
+        property_ids: Ids of the properties to materialize
+        period_start: First day of the analytics period (date)
+        period_end: Last day of the analytics period (date)
+
+    Returns:
+        int: Number of rows written
+    """
+    # Stamp rows with the time the inputs were read, so changes made while the
+    # chunk is being computed are picked up by the next run
+    started = timezone.now()
+    frame = load_portfolio_frame(Property.objects.filter(id__in=property_ids), period_start, period_end)
+    if frame.empty:
+        return 0
+
+    roi = frame['roi'].clip(-PERCENTAGE_LIMIT, PERCENTAGE_LIMIT)
+    rows = [
+        PropertyAnalytics(
+            base_property_id=property_id,
+            rental_property_id=None if pd.isna(rental_id) else int(rental_id),
+            total_revenue=round(annual_income, 2),
+            total_expenses=round(total_expenses, 2),
+            net_income=round(net_income, 2),
+            roi_percentage=round(roi_value, 2),
+            occupancy_rate=round(occupancy_rate, 2),
+            vacancy_days=int(vacancy_days),
+            maintenance_cost=round(maintenance_cost, 2),
+            maintenance_requests_count=int(maintenance_requests),
+            average_repair_time=int(round(avg_repair_days)),
+            period_start=period_start,
+            period_end=period_end,
+            additional_metrics={
+                'monthly_rent': monthly_rent,
+                'occupied_days': int(occupied_days),
+                'collected_revenue': collected_revenue,
+                'avg_maintenance_cost': avg_maintenance_cost,
+            },
+        )
+        for (property_id, rental_id, annual_income, total_expenses, net_income, roi_value,
+             occupancy_rate, vacancy_days, maintenance_cost, maintenance_requests,
+             avg_repair_days, monthly_rent, occupied_days, collected_revenue, avg_maintenance_cost)
+        in zip(
+            frame.index.tolist(), frame['rental_id'].tolist(), frame['annual_income'].tolist(),
+            frame['total_expenses'].tolist(), frame['net_income'].tolist(), roi.tolist(),
+            frame['occupancy_rate'].tolist(), frame['vacancy_days'].tolist(),
+            frame['maintenance_cost'].tolist(), frame['maintenance_requests'].tolist(),
+            frame['avg_repair_days'].tolist(), frame['monthly_rent'].tolist(),
+            frame['occupied_days'].tolist(), frame['collected_revenue'].tolist(),
+            frame['avg_maintenance_cost'].tolist(),
+        )
+    ]
+
+    with transaction.atomic():
+        PropertyAnalytics.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['base_property'],
+            update_fields=MATERIALIZED_FIELDS,
+        )
+        PropertyAnalytics.objects.filter(base_property_id__in=frame.index.tolist()).update(updated_at=started)
+    return len(rows)
+
+
+def _chunks(ids, size):
+    for offset in range(0, len(ids), size):
+        yield ids[offset:offset + size]
+
+
+def _materialize_chunk(property_ids, period_start, period_end):
+    """Materialize one chunk from a worker thread, releasing its DB connection afterwards."""
+    try:
+        return materialize_property_analytics(property_ids, period_start, period_end)
+    finally:
+        connections.close_all()
+
+
+def refresh_property_analytics(properties=None, full=False, chunk_size=MATERIALIZE_CHUNK_SIZE, workers=1):
+    """
+    Bring materialized PropertyAnalytics rows up to date.
+
+    Args:
+        properties: Property queryset to refresh (defaults to all properties)
+        full: Recompute every property instead of only stale ones
+        chunk_size: Number of properties computed per chunk
+        workers: Number of chunks computed in parallel (full rebuilds)
+
+    Returns:
+        int: Number of rows written
+    """
+    if properties is None:
+        properties = Property.objects.all()
+    period_start, period_end = analytics_period()
+
+    if full:
+        property_ids = list(properties.order_by('id').values_list('id', flat=True))
+    else:
+        property_ids = stale_property_ids(properties, period_start, period_end)
+    if not property_ids:
+        return 0
+
+    chunks = list(_chunks(property_ids, chunk_size))
+    if workers <= 1 or len(chunks) == 1:
+        written = sum(materialize_property_analytics(chunk, period_start, period_end) for chunk in chunks)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            written = sum(executor.map(lambda chunk: _materialize_chunk(chunk, period_start, period_end), chunks))
+
+    logger.info(f"Materialized analytics for {written} properties ({'full' if full else 'incremental'})")
+    return written
+
+
+def queue_analytics_refresh():
+    """
+    Queue the refresh_property_analytics task, at most once per REFRESH_QUEUE_INTERVAL.
+
+    Returns:
+        bool: Whether the task was queued
+    """
+    from .tasks import refresh_property_analytics as refresh_task
+
+    if not cache.add(REFRESH_QUEUED_CACHE_KEY, True, REFRESH_QUEUE_INTERVAL):
+        return False
+    try:
+        refresh_task.delay()
+    except Exception as e:
+        logger.error(f"Could not queue the analytics refresh: {e}")
+        cache.delete(REFRESH_QUEUED_CACHE_KEY)
+        return False
+    return True
+
+
+def load_materialized_frame(properties):
+    """
+    Load the analytics frame for a portfolio from materialized rows.
+
+    Reads never write: when rows of the portfolio are stale, a refresh is
+    queued (queue_analytics_refresh) and the existing rows are served until it
+    has run. Properties without a row yet are computed live with
+    load_portfolio_frame().
+
+    Returns:
+        DataFrame: Same columns as load_portfolio_frame(), indexed by property id
+    """
+    period_start, period_end = analytics_period()
+    if stale_property_ids(properties, period_start, period_end):
+        queue_analytics_refresh()
+
+    frame = load_property_columns(properties)
+    if frame.empty:
+        return frame
+
+    rows = (
+        PropertyAnalytics.objects.filter(base_property__in=_property_ids(properties))
+        .order_by()
+        .values_list(
+            'base_property_id', 'total_revenue', 'total_expenses', 'net_income', 'roi_percentage',
+            'occupancy_rate', 'vacancy_days', 'maintenance_cost', 'maintenance_requests_count',
+            'average_repair_time', 'additional_metrics',
+        )
+    )
+    analytics = pd.DataFrame.from_records(
+        rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE),
+        columns=[
+            'property_id', 'annual_income', 'total_expenses', 'net_income', 'roi',
+            'occupancy_rate', 'vacancy_days', 'maintenance_cost', 'maintenance_requests',
+            'avg_repair_days', 'additional_metrics',
+        ],
+    ).set_index('property_id')
+    extra = pd.DataFrame(
+        analytics.pop('additional_metrics').tolist(), index=analytics.index,
+        columns=['occupied_days', 'collected_revenue', 'avg_maintenance_cost'],
+    )
+    analytics = analytics.astype('float64').join(extra.astype('float64'))
+
+    frame = frame.join(analytics)
+    missing_ids = frame.index.difference(analytics.index)
+    if len(missing_ids):
+        missing = properties if len(missing_ids) == len(frame) else properties.filter(id__in=missing_ids.tolist())
+        live = load_portfolio_frame(missing, period_start, period_end)
+        live['roi'] = live['roi'].clip(-PERCENTAGE_LIMIT, PERCENTAGE_LIMIT)
+        frame.loc[live.index, analytics.columns] = live[analytics.columns]
+    frame = frame.fillna({
+        column: 0.0 for column in analytics.columns
+    })
+    frame['maintenance_requests'] = frame['maintenance_requests'].astype('int64')
+    frame['vacancy_days'] = frame['vacancy_days'].astype('int64')
+    frame['has_rental'] = frame['rental_id'].notna()
+    return frame
+
+
+# -------------------------------------------------------------------------
+# Worker Performance
+# -------------------------------------------------------------------------
+
+def load_worker_frame(period_start, period_end):
+    """
+    Load per-worker job statistics for active workers.
+
+    Job totals, completed/pending counts and the average completion time come
+    from one annotated query; category names come from one query on the
+    worker/category through table.
+
+    Returns:
+        tuple: (workers DataFrame indexed by worker id,
+                categories DataFrame with worker_id/category columns)
+    """
+    start, end = _day_bounds(period_start, period_end)
+    in_period = Q(
+        assigned_maintenance__reported_date__gte=start,
+        assigned_maintenance__reported_date__lt=end,
+    )
+    completed = in_period & Q(assigned_maintenance__status='completed')
+    workers = (
+        Worker.objects.filter(status='active')
+        .order_by('first_name', 'last_name')
+        .annotate(
+            total_jobs=Count('assigned_maintenance', filter=in_period),
+            completed_jobs=Count('assigned_maintenance', filter=completed),
+            pending_jobs=Count('assigned_maintenance', filter=in_period & Q(
+                assigned_maintenance__status__in=['assigned', 'in_progress']
+            )),
+            avg_completion_time=Avg(
+                ExpressionWrapper(
+                    F('assigned_maintenance__completed_date') - F('assigned_maintenance__started_date'),
+                    output_field=DurationField(),
+                ),
+                filter=completed,
+            ),
+        )
+        .values_list(
+            'id', 'first_name', 'last_name', 'employee_id', 'hourly_rate', 'rating',
+            'is_available', 'employment_type', 'total_jobs', 'completed_jobs',
+            'pending_jobs', 'avg_completion_time',
+        )
+    )
+    frame = pd.DataFrame.from_records(
+        workers.iterator(chunk_size=ITERATOR_CHUNK_SIZE),
+        columns=[
+            'worker_id', 'first_name', 'last_name', 'employee_id', 'hourly_rate', 'rating',
+            'is_available', 'employment_type', 'total_jobs', 'completed_jobs',
+            'pending_jobs', 'avg_completion_time',
+        ],
+    )
+
+    categories = pd.DataFrame.from_records(
+        Worker.categories.through.objects.filter(
+            worker__status='active'
+        ).values_list('worker_id', 'workercategory__name').iterator(chunk_size=ITERATOR_CHUNK_SIZE),
+        columns=['worker_id', 'category'],
+    )
+    if frame.empty:
+        return frame.set_index('worker_id', drop=False), categories
+
+    frame['worker_name'] = (frame.pop('first_name') + ' ' + frame.pop('last_name')).str.strip()
+    for column in ('hourly_rate', 'rating'):
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('float64').fillna(0.0)
+    for column in ('total_jobs', 'completed_jobs', 'pending_jobs'):
+        frame[column] = frame[column].astype('int64')
+
+    total = frame['total_jobs'].to_numpy(dtype='float64')
+    frame['completion_rate'] = np.divide(
+        frame['completed_jobs'].to_numpy(dtype='float64') * 100, total,
+        out=np.zeros(len(frame)), where=total > 0,
+    )
+    frame['avg_completion_days'] = (
+        pd.to_timedelta(frame.pop('avg_completion_time')).dt.days.fillna(0).astype('int64')
+    )
+    return frame.set_index('worker_id', drop=False), categories
+
+
+def category_rollup(workers, categories):
+    """
+    Roll worker metrics up to skill categories.
+
+    Returns:
+        DataFrame: category, avg_completion_rate, avg_rating (rated workers only), worker_count
+    """
+    columns = ['category', 'avg_completion_rate', 'avg_rating', 'worker_count']
+    if workers.empty or categories.empty:
+        return pd.DataFrame(columns=columns)
+
+    merged = categories.join(workers[['completion_rate', 'rating']], on='worker_id', how='inner')
+    merged['rating'] = merged['rating'].where(merged['rating'] > 0)
+    rollup = merged.groupby('category').agg(
+        avg_completion_rate=('completion_rate', 'mean'),
+        avg_rating=('rating', 'mean'),
+        worker_count=('worker_id', 'count'),
+    ).reset_index()
+    rollup['avg_rating'] = rollup['avg_rating'].fillna(0.0)
+    return rollup[columns]
+
+
+# -------------------------------------------------------------------------
+# Payments
+# -------------------------------------------------------------------------
+
+# Payments in these states count as overdue once their due date has passed
+OVERDUE_PAYMENT_STATUSES = ['pending', 'partial']
+
+OVERDUE_BUCKETS = [0, 30, 60, 90, np.inf]
+OVERDUE_BUCKET_LABELS = ['1-30', '31-60', '61-90', '90+']
+
+
+def load_payment_aggregates(payments, today):
+    """
+    Aggregate a payment queryset with grouped SQL.
+
+    Only aggregates cross into Python: one query grouped by status, one by
+    month and payment type, and one over overdue payments grouped by due date
+    (days overdue and buckets are derived from the due dates with numpy).
+
+    Args:
+        payments: Payment queryset (already scoped and filtered to the period)
+        today: Reference date for overdue calculations
+
+    Returns:
+        dict: DataFrames 'by_status', 'by_month_type' and 'overdue'
+    """
+    payments = payments.order_by()
+
+    by_status = pd.DataFrame.from_records(
+        list(payments.values('status').annotate(count=Count('id'), amount=Sum('amount'))
+             .values_list('status', 'count', 'amount')),
+        columns=['status', 'count', 'amount'],
+    )
+
+    by_month_type = pd.DataFrame.from_records(
+        list(payments.annotate(month=TruncMonth('payment_date'))
+             .values('month', 'payment_type')
+             .annotate(count=Count('id'), amount=Sum('amount'))
+             .values_list('month', 'payment_type', 'count', 'amount')),
+        columns=['month', 'payment_type', 'count', 'amount'],
+    )
+    by_month_type['month'] = pd.to_datetime(by_month_type['month']).dt.strftime('%Y-%m')
+
+    overdue = pd.DataFrame.from_records(
+        list(payments.filter(status__in=OVERDUE_PAYMENT_STATUSES, due_date__lt=today)
+             .values('due_date')
+             .annotate(count=Count('id'), amount=Sum('amount'))
+             .values_list('due_date', 'count', 'amount')),
+        columns=['due_date', 'count', 'amount'],
+    )
+    overdue['days_overdue'] = (
+        np.datetime64(today, 'D') - overdue['due_date'].to_numpy(dtype='datetime64[D]')
+    ).astype('int64')
+    overdue['bucket'] = pd.cut(overdue['days_overdue'], OVERDUE_BUCKETS, labels=OVERDUE_BUCKET_LABELS)
+
+    for frame in (by_status, by_month_type, overdue):
+        frame['count'] = frame['count'].astype('int64')
+        frame['amount'] = frame['amount'].astype('float64')
+
+    return {'by_status': by_status, 'by_month_type': by_month_type, 'overdue': overdue}
+
+
+def overdue_bucket_totals(overdue):
+    """Count and sum overdue payments per bucket (1-30, 31-60, 61-90, 90+ days)."""
+    totals = overdue.groupby('bucket', observed=False)[['count', 'amount']].sum()
+    totals = totals.reindex(OVERDUE_BUCKET_LABELS, fill_value=0)
+    return [
+        {'bucket': label, 'count': int(row['count']), 'amount': float(row['amount'])}
+        for label, row in totals.iterrows()
+    ]
@@ -4,3 +4,29 @@ from django.apps import AppConfig
 class BaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'base'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .fragments import bid_changed, media_changed, room_changed
+        from .models import (
+            Auction, Bid, Expense, Lease, Location, MaintenanceRequest, Media, Payment, Property, Room,
+            expense_deleted, lease_deleted, maintenance_request_deleted, payment_deleted,
+        )
+        from .response_cache import auction_changed, location_changed, property_changed
+
+        receivers = (
+            (Media, media_changed), (Room, room_changed), (Bid, bid_changed),
+            (Property, property_changed), (Auction, auction_changed), (Location, location_changed),
+        )
+        for model, receiver in receivers:
+            uid = f'{receiver.__module__}.{receiver.__name__}'
+            post_save.connect(receiver, sender=model, dispatch_uid=f'{uid}.save')
+            post_delete.connect(receiver, sender=model, dispatch_uid=f'{uid}.delete')
+
+        # Materialized analytics of the property a deleted source row belonged to
+        deleted_receivers = (
+            (Lease, lease_deleted), (MaintenanceRequest, maintenance_request_deleted),
+            (Expense, expense_deleted), (Payment, payment_deleted),
+        )
+        for model, receiver in deleted_receivers:
+            post_delete.connect(receiver, sender=model, dispatch_uid=f'{receiver.__module__}.{receiver.__name__}')
@@ -0,0 +1,85 @@
+"""
+Arabic names, places and wording shared by the sample data scripts and the
+generate_dataset command.
+"""
+
+# Arabic test data
+ARABIC_CITIES = [
+    'الرياض', 'جدة', 'مكة المكرمة', 'المدينة المنورة', 'الدمام', 'الخبر', 'الطائف', 
+    'بريدة', 'تبوك', 'حائل', 'أبها', 'الأحساء', 'نجران', 'جازان', 'ينبع', 'عرعر'
+]
+
+ARABIC_STATES = [
+    'منطقة الرياض', 'منطقة مكة المكرمة', 'المنطقة الشرقية', 'منطقة المدينة المنورة',
+    'منطقة القصيم', 'منطقة تبوك', 'منطقة حائل', 'منطقة عسير', 'منطقة الأحساء',
+    'منطقة نجران', 'منطقة جازان', 'منطقة الباحة', 'منطقة عرعر', 'منطقة الجوف'
+]
+
+ARABIC_FIRST_NAMES = [
+    'أحمد', 'محمد', 'عبدالله', 'عبدالرحمن', 'خالد', 'سعد', 'فهد', 'عبدالعزيز',
+    'طلال', 'وليد', 'ماجد', 'نواف', 'بندر', 'تركي', 'فيصل', 'سلطان', 'راشد',
+    'فاطمة', 'عائشة', 'خديجة', 'مريم', 'زينب', 'نورا', 'سارة', 'هند', 'أمل',
+    'منال', 'رانيا', 'ريم', 'لينا', 'دانا', 'جواهر', 'أسماء'
+]
+
+ARABIC_LAST_NAMES = [
+    'العبدالله', 'المحمد', 'الأحمد', 'السعد', 'الخالد', 'الفهد', 'العتيبي',
+    'الشمري', 'القحطاني', 'الغامدي', 'الحربي', 'المطيري', 'العنزي', 'الدوسري',
+    'الزهراني', 'الثقفي', 'الأسمري', 'العمري', 'الجهني', 'البقمي', 'الرشيدي'
+]
+
+ARABIC_PROPERTY_TYPES = [
+    ('villa', 'فيلا'),
+    ('apartment', 'شقة'),
+    ('office', 'مكتب'),
+    ('shop', 'متجر'),
+    ('warehouse', 'مستودع'),
+    ('land', 'قطعة أرض'),
+    ('building', 'مبنى'),
+    ('compound', 'مجمع'),
+]
+
+ARABIC_PROPERTY_DESCRIPTIONS = [
+    'فيلا فاخرة بتشطيبات عالية الجودة',
+    'شقة واسعة في موقع مميز',
+    'مكتب تجاري في منطقة الأعمال',
+    'متجر في شارع تجاري حيوي',
+    'مستودع واسع للتخزين والتوزيع',
+    'قطعة أرض للاستثمار العقاري',
+    'مبنى تجاري متكامل الخدمات',
+    'مجمع سكني بمرافق حديثة'
+]
+
+ARABIC_ROOM_NAMES = [
+    'غرفة المعيشة', 'غرفة النوم الرئيسية', 'غرفة النوم الثانية', 'غرفة النوم الثالثة',
+    'المطبخ', 'الحمام الرئيسي', 'حمام الضيوف', 'مجلس الرجال', 'مجلس النساء',
+    'غرفة الطعام', 'المكتبة', 'غرفة التخزين', 'الحديقة', 'السطح', 'الباركينج'
+]
+
+ARABIC_DISTRICTS = ['النخيل', 'الملك فهد', 'العليا', 'الورود', 'السلام', 'الملقا', 'الياسمين', 'الروضة']
+
+# Region of each city in ARABIC_CITIES
+ARABIC_CITY_STATES = {
+    'الرياض': 'منطقة الرياض', 'جدة': 'منطقة مكة المكرمة', 'مكة المكرمة': 'منطقة مكة المكرمة',
+    'المدينة المنورة': 'منطقة المدينة المنورة', 'الدمام': 'المنطقة الشرقية', 'الخبر': 'المنطقة الشرقية',
+    'الطائف': 'منطقة مكة المكرمة', 'بريدة': 'منطقة القصيم', 'تبوك': 'منطقة تبوك', 'حائل': 'منطقة حائل',
+    'أبها': 'منطقة عسير', 'الأحساء': 'منطقة الأحساء', 'نجران': 'منطقة نجران', 'جازان': 'منطقة جازان',
+    'ينبع': 'منطقة المدينة المنورة', 'عرعر': 'منطقة عرعر',
+}
+
+# Title wording for each Property.PROPERTY_TYPES value
+ARABIC_PROPERTY_TYPE_TITLES = {
+    'residential': ['فيلا', 'شقة', 'دوبلكس', 'عمارة سكنية'],
+    'commercial': ['مكتب', 'متجر', 'معرض تجاري', 'مبنى تجاري'],
+    'industrial': ['مستودع', 'ورشة', 'مصنع'],
+    'land': ['قطعة أرض', 'أرض سكنية', 'أرض تجارية'],
+    'agricultural': ['مزرعة', 'أرض زراعية'],
+    'mixed_use': ['مجمع', 'مبنى متعدد الاستخدامات'],
+}
+
+ARABIC_EXPENSE_TITLES = {
+    'maintenance': 'صيانة دورية', 'utilities': 'فاتورة الكهرباء والمياه', 'management': 'رسوم إدارة العقار',
+    'insurance': 'تأمين العقار', 'taxes': 'رسوم حكومية', 'marketing': 'حملة تسويقية',
+    'legal': 'استشارة قانونية', 'improvement': 'أعمال تحسين', 'cleaning': 'خدمات تنظيف',
+    'security': 'خدمات حراسة', 'landscaping': 'تنسيق الحدائق', 'other': 'مصروفات متنوعة',
+}
@@ -0,0 +1,292 @@
+"""
+HTTP latency benchmarks for the hot API endpoints.
+
+For every dataset scale, a throwaway test database is created and filled by
+DatasetGenerator, then each endpoint is requested through the test client:
+a few warm-up requests, then a fixed number of measured ones. For every
+(endpoint, scale) the suite records latency percentiles, queries per request
+and response bytes.
+
+Results are plain JSON, so a run can be kept as a baseline and later runs
+diffed against it with compare_results(). plot_scaling() draws latency,
+query and size curves against dataset size.
+
+Queries are counted with CaptureQueriesContext, which adds the same small
+overhead to every measured request.
+"""
+
+import platform
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .datasets import DATASET_SEED, DEFAULT_COUNTS, DatasetGenerator
+from .models import Auction, Message, Property
+
+BENCHMARK_SCALES = (0.1, 1, 10)
+BENCHMARK_ITERATIONS = 30
+BENCHMARK_WARMUP = 3
+BENCHMARK_PERCENTILES = (50, 90, 95, 99)
+
+# A metric regresses when it grows by more than this factor over the baseline
+REGRESSION_THRESHOLD = 1.25
+# Latencies below this (seconds) are too small to compare reliably
+MIN_COMPARABLE_LATENCY = 0.002
+
+User = get_user_model()
+
+
+class Endpoint:
+    """One benchmarked request: a URL built from the context, and who sends it."""
+
+    __slots__ = ('name', 'method', 'url', 'user', 'data')
+
+    def __init__(self, name, url, method='get', user='user', data=None):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.user = user
+        self.data = data
+
+
+class BenchmarkContext:
+    """Users and objects the endpoints are requested with, picked from the dataset."""
+
+    def __init__(self):
+        self.admin = User.objects.create_superuser(email='benchmark-admin@example.sa', password=None)
+        self.user = User.objects.filter(is_verified=True, is_superuser=False).order_by('pk').first()
+        # The busiest owner and correspondent, so per-user endpoints have data to return
+        self.owner = self.busiest_user(Property.objects.filter(owner__isnull=False), 'owner')
+        self.correspondent = self.busiest_user(Message.objects.all(), 'recipient')
+        self.auction = Auction.objects.filter(is_published=True).order_by('-bid_count', 'pk').first()
+        self.live_auction = Auction.objects.filter(
+            status='live', is_published=True, end_date__gt=timezone.now()
+        ).order_by('-end_date').first()
+        self.bids_placed = 0
+
+    @staticmethod
+    def busiest_user(queryset, field):
+        row = queryset.values(field).annotate(total=Count('pk')).order_by('-total', field).first()
+        return User.objects.get(pk=row[field]) if row else None
+
+    def next_bid(self):
+        """A bid just above the current high bid of the live auction."""
+        auction = self.live_auction
+        self.bids_placed += 1
+        amount = (auction.current_bid or auction.starting_bid) + auction.minimum_increment * self.bids_placed
+        return {'auction': auction.pk, 'bid_amount': str(amount)}
+
+    def requires(self, endpoint):
+        """The objects an endpoint needs, or None when the dataset lacks them."""
+        needs = {
+            'auction-detail': self.auction,
+            'bid-create': self.live_auction,
+        }
+        return needs.get(endpoint.name, True) and getattr(self, endpoint.user)
+
+
+ENDPOINTS = (
+    Endpoint('auctions-list', lambda ctx: reverse('auctions')),
+    Endpoint('auction-detail', lambda ctx: reverse('auction', kwargs={'pk': ctx.auction.pk})),
+    Endpoint('bid-create', lambda ctx: reverse('bids'), method='post', data=BenchmarkContext.next_bid),
+    Endpoint('properties-list', lambda ctx: reverse('properties')),
+    Endpoint('dashboard', lambda ctx: reverse('user-dashboard'), user='owner'),
+    Endpoint('system-dashboard', lambda ctx: reverse('system-dashboard'), user='admin'),
+    Endpoint('analytics', lambda ctx: reverse('property-analytics'), user='admin'),
+    Endpoint('messages-list', lambda ctx: reverse('messages'), user='correspondent'),
+    Endpoint('profile', lambda ctx: reverse('accounts:detail'), user='owner'),
+)
+
+
+@contextmanager
+def benchmark_database():
+    """Run the block against a fresh test database, destroyed afterwards."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(samples, percent):
+    """Percentile of the samples with linear interpolation."""
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
+
+
+def summarize(latencies, queries, sizes, statuses):
+    ordered = sorted(latencies)
+    summary = {f'p{percent}': percentile(ordered, percent) for percent in BENCHMARK_PERCENTILES}
+    summary.update({
+        'mean': statistics.fmean(ordered),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'queries': max(queries),
+        'bytes': round(statistics.fmean(sizes)),
+        'statuses': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    })
+    return summary
+
+
+def measure(client, method, url, data=None):
+    """Send one request; returns (seconds, queries, response bytes, status code)."""
+    # The query log is a bounded deque: once full, captured counts would read zero
+    reset_queries()
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        response = getattr(client, method)(url, data, format='json')
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        elapsed = time.perf_counter() - started
+    return elapsed, len(captured), size, response.status_code
+
+
+def benchmark_endpoint(context, endpoint, iterations=BENCHMARK_ITERATIONS, warmup=BENCHMARK_WARMUP):
+    client = APIClient()
+    client.force_authenticate(getattr(context, endpoint.user))
+    url = endpoint.url(context)
+
+    latencies, queries, sizes, statuses = [], [], [], []
+    for iteration in range(warmup + iterations):
+        data = endpoint.data(context) if endpoint.data else None
+        elapsed, query_count, size, status_code = measure(client, endpoint.method, url, data)
+        if iteration >= warmup:
+            latencies.append(elapsed)
+            queries.append(query_count)
+            sizes.append(size)
+            statuses.append(status_code)
+    return summarize(latencies, queries, sizes, statuses)
+
+
+def scaled_counts(scale):
+    return {name: max(1, round(count * scale)) for name, count in DEFAULT_COUNTS.items()}
+
+
+def run_benchmarks(scales=BENCHMARK_SCALES, iterations=BENCHMARK_ITERATIONS, warmup=BENCHMARK_WARMUP,
+                   seed=DATASET_SEED, endpoints=None, log=None):
+    """
+    Benchmark the endpoints at every dataset scale.
+
+    Args:
+        scales: Multipliers of the generator's default row counts
+        iterations: Measured requests per endpoint and scale
+        warmup: Unmeasured requests sent first
+        seed: Dataset seed, so every run measures the same data
+        endpoints: Endpoint names to run (default all)
+        log: Optional callable receiving progress lines
+
+    Returns:
+        dict: {'meta': {...}, 'datasets': {scale: row counts},
+        'results': {endpoint: {scale: summary}}}
+    """
+    log = log or (lambda message: None)
+    selected = [endpoint for endpoint in ENDPOINTS if not endpoints or endpoint.name in endpoints]
+    report = {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'seed': seed,
+            'iterations': iterations,
+            'warmup': warmup,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'datasets': {},
+        'results': {endpoint.name: {} for endpoint in selected},
+    }
+
+    for scale in scales:
+        key = str(scale)
+        with benchmark_database():
+            log(f"scale {key}: generating dataset")
+            dataset = DatasetGenerator(scaled_counts(scale), seed=seed).run()
+            report['datasets'][key] = {**dataset, 'total': sum(dataset.values())}
+            context = BenchmarkContext()
+            cache.clear()
+
+            for endpoint in selected:
+                if not context.requires(endpoint):
+                    log(f"scale {key}: {endpoint.name} skipped, the dataset has nothing to request")
+                    continue
+                summary = benchmark_endpoint(context, endpoint, iterations, warmup)
+                report['results'][endpoint.name][key] = summary
+                log(f"scale {key}: {endpoint.name} p50={summary['p50'] * 1000:.1f}ms "
+                    f"p95={summary['p95'] * 1000:.1f}ms queries={summary['queries']} bytes={summary['bytes']}")
+        cache.clear()
+    return report
+
+
+def compare_results(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Diff a run against a baseline.
+
+    Returns:
+        list: One dict per (endpoint, scale, metric) present in both runs, with
+        'baseline', 'current', 'ratio' and 'regressed'
+    """
+    rows = []
+    for name, scales in current['results'].items():
+        for scale, summary in scales.items():
+            previous = baseline.get('results', {}).get(name, {}).get(scale)
+            if not previous:
+                continue
+            for metric in ('p50', 'p95', 'queries', 'bytes'):
+                old, new = previous.get(metric), summary.get(metric)
+                if old is None or new is None:
+                    continue
+                ratio = new / old if old else (1.0 if not new else float('inf'))
+                if metric in ('p50', 'p95') and max(old, new) < MIN_COMPARABLE_LATENCY:
+                    regressed = False
+                elif metric == 'queries':
+                    regressed = new > old
+                else:
+                    regressed = ratio > threshold
+                rows.append({
+                    'endpoint': name, 'scale': scale, 'metric': metric,
+                    'baseline': old, 'current': new, 'ratio': ratio, 'regressed': regressed,
+                })
+    return rows
+
+
+def plot_scaling(report, path):
+    """Save p95 latency, queries and response size against dataset size as one PNG."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    figure, axes = plt.subplots(1, 3, figsize=(18, 5))
+    metrics = (('p95', 'p95 latency (ms)', 1000), ('queries', 'queries / request', 1), ('bytes', 'response bytes', 1))
+    for name, scales in report['results'].items():
+        points = sorted(
+            ((report['datasets'][scale]['total'], summary) for scale, summary in scales.items()),
+            key=lambda point: point[0],
+        )
+        if not points:
+            continue
+        rows = [total for total, _ in points]
+        for axis, (metric, label, factor) in zip(axes, metrics):
+            axis.plot(rows, [summary[metric] * factor for _, summary in points], marker='o', label=name)
+
+    for axis, (metric, label, factor) in zip(axes, metrics):
+        axis.set_xscale('log')
+        axis.set_xlabel('dataset rows')
+        axis.set_ylabel(label)
+        axis.grid(True, alpha=0.3)
+    axes[0].legend(fontsize='small')
+    figure.tight_layout()
+    figure.savefig(path, dpi=100)
+    plt.close(figure)
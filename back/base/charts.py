@@ -0,0 +1,113 @@
+"""
+Cached chart rendering for the analytics endpoints.
+
+Each chart is described by a spec (chart type, title, axes, ...) and a small
+input dataset. The serialized plotly JSON is cached under a hash of the
+dataset plus the spec, so requests over unchanged data never rebuild a figure.
+
+In "data" mode (?charts=data) no figure is built at all: the dataset is
+returned as columnar arrays next to its spec for the frontend to render.
+
+pandas and plotly are imported at module level; views import this module
+inside their optional-dependency guard.
+"""
+
+import hashlib
+import json
+import logging
+
+import pandas as pd
+from django.core.cache import cache
+from plotly.utils import PlotlyJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_TIMEOUT = 60 * 60  # 1 hour
+
+# Bump when a figure builder changes so cached figures are not reused
+CHART_CACHE_VERSION = 1
+
+CHART_MODES = ('figure', 'data')
+
+
+def get_chart_mode(request):
+    """Return the chart mode requested with ?charts=figure|data (defaults to figure)."""
+    mode = request.query_params.get('charts', 'figure')
+    return mode if mode in CHART_MODES else 'figure'
+
+
+def dataset_digest(data):
+    """
+    Hash a chart dataset.
+
+    Args:
+        data: DataFrame, Series or JSON-serializable structure
+
+    Returns:
+        str: Hex digest that changes whenever the data changes
+    """
+    digest = hashlib.sha1()
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    if isinstance(data, pd.DataFrame):
+        digest.update(json.dumps([str(column) for column in data.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    else:
+        digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def columnar(data):
+    """
+    Convert a chart dataset into JSON-safe columnar arrays.
+
+    Returns:
+        dict: {'index': [...], 'columns': {name: [...]}} for frames, the data itself otherwise
+    """
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    if not isinstance(data, pd.DataFrame):
+        return data
+    values = data.astype(object)
+    values = values.where(values.notna(), None)
+    return {
+        'index': [None if pd.isna(label) else label for label in data.index.tolist()],
+        'columns': {str(column): values[column].tolist() for column in data.columns},
+    }
+
+
+class ChartRenderer:
+    """
+    Collects the charts of one analytics response.
+
+    Usage:
+        charts = ChartRenderer(get_chart_mode(request))
+        charts.add('roi', frame[['title', 'roi']], {'type': 'bar', 'title': 'ROI'}, build_roi)
+        return Response({'charts': charts.charts})
+
+    Builders are called as builder(data, spec) and must return a plotly figure.
+    They only run on a cache miss in figure mode.
+    """
+
+    def __init__(self, mode='figure', timeout=CHART_CACHE_TIMEOUT):
+        self.mode = mode
+        self.timeout = timeout
+        self.charts = {}
+
+    def cache_key(self, name, data, spec):
+        spec_digest = hashlib.md5(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+        return f"chart:v{CHART_CACHE_VERSION}:{name}:{spec_digest}:{dataset_digest(data)}"
+
+    def add(self, name, data, spec, builder):
+        """Render (or fetch from cache) one chart and store it under `name`."""
+        if self.mode == 'data':
+            self.charts[name] = {'spec': spec, 'data': columnar(data)}
+            return self.charts[name]
+
+        key = self.cache_key(name, data, spec)
+        payload = cache.get(key)
+        if payload is None:
+            payload = json.dumps(builder(data, spec), cls=PlotlyJSONEncoder)
+            cache.set(key, payload, self.timeout)
+        self.charts[name] = payload
+        return payload
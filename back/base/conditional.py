@@ -0,0 +1,142 @@
+"""
+Conditional GET (ETag / Last-Modified) for list and detail views.
+
+ConditionalGetMixin answers If-None-Match and If-Modified-Since with 304
+before the serializer runs:
+
+- details: the validators come from the updated_at of the object, read by
+  get_object() anyway
+- lists: one aggregate over the filtered queryset, MAX(updated_at) and
+  COUNT(*), whose count the paginator reuses instead of its own COUNT(*)
+
+Only views setting conditional_dependencies get validators: representations
+must be derived from the row and from the relations listed there (their
+updated_at is part of the validators). Writes to media, rooms and bids touch
+the updated_at of their owner (fragments.touch_fragment_owner), so they count
+as the owner's. Views whose serializers aggregate other tables are left out.
+
+ETags are weak: counters updated with queryset.update() (view_count) and
+time-based fields (time_remaining) do not change them. They also depend on
+the user, the language, the origin and the full path, since those change the
+representation. Last-Modified of a list does not see the hard delete of a row
+older than the newest one; If-None-Match, which takes precedence, does
+through the count.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+
+from django.db.models import Count, Max
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework.response import Response
+
+from accounts.metrics import CONDITIONAL_REQUESTS
+
+from .fragments import related_object
+
+
+def _timestamp(value):
+    return f'{value.timestamp():.6f}' if value else '-'
+
+
+def make_etag(request, *parts):
+    user = request.user.pk if request.user.is_authenticated else '-'
+    origin = f'{request.scheme}://{request.get_host()}'
+    raw = '|'.join([origin, request.get_full_path(), str(user), translation.get_language() or '', *map(str, parts)])
+    return 'W/' + quote_etag(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 (or 412) answering the request's preconditions, or None to render the response."""
+    if not any(header in request.META for header in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    CONDITIONAL_REQUESTS.labels('modified' if response is None else 'not_modified').inc()
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Validators depend on the user
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def stored_not_modified(request, response):
+    """not_modified() for a stored response carrying its validators (response_cache.py)."""
+    if 'ETag' not in response:
+        return None
+    last_modified = parse_http_date_safe(response.get('Last-Modified', ''))
+    last_modified = datetime.fromtimestamp(last_modified, tz=timezone.utc) if last_modified else None
+    not_modified_response = not_modified(request, response['ETag'], last_modified)
+    if not_modified_response is not None and 'Vary' in response:
+        not_modified_response['Vary'] = response['Vary']
+    return not_modified_response
+
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified for generic list and detail views (see the module docstring).
+
+    conditional_dependencies: select_related paths whose updated_at is part of
+    the validators; None (the default) leaves the view without validators.
+    perform_retrieve(instance): side effects of reading an object, run for
+    304s too. retrieve() keeps the object in self.object, like Django's
+    generic views.
+    """
+
+    conditional_dependencies = None
+
+    def validator_fields(self):
+        return ['updated_at'] + [f'{path}__updated_at' for path in self.conditional_dependencies]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = last_modified = None
+        if self.conditional_dependencies is not None:
+            fields = self.validator_fields()
+            aggregates = queryset.aggregate(
+                count=Count('pk'), **{f'max_{index}': Max(field) for index, field in enumerate(fields)}
+            )
+            latest = [aggregates[f'max_{index}'] for index in range(len(fields))]
+            etag = make_etag(request, aggregates['count'], *map(_timestamp, latest))
+            last_modified = max(filter(None, latest), default=None)
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            # Spares the paginator its COUNT(*) (StandardPagination)
+            self.list_count = aggregates['count']
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(queryset, many=True).data)
+        return set_validators(response, etag, last_modified) if etag else response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.object = self.get_object()
+        self.perform_retrieve(instance)
+        etag = last_modified = None
+        if self.conditional_dependencies is not None:
+            latest = [instance.updated_at] + [
+                getattr(related_object(instance, path), 'updated_at', None) for path in self.conditional_dependencies
+            ]
+            etag = make_etag(request, instance._meta.label_lower, instance.pk, *map(_timestamp, latest))
+            last_modified = max(filter(None, latest), default=None)
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+
+        response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, last_modified) if etag else response
+
+    def perform_retrieve(self, instance):
+        pass
@@ -4,6 +4,7 @@ from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.utils import timezone
+from accounts.metrics import record_bid, timed_channel_send, websocket_connected, websocket_disconnected
 from .models import Auction, Bid
 import logging
 
@@ -21,12 +22,17 @@ class AuctionConsumer(AsyncWebsocketConsumer):
         
         await self.channel_layer.group_add(self.auction_group_name, self.channel_name)
         await self.accept()
+        websocket_connected(self.auction_group_name)
+        self.counted = True
         
         # Send initial auction data with auto-updated status
         auction_data = await self.get_auction_data()
         await self.send(text_data=json.dumps(auction_data))
     
     async def disconnect(self, close_code):
+        if getattr(self, 'counted', False):
+            websocket_disconnected(self.auction_group_name)
+            self.counted = False
         await self.channel_layer.group_discard(self.auction_group_name, self.channel_name)
     
     async def receive(self, text_data):
@@ -55,16 +61,19 @@ class AuctionConsumer(AsyncWebsocketConsumer):
     async def handle_place_bid(self, data):
         """Enhanced bid placement with simplified logic"""
         if not self.is_authenticated():
+            record_bid('websocket', 'AUTH_REQUIRED')
             await self.send_error('Authentication required', 'AUTH_REQUIRED')
             return
         
         user = self.scope['user']
         if not getattr(user, 'is_verified', False):
+            record_bid('websocket', 'VERIFICATION_REQUIRED')
             await self.send_error('Email verification required', 'VERIFICATION_REQUIRED')
             return
         
         amount = data.get('amount')
         if not amount or amount <= 0:
+            record_bid('websocket', 'INVALID_AMOUNT')
             await self.send_error('Invalid bid amount', 'INVALID_AMOUNT')
             return
         
@@ -72,15 +81,17 @@ class AuctionConsumer(AsyncWebsocketConsumer):
         bid_result = await self.create_simplified_bid(user.id, amount, data.get('max_bid'))
         
         if bid_result['success']:
+            record_bid('websocket')
             # Notify all auction participants about the new bid
             updated_auction_data = await self.get_auction_data()
             
-            await self.channel_layer.group_send(self.auction_group_name, {
-                'type': 'auction_update',
-                'auction': updated_auction_data,
-                'new_bid': bid_result['bid_data'],
-                'extension_info': bid_result.get('extension_info')
-            })
+            with timed_channel_send():
+                await self.channel_layer.group_send(self.auction_group_name, {
+                    'type': 'auction_update',
+                    'auction': updated_auction_data,
+                    'new_bid': bid_result['bid_data'],
+                    'extension_info': bid_result.get('extension_info')
+                })
             
             await self.send_success('Bid placed successfully', {
                 'bid': bid_result['bid_data'],
@@ -88,6 +99,7 @@ class AuctionConsumer(AsyncWebsocketConsumer):
                 'extension_info': bid_result.get('extension_info')
             })
         else:
+            record_bid('websocket', bid_result.get('code') or 'BID_ERROR')
             await self.send_error(bid_result['message'], bid_result.get('code'))
 
     async def handle_get_auction_data(self, data):
@@ -0,0 +1,647 @@
+"""
+Seeded synthetic datasets for load and performance testing.
+
+DatasetGenerator fills the database with users, properties, auctions and
+their bids, rental units with tenants and leases, expenses and payments, at
+any scale. Rows are written with bulk_create in batches and referential
+integrity is kept by construction: every foreign key points at a row created
+by an earlier stage. Only primary keys and the few attributes later stages
+need are kept in memory.
+
+Output is deterministic. Every stage draws from its own random.Random seeded
+with (seed, stage), and all dates are relative to an anchor date, so the same
+seed, counts and anchor date produce the same data on an empty database.
+Unique identifiers (emails, deed numbers, national ids) embed a tag derived
+from the seed, so datasets generated with different seeds can coexist.
+
+The data is shaped like the real thing:
+
+- bids go to auctions that have started, with a heavy-tailed spread, rising
+  amounts and the top bid marked as winning; auction counters match
+- each rental unit has a back-to-back chain of leases that never overlap,
+  with renewals kept by the same tenant and the latest lease active when the
+  unit is occupied on the anchor date
+- rent payments fall inside the lease they belong to
+- messages are inquiries about properties sent to their owners, some with a
+  reply in the same thread
+"""
+
+import math
+import random
+import time as clock
+import uuid
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from accounts.models import UserProfile
+
+from .arabic_data import (
+    ARABIC_CITIES, ARABIC_CITY_STATES, ARABIC_DISTRICTS, ARABIC_EXPENSE_TITLES,
+    ARABIC_FIRST_NAMES, ARABIC_LAST_NAMES, ARABIC_PROPERTY_DESCRIPTIONS, ARABIC_PROPERTY_TYPE_TITLES,
+)
+from .models import Auction, Bid, Expense, Lease, Location, Message, Payment, Property, RentalProperty, Tenant
+
+DATASET_SEED = 42
+DATASET_BATCH_SIZE = 5000
+DATASET_PASSWORD = 'Dataset123!'
+DATASET_COUNTRY = 'المملكة العربية السعودية'
+
+# Row counts generated when none are given
+DEFAULT_COUNTS = {
+    'users': 1000,
+    'properties': 2000,
+    'auctions': 200,
+    'bids': 10000,
+    'leases': 2000,
+    'expenses': 5000,
+    'payments': 5000,
+    'messages': 5000,
+}
+
+USER_ROLE_WEIGHTS = (
+    ('user', 60), ('owner', 15), ('tenant', 12), ('agent', 6), ('appraiser', 3),
+    ('manager', 2), ('accountant', 1), ('inspector', 1),
+)
+PROPERTY_TYPE_WEIGHTS = (
+    ('residential', 55), ('commercial', 20), ('land', 10), ('mixed_use', 6),
+    ('industrial', 5), ('agricultural', 4),
+)
+BUILDING_TYPES = {
+    'residential': ('apartment', 'villa', 'house'),
+    'commercial': ('office', 'retail'),
+    'industrial': ('warehouse',),
+    'mixed_use': ('other',),
+}
+# (min, max) size in square meters and price per square meter, per property type
+PROPERTY_SIZES = {
+    'residential': (90, 900), 'commercial': (50, 2000), 'industrial': (500, 10000),
+    'land': (300, 20000), 'agricultural': (5000, 100000), 'mixed_use': (400, 5000),
+}
+PRICE_PER_SQM = {
+    'residential': (2500, 9000), 'commercial': (3000, 12000), 'industrial': (800, 2500),
+    'land': (500, 4000), 'agricultural': (30, 300), 'mixed_use': (2500, 8000),
+}
+RENTABLE_PROPERTY_TYPES = ('residential', 'commercial', 'mixed_use')
+
+# Average number of leases in a rental unit's history
+LEASES_PER_UNIT = 4
+LEASE_TERMS_MONTHS = (6, 12, 12, 12, 24)
+LEASE_GAPS_DAYS = (0, 0, 0, 7, 15, 30, 60)
+OCCUPANCY_RATE = 0.85
+RENEWAL_RATE = 0.6
+LEASE_TERMS_TEXT = 'يلتزم المستأجر بسداد الإيجار في موعده والمحافظة على العقار وإعادته بالحالة التي استلمه بها.'
+
+User = get_user_model()
+
+
+def _days(months):
+    return round(months * 365 / 12)
+
+
+class DatasetGenerator:
+    """
+    Generate a seeded synthetic dataset.
+
+    Usage:
+        generator = DatasetGenerator({'users': 100000, 'bids': 1000000}, seed=7)
+        generator.run()
+        # {'users': 100000, 'locations': 128, 'properties': 2000, ...}
+    """
+
+    def __init__(self, counts=None, seed=DATASET_SEED, anchor_date=None, batch_size=DATASET_BATCH_SIZE, log=None):
+        self.counts = {**DEFAULT_COUNTS, **(counts or {})}
+        self.seed = seed
+        self.anchor_date = anchor_date or timezone.now().date()
+        self.anchor = datetime.combine(self.anchor_date, time(12), tzinfo=dt_timezone.utc)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.tag = f"ds{seed}"
+        self.result = {}
+
+        # State shared between stages
+        self.user_ids = []
+        self.locations = []    # (pk, city, district)
+        self.properties = []   # (pk, owner_id, property_type, market_value, title, slug)
+        self.auctions = []     # (index, pk, start, bidding_end, starting_bid, increment, bid_count)
+        self.leases = []       # (tenant_id, property_id, owner_id, monthly_rent, start_date, end_date)
+        self.tenant_count = 0
+
+    def rng(self, stage):
+        return random.Random(f"{self.seed}:{stage}")
+
+    def batches(self, count, size=None):
+        size = size or self.batch_size
+        for start in range(0, count, size):
+            yield start, min(count, start + size)
+
+    def moment(self, day, rng):
+        """An aware datetime during office hours of `day`."""
+        return datetime.combine(day, time(rng.randint(8, 21), rng.randint(0, 59)), tzinfo=dt_timezone.utc)
+
+    def email(self, kind, index):
+        return f"{self.tag}.{kind}{index}@example.sa"
+
+    def exists(self):
+        """Whether a dataset with this seed is already in the database."""
+        return User.objects.filter(email=self.email('user', 0)).exists()
+
+    def run(self):
+        """Generate every stage; returns the number of rows created per model."""
+        stages = [
+            ('users', self.generate_users),
+            ('locations', self.generate_locations),
+            ('properties', self.generate_properties),
+            ('auctions', self.generate_auctions),
+            ('bids', self.generate_bids),
+            ('leases', self.generate_rentals),
+            ('expenses', self.generate_expenses),
+            ('payments', self.generate_payments),
+            ('messages', self.generate_messages),
+        ]
+        for name, stage in stages:
+            started = clock.monotonic()
+            stage()
+            self.log(f"{name}: {self.result.get(name, 0)} rows in {clock.monotonic() - started:.1f}s")
+        return self.result
+
+    def count(self, name, created):
+        self.result[name] = self.result.get(name, 0) + created
+
+    # ---------------------------------------------------------------------
+    # Users and places
+    # ---------------------------------------------------------------------
+
+    def generate_users(self):
+        rng = self.rng('users')
+        # Hashing is deliberately slow: every generated user shares one hash
+        password = make_password(DATASET_PASSWORD)
+        roles, weights = zip(*USER_ROLE_WEIGHTS)
+
+        for start, stop in self.batches(self.counts['users']):
+            users = []
+            for index in range(start, stop):
+                joined = self.anchor_date - timedelta(days=rng.randint(0, 1095))
+                users.append(User(
+                    uuid=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    email=self.email('user', index),
+                    password=password,
+                    first_name=rng.choice(ARABIC_FIRST_NAMES),
+                    last_name=rng.choice(ARABIC_LAST_NAMES),
+                    phone_number=f"9665{rng.randint(10000000, 99999999)}",
+                    role=rng.choices(roles, weights)[0],
+                    is_active=True,
+                    is_verified=True,
+                    date_joined=self.moment(joined, rng),
+                ))
+
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                # bulk_create skips CustomUser.save(), which creates the profile
+                profiles = []
+                for user in users:
+                    city = rng.choice(ARABIC_CITIES)
+                    profiles.append(UserProfile(
+                        user_id=user.pk,
+                        identity_number=f"1{rng.randint(100000000, 999999999)}",
+                        city=city,
+                        state=ARABIC_CITY_STATES[city],
+                        address=f"حي {rng.choice(ARABIC_DISTRICTS)}",
+                    ))
+                UserProfile.objects.bulk_create(profiles)
+
+            self.user_ids.extend(user.pk for user in users)
+            self.count('users', len(users))
+
+    def generate_locations(self):
+        """One location per city district, reusing the ones that already exist."""
+        wanted = {}
+        for city_index, city in enumerate(ARABIC_CITIES):
+            for district_index, district in enumerate(ARABIC_DISTRICTS):
+                postal_code = str(11000 + city_index * 100 + district_index)
+                wanted[(city, ARABIC_CITY_STATES[city], DATASET_COUNTRY, postal_code)] = district
+
+        locations = Location.objects.get_many_by_natural_key(wanted)
+        missing = [
+            Location(city=city, state=state, country=country, postal_code=postal_code)
+            for (city, state, country, postal_code) in wanted
+            if (city, state, country, postal_code) not in locations
+        ]
+        if missing:
+            Location.objects.bulk_create(missing, ignore_conflicts=True)
+            locations.update(Location.objects.get_many_by_natural_key(
+                location.natural_key() for location in missing
+            ))
+
+        self.locations = [(locations[key].pk, key[0], district) for key, district in wanted.items()]
+        self.count('locations', len(missing))
+
+    # ---------------------------------------------------------------------
+    # Properties, auctions and bids
+    # ---------------------------------------------------------------------
+
+    def generate_properties(self):
+        rng = self.rng('properties')
+        types, weights = zip(*PROPERTY_TYPE_WEIGHTS)
+        auction_count = self.counts['auctions']
+
+        for start, stop in self.batches(self.counts['properties']):
+            properties = []
+            for index in range(start, stop):
+                property_type = rng.choices(types, weights)[0]
+                location_id, city, district = rng.choice(self.locations)
+                size = rng.randint(*PROPERTY_SIZES[property_type])
+                market_value = round(size * rng.randint(*PRICE_PER_SQM[property_type]), -3)
+                building_types = BUILDING_TYPES.get(property_type)
+                properties.append(Property(
+                    title=f"{rng.choice(ARABIC_PROPERTY_TYPE_TITLES[property_type])} في حي {district}، {city}",
+                    property_type=property_type,
+                    building_type=rng.choice(building_types) if building_types else None,
+                    # The first properties are the ones put up for auction
+                    status='auction' if index < auction_count else 'available',
+                    deed_number=f"{self.tag}-{index + 1:08d}",
+                    description=rng.choice(ARABIC_PROPERTY_DESCRIPTIONS),
+                    size_sqm=Decimal(size),
+                    floors=rng.randint(1, 4) if building_types else None,
+                    year_built=rng.randint(1985, self.anchor_date.year) if building_types else None,
+                    location_id=location_id,
+                    address=f"حي {district}، شارع {rng.randint(1, 300)}",
+                    market_value=Decimal(market_value),
+                    minimum_bid=Decimal(round(market_value * 0.8, -3)),
+                    owner_id=rng.choice(self.user_ids) if self.user_ids else None,
+                    is_published=rng.random() < 0.9,
+                    is_verified=rng.random() < 0.7,
+                ))
+
+            # One sequence reservation per property type; slugs are unique through the number
+            by_type = {}
+            for property_obj in properties:
+                by_type.setdefault(property_obj.property_type, []).append(property_obj)
+            for property_type, typed in by_type.items():
+                for property_obj, number in zip(typed, Property.number_series(property_type).allocate(len(typed))):
+                    property_obj.property_number = number
+                    property_obj.slug = slugify(f"{property_obj.title} {number}", allow_unicode=True)
+
+            Property.objects.bulk_create(properties)
+            self.properties.extend(
+                (p.pk, p.owner_id, p.property_type, int(p.market_value), p.title, p.slug) for p in properties
+            )
+            self.count('properties', len(properties))
+
+    def bid_amounts(self, index, starting_bid, increment, bid_count):
+        """Rising bid amounts of one auction, replayable from its own seed."""
+        rng = random.Random(f"{self.seed}:bids:{index}")
+        amounts, amount = [], starting_bid
+        for _ in range(bid_count):
+            amount += increment * rng.randint(1, 5)
+            amounts.append(amount)
+        return amounts
+
+    def bid_time(self, start, bidding_end, position, bid_count):
+        return start + (bidding_end - start) * (position + 1) / (bid_count + 1)
+
+    def generate_auctions(self):
+        rng = self.rng('auctions')
+        auction_count = min(self.counts['auctions'], len(self.properties))
+
+        plans = []
+        for index in range(auction_count):
+            start = self.moment(self.anchor_date - timedelta(days=rng.randint(-30, 180)), rng)
+            end = start + timedelta(days=rng.randint(3, 30))
+            if start > self.anchor:
+                status = 'scheduled'
+            elif end > self.anchor:
+                status = 'live'
+            else:
+                status = rng.choice(('ended', 'completed'))
+            plans.append((start, end, status))
+
+        # Bids only go to auctions that have started, a few popular ones getting most of them
+        weights = [rng.paretovariate(1.5) if status != 'scheduled' else 0 for _, _, status in plans]
+        bid_counts = Counter()
+        if self.counts['bids'] and self.user_ids and any(weights):
+            bid_counts = Counter(rng.choices(range(auction_count), weights, k=self.counts['bids']))
+
+        for start_index, stop_index in self.batches(auction_count):
+            auctions, extra = [], []
+            for index in range(start_index, stop_index):
+                pk, owner_id, property_type, market_value, title, slug = self.properties[index]
+                start, end, status = plans[index]
+                starting_bid = Decimal(round(market_value * 0.7, -3))
+                increment = Decimal(max(100, round(market_value * 0.005, -2)))
+                bid_count = bid_counts[index]
+                bidding_end = min(end, self.anchor)
+
+                auction = Auction(
+                    title=f"مزاد {title}",
+                    slug=f"{slug[:240]}-auction",
+                    auction_type=rng.choices(('public', 'private', 'sealed'), (80, 10, 10))[0],
+                    status=status,
+                    description=f"مزاد علني على {title}",
+                    start_date=start,
+                    end_date=end,
+                    registration_deadline=start - timedelta(days=1),
+                    related_property_id=pk,
+                    starting_bid=starting_bid,
+                    minimum_increment=increment,
+                    is_published=True,
+                    is_featured=rng.random() < 0.1,
+                    view_count=rng.randint(0, 5000),
+                    bid_count=bid_count,
+                    registered_bidders=bid_count and rng.randint(1, bid_count),
+                )
+                if bid_count:
+                    auction.current_bid = self.bid_amounts(index, starting_bid, increment, bid_count)[-1]
+                    auction.last_bid_time = self.bid_time(start, bidding_end, bid_count - 1, bid_count)
+                auctions.append(auction)
+                extra.append((index, start, bidding_end, starting_bid, increment, bid_count))
+
+            Auction.objects.bulk_create(auctions)
+            self.auctions.extend(
+                (index, auction.pk, start, bidding_end, starting_bid, increment, bid_count)
+                for auction, (index, start, bidding_end, starting_bid, increment, bid_count) in zip(auctions, extra)
+            )
+            self.count('auctions', len(auctions))
+
+    def generate_bids(self):
+        rng = self.rng('bids')
+        batch = []
+        for index, auction_id, start, bidding_end, starting_bid, increment, bid_count in self.auctions:
+            for position, amount in enumerate(self.bid_amounts(index, starting_bid, increment, bid_count)):
+                is_top = position == bid_count - 1
+                batch.append(Bid(
+                    auction_id=auction_id,
+                    bidder_id=rng.choice(self.user_ids),
+                    bid_amount=amount,
+                    bid_time=self.bid_time(start, bidding_end, position, bid_count),
+                    status='winning' if is_top else 'outbid',
+                    is_verified=True,
+                ))
+                if len(batch) >= self.batch_size:
+                    Bid.objects.bulk_create(batch)
+                    self.count('bids', len(batch))
+                    batch = []
+        if batch:
+            Bid.objects.bulk_create(batch)
+            self.count('bids', len(batch))
+
+    # ---------------------------------------------------------------------
+    # Rentals
+    # ---------------------------------------------------------------------
+
+    def lease_chain(self, rng, length):
+        """
+        Back-to-back lease periods of one unit, oldest first.
+
+        Returns a list of [start_date, end_date, status, renews_previous].
+        The latest lease covers the anchor date when the unit is occupied.
+        """
+        chain = []
+        term = _days(rng.choice(LEASE_TERMS_MONTHS))
+        if rng.random() < OCCUPANCY_RATE:
+            end = self.anchor_date + timedelta(days=rng.randint(0, term - 1))
+        else:
+            end = self.anchor_date - timedelta(days=rng.randint(1, 90))
+
+        for _ in range(length):
+            start = end - timedelta(days=term - 1)
+            chain.append([start, end, 'active' if start <= self.anchor_date <= end else 'expired', False])
+            gap = rng.choice(LEASE_GAPS_DAYS)
+            end = start - timedelta(days=gap + 1)
+            term = _days(rng.choice(LEASE_TERMS_MONTHS))
+            # Contiguous leases are often renewals by the same tenant
+            if gap == 0 and rng.random() < RENEWAL_RATE:
+                chain[-1][3] = True
+
+        chain.reverse()
+        for previous, lease in zip(chain, chain[1:]):
+            if lease[3]:
+                previous[2] = 'renewed'
+        chain[0][3] = False
+        return chain
+
+    def new_tenant(self, rng):
+        index = self.tenant_count
+        self.tenant_count += 1
+        first_name = rng.choice(ARABIC_FIRST_NAMES)
+        return Tenant(
+            first_name=first_name,
+            last_name=rng.choice(ARABIC_LAST_NAMES),
+            tenant_type=rng.choices(('individual', 'family', 'company'), (50, 40, 10))[0],
+            status='former',
+            email=self.email('tenant', index),
+            phone=f"9665{rng.randint(10000000, 99999999)}",
+            national_id=f"{self.tag}{index:08d}",
+            monthly_income=Decimal(rng.randint(5, 60) * 1000),
+            current_address=f"حي {rng.choice(ARABIC_DISTRICTS)}، {rng.choice(ARABIC_CITIES)}",
+        )
+
+    def generate_rentals(self):
+        """Rental units among the properties not up for auction, each with a lease history."""
+        rng = self.rng('rentals')
+        lease_count = self.counts['leases']
+        candidates = [
+            entry for entry in self.properties[len(self.auctions):]
+            if entry[2] in RENTABLE_PROPERTY_TYPES
+        ]
+        if not lease_count or not candidates:
+            return
+
+        units = candidates[:min(len(candidates), math.ceil(lease_count / LEASES_PER_UNIT))]
+        per_unit, remainder = divmod(lease_count, len(units))
+        units_per_batch = max(1, self.batch_size // (per_unit + 1))
+
+        for start, stop in self.batches(len(units), units_per_batch):
+            rental_properties, tenants, leases = [], [], []
+            for unit_index in range(start, stop):
+                property_id, owner_id, property_type, market_value, title, slug = units[unit_index]
+                monthly_rent = Decimal(round(market_value * rng.uniform(0.004, 0.007), -2))
+                chain = self.lease_chain(rng, per_unit + (1 if unit_index < remainder else 0))
+                occupied = chain[-1][2] == 'active'
+
+                rental_property = RentalProperty(
+                    base_property_id=property_id,
+                    rental_status='rented' if occupied else 'available',
+                    rental_type='monthly',
+                    monthly_rent=monthly_rent,
+                    security_deposit=monthly_rent,
+                    furnished=rng.random() < 0.3,
+                    parking_spaces=rng.randint(0, 3),
+                    available_from=chain[-1][1] + timedelta(days=1),
+                )
+                rental_properties.append(rental_property)
+
+                tenant = None
+                for lease_start, lease_end, lease_status, renews_previous in chain:
+                    if not renews_previous:
+                        tenant = self.new_tenant(rng)
+                        tenants.append(tenant)
+                    leases.append(Lease(
+                        tenant=tenant,
+                        rental_property=rental_property,
+                        status=lease_status,
+                        start_date=lease_start,
+                        end_date=lease_end,
+                        signed_date=lease_start - timedelta(days=rng.randint(3, 30)),
+                        monthly_rent=monthly_rent,
+                        security_deposit=monthly_rent,
+                        payment_frequency=rng.choices(('monthly', 'quarterly', 'annually'), (60, 30, 10))[0],
+                        terms_and_conditions=LEASE_TERMS_TEXT,
+                    ))
+                if occupied:
+                    tenant.status = 'active'
+
+            # One sequence reservation per lease year
+            by_year = {}
+            for lease in leases:
+                by_year.setdefault(lease.start_date.year, []).append(lease)
+            with transaction.atomic():
+                for year, yearly in by_year.items():
+                    for lease, number in zip(yearly, Lease.number_series(year).allocate(len(yearly))):
+                        lease.lease_number = number
+                RentalProperty.objects.bulk_create(rental_properties)
+                Tenant.objects.bulk_create(tenants)
+                Lease.objects.bulk_create(leases)
+
+            owners = {entry[0]: entry[1] for entry in units[start:stop]}
+            self.leases.extend(
+                (lease.tenant_id, lease.rental_property.base_property_id,
+                 owners[lease.rental_property.base_property_id], lease.monthly_rent,
+                 lease.start_date, lease.end_date)
+                for lease in leases
+            )
+            self.count('rental_properties', len(rental_properties))
+            self.count('tenants', len(tenants))
+            self.count('leases', len(leases))
+
+    # ---------------------------------------------------------------------
+    # Money
+    # ---------------------------------------------------------------------
+
+    def generate_expenses(self):
+        rng = self.rng('expenses')
+        if not self.properties or not self.user_ids:
+            return
+        expense_types = list(ARABIC_EXPENSE_TITLES)
+
+        for start, stop in self.batches(self.counts['expenses']):
+            expenses = []
+            for _ in range(start, stop):
+                property_id, owner_id, property_type, market_value, title, slug = rng.choice(self.properties)
+                expense_type = rng.choice(expense_types)
+                amount = Decimal(rng.randint(200, 20000))
+                tax_amount = (amount * Decimal('0.15')).quantize(Decimal('0.01'))
+                expense_date = self.anchor_date - timedelta(days=rng.randint(0, 730))
+                status = rng.choices(('paid', 'approved', 'pending'), (70, 15, 15))[0]
+                expenses.append(Expense(
+                    expense_property_id=property_id,
+                    created_by_id=owner_id or rng.choice(self.user_ids),
+                    title=ARABIC_EXPENSE_TITLES[expense_type],
+                    description=f"{ARABIC_EXPENSE_TITLES[expense_type]} - {title}",
+                    expense_type=expense_type,
+                    status=status,
+                    amount=amount,
+                    tax_amount=tax_amount,
+                    total_amount=amount + tax_amount,
+                    expense_date=expense_date,
+                    due_date=expense_date + timedelta(days=30),
+                    payment_date=expense_date + timedelta(days=rng.randint(0, 30)) if status == 'paid' else None,
+                    payment_method=rng.choice(('cash', 'bank_transfer', 'credit_card')) if status == 'paid' else None,
+                    vendor_name=f"مؤسسة {rng.choice(ARABIC_LAST_NAMES)} للخدمات",
+                ))
+            Expense.objects.bulk_create(expenses)
+            self.count('expenses', len(expenses))
+
+    def generate_payments(self):
+        """Rent payments, each due on a month of one of the generated leases."""
+        rng = self.rng('payments')
+        if not self.leases or not self.user_ids:
+            return
+
+        for start, stop in self.batches(self.counts['payments']):
+            payments = []
+            for _ in range(start, stop):
+                tenant_id, property_id, owner_id, monthly_rent, lease_start, lease_end = rng.choice(self.leases)
+                last_day = min(lease_end, self.anchor_date)
+                due_date = lease_start + timedelta(days=30 * rng.randint(0, max(0, (last_day - lease_start).days // 30)))
+                late = rng.random() < 0.1
+                status = ('overdue' if (self.anchor_date - due_date).days < 60 else 'paid') if late else 'paid'
+                payments.append(Payment(
+                    user_id=owner_id or rng.choice(self.user_ids),
+                    amount=monthly_rent,
+                    payment_type='rent',
+                    status=status,
+                    property_reference_id=property_id,
+                    tenant_reference_id=tenant_id,
+                    payment_date=due_date + timedelta(days=rng.randint(0, 10) + (20 if late else 0)),
+                    due_date=due_date,
+                    description=f"إيجار شهر {due_date:%m/%Y}",
+                ))
+
+            by_year = {}
+            for payment in payments:
+                by_year.setdefault(payment.payment_date.year, []).append(payment)
+            with transaction.atomic():
+                for year, yearly in by_year.items():
+                    for payment, number in zip(yearly, Payment.number_series(year).allocate(len(yearly))):
+                        payment.payment_id = number
+                Payment.objects.bulk_create(payments)
+            self.count('payments', len(payments))
+
+    # ---------------------------------------------------------------------
+    # Messages
+    # ---------------------------------------------------------------------
+
+    def generate_messages(self):
+        """Property inquiries from users to owners; some get a reply in the same thread."""
+        rng = self.rng('messages')
+        owned = [entry for entry in self.properties if entry[1]]
+        if not owned or len(self.user_ids) < 2:
+            return
+
+        for start, stop in self.batches(self.counts['messages']):
+            inquiries, replies = [], []
+            remaining = stop - start
+            while remaining > 0:
+                property_id, owner_id, property_type, market_value, title, slug = rng.choice(owned)
+                sender_id = rng.choice(self.user_ids)
+                if sender_id == owner_id:
+                    continue
+                sent_at = self.moment(self.anchor_date - timedelta(days=rng.randint(0, 365)), rng)
+                answered = remaining > 1 and rng.random() < 0.4
+                inquiry = Message(
+                    sender_id=sender_id,
+                    recipient_id=owner_id,
+                    subject=f"استفسار عن {title}",
+                    body=f"السلام عليكم، أرغب في معرفة المزيد عن {title}. هل العقار ما زال متاحاً؟",
+                    related_property_id=property_id,
+                    status='replied' if answered else rng.choice(('unread', 'read')),
+                    priority=rng.choices(('normal', 'high', 'low'), (80, 10, 10))[0],
+                    thread_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    replied_at=sent_at + timedelta(hours=rng.randint(1, 48)) if answered else None,
+                )
+                inquiries.append(inquiry)
+                remaining -= 1
+                if answered:
+                    replies.append(Message(
+                        sender_id=owner_id,
+                        recipient_id=sender_id,
+                        subject=f"رد: {inquiry.subject}",
+                        body='وعليكم السلام، نعم العقار متاح ويسعدنا ترتيب موعد للمعاينة.',
+                        related_property_id=property_id,
+                        status=rng.choice(('unread', 'read')),
+                        parent_message=inquiry,
+                        thread_id=inquiry.thread_id,
+                    ))
+                    remaining -= 1
+
+            with transaction.atomic():
+                Message.objects.bulk_create(inquiries)
+                Message.objects.bulk_create(replies)
+            self.count('messages', len(inquiries) + len(replies))
@@ -0,0 +1,459 @@
+"""
+Streaming exporters: Excel/PDF report files and CSV/JSONL dataset exports.
+
+Rows are written one at a time, so memory use does not depend on the number
+of rows:
+
+- XLSXStreamWriter streams the worksheet XML straight into the zip
+  container, using inline strings and no shared-strings table (stdlib only).
+- PDFTableWriter renders fixed-size pages of table rows with matplotlib's
+  PdfPages. Each page is flushed to the file as soon as it is full. Arabic
+  text is shaped (arabic_reshaper) and reordered (python-bidi) first.
+
+Report rows are rebuilt chunk by chunk from the report's properties
+(reports.iter_report_rows), never read back from report_data.
+
+Finished files are attached to Report.excel_file / Report.pdf_file and served
+with HTTP Range support by ranged_file_response().
+
+streaming_export_response() streams a queryset as CSV or JSONL straight from
+a server-side values_list() iterator, so a full export is a single request
+with constant memory use and no pagination COUNT(*).
+"""
+
+import csv
+import logging
+import os
+import re
+import tempfile
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_CONTENT_TYPE = 'application/pdf'
+
+# Bytes read per chunk when serving files
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Rows fetched per database round trip / rows per streamed chunk
+EXPORT_ITERATOR_CHUNK_SIZE = 2000
+EXPORT_BUFFER_ROWS = 500
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Report row columns exported per report type: (row key, column header)
+REPORT_EXPORT_COLUMNS = {
+    'financial': [
+        ('id', 'ID'), ('title', 'Property'), ('address', 'Address'),
+        ('monthly_rent', 'Monthly Rent'), ('annual_income', 'Annual Income'),
+        ('total_expenses', 'Total Expenses'),
+    ],
+    'maintenance': [
+        ('id', 'ID'), ('title', 'Property'), ('address', 'Address'),
+        ('total_requests', 'Total Requests'), ('completed_requests', 'Completed'),
+        ('pending_requests', 'Pending'), ('total_maintenance_cost', 'Maintenance Cost'),
+    ],
+}
+DEFAULT_EXPORT_COLUMNS = [('id', 'ID'), ('title', 'Property'), ('address', 'Address')]
+
+
+# -------------------------------------------------------------------------
+# Writers
+# -------------------------------------------------------------------------
+
+# Characters that are not allowed in XML 1.0 documents
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+# Arabic, Arabic Supplement and Arabic Extended-A blocks
+_ARABIC = re.compile('[\u0600-\u06ff\u0750-\u077f\u08a0-\u08ff]')
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="2"><xf/><xf fontId="1" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
+
+
+class XLSXStreamWriter:
+    """
+    Write a single-sheet XLSX workbook row by row.
+
+    Usage:
+        with XLSXStreamWriter(fileobj, 'Report') as writer:
+            writer.write_header(['ID', 'Title'])
+            writer.write_row([1, 'Villa'])
+    """
+
+    def __init__(self, fileobj, sheet_name='Report'):
+        self.archive = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+        self.archive.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        self.archive.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        self.archive.writestr('xl/workbook.xml', _XLSX_WORKBOOK.format(name=escape(sheet_name[:31])))
+        self.archive.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+        self.archive.writestr('xl/styles.xml', _XLSX_STYLES)
+
+        # The worksheet is the only part that grows with the data; stream it
+        self.sheet = self.archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+        self._write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<sheetData>'
+        )
+        self.row_count = 0
+
+    def _write(self, text):
+        self.sheet.write(text.encode('utf-8'))
+
+    @staticmethod
+    def _cell(value, style=0):
+        style_attr = f' s="{style}"' if style else ''
+        if value is None or value == '':
+            return f'<c{style_attr}/>'
+        if isinstance(value, bool):
+            return f'<c t="b"{style_attr}><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float, Decimal)):
+            return f'<c{style_attr}><v>{value}</v></c>'
+        text = escape(_XML_INVALID.sub('', str(value)))
+        return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def write_row(self, values, style=0):
+        self.row_count += 1
+        cells = ''.join(self._cell(value, style) for value in values)
+        self._write(f'<row r="{self.row_count}">{cells}</row>')
+
+    def write_header(self, values):
+        self.write_row(values, style=1)
+
+    def close(self):
+        self._write('</sheetData></worksheet>')
+        self.sheet.close()
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PDFTableWriter:
+    """
+    Write table rows into a multi-page PDF, one page per `rows_per_page` rows.
+
+    Pages are rendered with matplotlib (A4 landscape) and flushed to the file
+    as soon as they are full. Glyphs come from matplotlib's bundled DejaVu
+    font. matplotlib lays text out left to right without joining letters, so
+    Arabic text is passed to it in presentation forms and visual order.
+    """
+
+    def __init__(self, fileobj, title, columns, rows_per_page=40):
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        self.pdf = PdfPages(fileobj, metadata={'Title': title})
+        self.title = self._shape(title)
+        self.columns = [self._shape(column) for column in columns]
+        self.rows_per_page = rows_per_page
+        self.page_rows = []
+        self.page_count = 0
+
+    @staticmethod
+    def _shape(text):
+        if not _ARABIC.search(text):
+            return text
+        import arabic_reshaper
+        from bidi.algorithm import get_display
+
+        return get_display(arabic_reshaper.reshape(text))
+
+    @classmethod
+    def _format(cls, value):
+        if value is None:
+            return ''
+        if isinstance(value, float):
+            return f'{value:,.2f}'
+        return cls._shape(str(value).replace('\n', ' ')[:40])
+
+    def write_row(self, values):
+        self.page_rows.append([self._format(value) for value in values])
+        if len(self.page_rows) >= self.rows_per_page:
+            self._flush_page()
+
+    def _flush_page(self):
+        from matplotlib.figure import Figure
+        from matplotlib.lines import Line2D
+
+        self.page_count += 1
+        figure = Figure(figsize=(11.69, 8.27))
+        figure.text(0.5, 0.96, f'{self.title} - {self.page_count}', fontsize=10, ha='center', parse_math=False)
+        figure.add_artist(Line2D([0.03, 0.97], [0.9, 0.9], linewidth=0.5, color='black'))
+
+        # One multi-line text block per column: far cheaper to lay out than
+        # one artist per cell or matplotlib's table()
+        width = 0.94 / max(len(self.columns), 1)
+        column_values = list(zip(*self.page_rows)) if self.page_rows else [()] * len(self.columns)
+        for index, (header, values) in enumerate(zip(self.columns, column_values)):
+            x = 0.03 + index * width
+            figure.text(x, 0.92, header, fontsize=8, fontweight='bold', parse_math=False)
+            figure.text(x, 0.89, '\n'.join(values), fontsize=7, va='top', linespacing=1.6, parse_math=False)
+
+        self.pdf.savefig(figure)
+        self.page_rows = []
+
+    def close(self):
+        if self.page_rows or not self.page_count:
+            self._flush_page()
+        self.pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# -------------------------------------------------------------------------
+# Report Export
+# -------------------------------------------------------------------------
+
+def report_export_columns(report):
+    """Return the (row key, header) columns exported for a report."""
+    return REPORT_EXPORT_COLUMNS.get(report.report_type, DEFAULT_EXPORT_COLUMNS)
+
+
+def iter_report_rows(report):
+    """Yield report rows as lists of values, in export column order, one chunk of properties at a time."""
+    from .reports import iter_report_rows as iter_row_dicts
+
+    keys = [key for key, _ in report_export_columns(report)]
+    for row in iter_row_dicts(report):
+        yield [row.get(key) for key in keys]
+
+
+def export_report_xlsx(report, save=True):
+    """Stream the report rows into an XLSX file and attach it to report.excel_file."""
+    headers = [header for _, header in report_export_columns(report)]
+    with tempfile.TemporaryFile() as output:
+        with XLSXStreamWriter(output, sheet_name=report.get_report_type_display()) as writer:
+            writer.write_header(headers)
+            for values in iter_report_rows(report):
+                writer.write_row(values)
+        output.seek(0)
+        report.excel_file.save(f'report-{report.pk}.xlsx', File(output), save=save)
+    return report.excel_file
+
+
+def export_report_pdf(report, save=True):
+    """Stream the report rows into a PDF file and attach it to report.pdf_file."""
+    headers = [header for _, header in report_export_columns(report)]
+    with tempfile.TemporaryFile() as output:
+        with PDFTableWriter(output, report.title, headers) as writer:
+            for values in iter_report_rows(report):
+                writer.write_row(values)
+        output.seek(0)
+        report.pdf_file.save(f'report-{report.pk}.pdf', File(output), save=save)
+    return report.pdf_file
+
+
+REPORT_EXPORTERS = {
+    'xlsx': ('excel_file', export_report_xlsx, XLSX_CONTENT_TYPE),
+    'pdf': ('pdf_file', export_report_pdf, PDF_CONTENT_TYPE),
+}
+
+
+def export_report_files(report):
+    """
+    Write every export format for a completed report.
+
+    Failures are logged per format and do not affect the report itself.
+    """
+    for file_format, (field_name, exporter, _) in REPORT_EXPORTERS.items():
+        try:
+            exporter(report, save=False)
+        except Exception as e:
+            logger.error(f"Report {report.pk} {file_format} export failed: {e}")
+    report.save(update_fields=['excel_file', 'pdf_file', 'updated_at'])
+
+
+# -------------------------------------------------------------------------
+# Range Responses
+# -------------------------------------------------------------------------
+
+_RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _iter_file_range(fileobj, start, length):
+    fileobj.seek(start)
+    remaining = length
+    try:
+        while remaining > 0:
+            chunk = fileobj.read(min(FILE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def ranged_file_response(request, field_file, filename, content_type):
+    """
+    Serve a stored file, honouring a single-range `Range: bytes=...` header.
+
+    Returns 206 with Content-Range for satisfiable ranges, 416 for ranges
+    starting past the end of the file and a regular streamed 200 otherwise,
+    including for invalid headers (RFC 9110: a range whose last byte is
+    before its first is ignored).
+    """
+    size = field_file.size
+    match = _RANGE_HEADER.match(request.META.get('HTTP_RANGE', '').strip())
+    first, last = match.groups() if match else (None, None)
+
+    if (first or last) and not (first and last and int(last) < int(first)):
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+
+        if start >= size or start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_file_range(field_file.open('rb'), start, length),
+            status=206, content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{os.path.basename(filename)}"'
+    else:
+        response = FileResponse(
+            field_file.open('rb'), as_attachment=True,
+            filename=os.path.basename(filename), content_type=content_type,
+        )
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+# -------------------------------------------------------------------------
+# CSV / JSONL Streams
+# -------------------------------------------------------------------------
+
+class _Echo:
+    """File-like object whose write() returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def _buffered(lines):
+    """Join lines into chunks of EXPORT_BUFFER_ROWS to keep yields coarse."""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= EXPORT_BUFFER_ROWS:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_csv(header, rows):
+    """Yield CSV text for the header and rows (UTF-8 BOM so Excel reads Arabic)."""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(header)
+    yield from _buffered(writer.writerow(row) for row in rows)
+
+
+def iter_jsonl(header, rows):
+    """Yield one JSON object per line for the rows."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    yield from _buffered(encoder.encode(dict(zip(header, row))) + '\n' for row in rows)
+
+
+EXPORT_STREAMS = {
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+}
+
+
+def streaming_export_response(queryset, fields, file_format, filename,
+                              chunk_size=EXPORT_ITERATOR_CHUNK_SIZE):
+    """
+    Stream a queryset projection as a CSV or JSONL attachment.
+
+    Args:
+        queryset: Scoped and filtered queryset
+        fields: values_list() field names, also used as column names
+        file_format: 'csv' or 'jsonl'
+        filename: Download name without extension
+        chunk_size: Rows fetched per database round trip
+
+    Returns:
+        StreamingHttpResponse
+    """
+    rows = queryset.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size)
+    response = StreamingHttpResponse(
+        EXPORT_STREAMS[file_format](fields, rows),
+        content_type=EXPORT_CONTENT_TYPES[file_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
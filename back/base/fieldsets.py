@@ -0,0 +1,194 @@
+"""
+Sparse fieldsets (?fields=) and opt-in expansions (?expand=) for GET requests.
+
+    ?fields=id,title,status                  only these fields
+    ?fields=id,related_property.title        nested fields, with a dotted path
+    ?expand=bids,related_property.rooms      heavy fields, see below
+
+Serializers using SparseFieldsetMixin drop the fields a request leaves out
+before rendering, so their SerializerMethodFields and nested serializers are
+never evaluated. Without either parameter the representation is unchanged.
+
+expandable_fields are the heavy ones (nested serializers, media lists). Once
+a request uses either parameter they are left out unless listed in expand or
+in fields; fields restricts the other ones. A nested serializer receives the
+dotted part of both parameters, so ?fields=related_property leaves out the
+expandable fields of the property.
+
+field_relations maps fields to the select_related / prefetch_related paths
+they read. Lookups under the paths of left-out fields, and needed by no
+rendered field, are dropped from the view's queryset
+(SparseFieldsetViewMixin) and from the fragment prefetch (fragments.py).
+"""
+
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class Fieldset:
+    """The fields and expansions requested for one serializer of the tree"""
+
+    def __init__(self, fields=None, expand=()):
+        # None: every field that is not expandable
+        self.fields = set(fields) if fields is not None else None
+        self.expand = set(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        params = request.query_params if hasattr(request, 'query_params') else request.GET
+        if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+            return None
+        fields = _names(params[FIELDS_PARAM]) if FIELDS_PARAM in params else None
+        return cls(fields, _names(params.get(EXPAND_PARAM, '')))
+
+    @property
+    def signature(self):
+        fields = ','.join(sorted(self.fields)) if self.fields is not None else '*'
+        return f"{fields}|{','.join(sorted(self.expand))}"
+
+    def includes(self, name, expandable=False):
+        named = {path.split('.')[0] for path in self.expand}
+        if self.fields is not None:
+            named.update(path.split('.')[0] for path in self.fields)
+            return name in named
+        return not expandable or name in named
+
+    def nested(self, name):
+        prefix = f'{name}.'
+        fields = None
+        if self.fields is not None:
+            fields = {path[len(prefix):] for path in self.fields if path.startswith(prefix)} or None
+        return Fieldset(fields, {path[len(prefix):] for path in self.expand if path.startswith(prefix)})
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin rendering only the requested fields (see the module docstring).
+
+    expandable_fields: fields left out of sparse requests unless expanded.
+    field_relations: field name -> relation paths (select_related or
+    prefetch_related) the field reads.
+    """
+
+    expandable_fields = ()
+    field_relations = {}
+
+    @property
+    def fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            # Nested serializers get theirs from their parent's get_fields()
+            parent = getattr(self.parent, 'parent', None) if hasattr(self.parent, 'child') else self.parent
+            self._fieldset = Fieldset.from_request(self.context.get('request')) if parent is None else None
+        return self._fieldset
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.omitted_fields = {}
+        fieldset = self.fieldset
+        if fieldset is None:
+            return fields
+        for name in list(fields):
+            if not fieldset.includes(name, name in self.expandable_fields):
+                self.omitted_fields[name] = fields.pop(name)
+                continue
+            child = getattr(fields[name], 'child', fields[name])
+            if isinstance(child, SparseFieldsetMixin):
+                child._fieldset = fieldset.nested(name)
+        return fields
+
+
+def fieldset_signature(serializer):
+    """Identifies the requested fieldset, '' for the full representation"""
+    fieldset = getattr(serializer, 'fieldset', None)
+    return fieldset.signature if fieldset is not None else ''
+
+
+def relation_paths(serializer, prefix=''):
+    """(needed, omitted) relation paths of a serializer tree, for the request's fieldset"""
+    needed, omitted = set(), set()
+    if not isinstance(serializer, SparseFieldsetMixin) or serializer.fieldset is None:
+        return needed, omitted
+    for name, field in serializer.fields.items():
+        needed.update(prefix + path for path in serializer.field_relations.get(name, ()))
+        child = getattr(field, 'child', field)
+        if isinstance(child, SparseFieldsetMixin) and field.source != '*':
+            child_needed, child_omitted = relation_paths(child, f"{prefix}{field.source.replace('.', '__')}__")
+            needed |= child_needed
+            omitted |= child_omitted
+    for name in serializer.omitted_fields:
+        omitted.update(prefix + path for path in serializer.field_relations.get(name, ()))
+    return needed, omitted
+
+
+def _lookup_path(lookup):
+    return getattr(lookup, 'prefetch_through', lookup)
+
+
+def _select_related_paths(select_related, prefix=''):
+    for name, nested in select_related.items():
+        yield prefix + name
+        yield from _select_related_paths(nested, f'{prefix}{name}__')
+
+
+def _lookup_filter(serializer, required=()):
+    needed, omitted = relation_paths(serializer)
+    needed.update(required)
+
+    def keep(path):
+        if not any(path == other or path.startswith(f'{other}__') for other in omitted):
+            return True
+        return any(other == path or other.startswith(f'{path}__') for other in needed)
+
+    return keep if omitted else None
+
+
+def needed_lookups(serializer, lookups):
+    """The prefetch lookups the rendered fields of this serializer read"""
+    keep = _lookup_filter(serializer)
+    return list(lookups) if keep is None else [lookup for lookup in lookups if keep(_lookup_path(lookup))]
+
+
+def trim_queryset(queryset, serializer, required=()):
+    """
+    Drop the select_related and prefetch_related lookups only left-out fields
+    read; required: paths read outside the fields, always kept.
+    """
+    keep = _lookup_filter(serializer, required)
+    if keep is None:
+        return queryset
+    if isinstance(queryset.query.select_related, dict):
+        paths = list(_select_related_paths(queryset.query.select_related))
+        kept = [path for path in paths if keep(path)]
+        if len(kept) != len(paths):
+            queryset = queryset.select_related(None).select_related(*kept)
+    lookups = queryset._prefetch_related_lookups
+    kept = [lookup for lookup in lookups if keep(_lookup_path(lookup))]
+    if len(kept) != len(lookups):
+        queryset = queryset.prefetch_related(None).prefetch_related(*kept)
+    return queryset
+
+
+class SparseFieldsetViewMixin:
+    """Generic view mixin fitting the queryset to the fields the request asks for"""
+
+    def required_relations(self, serializer):
+        """Relations read whatever the fields: validators (conditional.py) and fragment keys (fragments.py)"""
+        return [
+            *(getattr(self, 'conditional_dependencies', None) or ()),
+            *getattr(serializer, 'fragment_dependencies', ()),
+        ]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if Fieldset.from_request(self.request) is None:
+            return queryset
+        serializer = self.get_serializer()
+        return trim_queryset(queryset, serializer, self.required_relations(serializer))
@@ -1,6 +1,10 @@
 # back/base/filters.py
+from django.utils import timezone
 from django_filters import rest_framework as filters
-from .models import Auction, Property, RentalProperty, MaintenanceRequest, Expense, Worker
+from .models import (
+    Auction, Bid, Expense, Lease, MaintenanceRequest, Payment, Property, RentalProperty, Worker
+)
+from .occupancy import available_rental_properties
 
 
 
@@ -42,6 +46,8 @@ class RentalPropertyFilterSet(filters.FilterSet):
     min_rent = filters.NumberFilter(field_name="monthly_rent", lookup_expr='gte')
     max_rent = filters.NumberFilter(field_name="monthly_rent", lookup_expr='lte')
     city = filters.CharFilter(field_name="base_property__location__city", lookup_expr='icontains')
+    # ?free_after=YYYY-MM-DD&free_before=YYYY-MM-DD: units with no active lease in the range
+    free = filters.DateFromToRangeFilter(method='filter_free')
     
     class Meta:
         model = RentalProperty
@@ -52,6 +58,11 @@ class RentalPropertyFilterSet(filters.FilterSet):
             'pets_allowed': ['exact'],
         }
 
+    def filter_free(self, queryset, name, value):
+        period_start = value.start.date() if value.start else timezone.now().date()
+        period_end = value.stop.date() if value.stop else period_start
+        return available_rental_properties(queryset, period_start, period_end)
+
 class MaintenanceRequestFilterSet(filters.FilterSet):
     reported_after = filters.DateFilter(field_name="reported_date", lookup_expr='gte')
     reported_before = filters.DateFilter(field_name="reported_date", lookup_expr='lte')
@@ -91,4 +102,46 @@ class WorkerFilterSet(filters.FilterSet):
             'is_available': ['exact'],
             'categories': ['exact'],
             'management_company': ['exact'],
-        }
\ No newline at end of file
+        }
+
+class BidFilterSet(filters.FilterSet):
+    bid_after = filters.DateTimeFilter(field_name="bid_time", lookup_expr='gte')
+    bid_before = filters.DateTimeFilter(field_name="bid_time", lookup_expr='lte')
+    min_amount = filters.NumberFilter(field_name="bid_amount", lookup_expr='gte')
+    max_amount = filters.NumberFilter(field_name="bid_amount", lookup_expr='lte')
+
+    class Meta:
+        model = Bid
+        fields = {
+            'auction': ['exact'],
+            'bidder': ['exact'],
+            'status': ['exact'],
+        }
+
+class PaymentFilterSet(filters.FilterSet):
+    paid_after = filters.DateFilter(field_name="payment_date", lookup_expr='gte')
+    paid_before = filters.DateFilter(field_name="payment_date", lookup_expr='lte')
+    min_amount = filters.NumberFilter(field_name="amount", lookup_expr='gte')
+    max_amount = filters.NumberFilter(field_name="amount", lookup_expr='lte')
+
+    class Meta:
+        model = Payment
+        fields = {
+            'payment_type': ['exact'],
+            'status': ['exact'],
+            'property_reference': ['exact'],
+            'tenant_reference': ['exact'],
+        }
+
+class LeaseFilterSet(filters.FilterSet):
+    start_after = filters.DateFilter(field_name="start_date", lookup_expr='gte')
+    end_before = filters.DateFilter(field_name="end_date", lookup_expr='lte')
+
+    class Meta:
+        model = Lease
+        fields = {
+            'status': ['exact'],
+            'tenant': ['exact'],
+            'rental_property': ['exact'],
+            'payment_frequency': ['exact'],
+        }
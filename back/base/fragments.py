@@ -0,0 +1,188 @@
+"""
+Fragment cache for the Property and Auction representations.
+
+The expensive part of these serializers is what they read through relations:
+media (file sizes, image dimensions), rooms with their media, bids and the
+nested property. Those fields (FragmentCacheMixin.fragment_fields) are cached
+per object; the object's own columns are always rendered from the row, so
+counters updated with queryset.update() (view_count, bid_count, current_bid)
+are never stale.
+
+Fragments are keyed by the object id and the updated_at of the object and of
+the related rows listed in fragment_dependencies, plus the request origin
+(media URLs are absolute) and the requested fieldset (fieldsets.py). A new
+version simply makes a new key; old ones expire after FRAGMENT_CACHE_TIMEOUT.
+Writes to media, rooms and bids touch the updated_at of the property or
+auction they belong to (see touch_fragment_owner), which moves its fragments
+to a new key. Counters of the property nested in an auction fragment are
+only refreshed with it, at the latest after FRAGMENT_CACHE_TIMEOUT.
+
+List serializers look up a whole page with one get_many, prefetch relations
+for the misses only and store them with one set_many. Serializers nested in
+another one render normally: they are part of their parent's fragment.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+from .fieldsets import fieldset_signature, needed_lookups
+
+FRAGMENT_CACHE_TIMEOUT = 600
+FRAGMENT_KEY_PREFIX = 'fragment:'
+
+
+def fragment_cache_enabled():
+    return getattr(settings, 'FRAGMENT_CACHE_ENABLED', True)
+
+
+def _version(instance):
+    updated_at = getattr(instance, 'updated_at', None) if instance is not None else None
+    return f'{updated_at.timestamp():.6f}' if updated_at else '-'
+
+
+def related_object(instance, path):
+    """Follow a select_related path, None when a relation is empty"""
+    for name in path.split('__'):
+        instance = getattr(instance, name, None)
+        if instance is None:
+            break
+    return instance
+
+
+class FragmentListSerializer(serializers.ListSerializer):
+    """Loads the fragments of the whole page before rendering its items"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.load_fragments(items)
+        return super().to_representation(items)
+
+
+class FragmentCacheMixin:
+    """
+    ModelSerializer mixin caching the fields listed in fragment_fields.
+
+    fragment_dependencies: select_related paths whose updated_at is part of
+    the key. fragment_prefetch: the prefetch_related lookups the fragment
+    fields read, applied to cache misses only. Set Meta.list_serializer_class
+    to FragmentListSerializer so lists load fragments a page at a time.
+    """
+
+    fragment_fields = ()
+    fragment_dependencies = ()
+    fragment_prefetch = ()
+
+    def is_fragment_root(self):
+        """Only the serializer of the response caches; nested ones are part of its fragment."""
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def fragment_key(self, instance):
+        versions = [_version(instance)] + [
+            _version(related_object(instance, path)) for path in self.fragment_dependencies
+        ]
+        request = self.context.get('request')
+        origin = f'{request.scheme}://{request.get_host()}' if request else ''
+        # Sparse requests (fieldsets.py) render other fields: a fragment per fieldset
+        digest = hashlib.md5(f'{origin}|{fieldset_signature(self)}'.encode()).hexdigest()[:8]
+        return f"{FRAGMENT_KEY_PREFIX}{instance._meta.label_lower}:{instance.pk}:{':'.join(versions)}:{digest}"
+
+    def represent_fields(self, instance, fields):
+        """Serializer.to_representation restricted to the given fields"""
+        ret = {}
+        for field in fields:
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            ret[field.field_name] = None if check_for_none is None else field.to_representation(attribute)
+        return ret
+
+    def load_fragments(self, instances):
+        """Fetch the fragments of these instances, rendering and storing the missing ones."""
+        self._fragments = getattr(self, '_fragments', {})
+        if not instances:
+            return
+        prefetch = needed_lookups(self, self.fragment_prefetch)
+        if not (fragment_cache_enabled() and self.is_fragment_root()):
+            if prefetch:
+                prefetch_related_objects(instances, *prefetch)
+            return
+
+        keys = {self.fragment_key(instance): instance for instance in instances}
+        cached = cache.get_many(list(keys))
+        missing = {key: instance for key, instance in keys.items() if key not in cached}
+        if missing:
+            if prefetch:
+                prefetch_related_objects(list(missing.values()), *prefetch)
+            fields = [field for field in self._readable_fields if field.field_name in self.fragment_fields]
+            rendered = {key: self.represent_fields(instance, fields) for key, instance in missing.items()}
+            cache.set_many(rendered, FRAGMENT_CACHE_TIMEOUT)
+            cached.update(rendered)
+        for key, instance in keys.items():
+            self._fragments[instance.pk] = cached[key]
+
+    def to_representation(self, instance):
+        fragments = getattr(self, '_fragments', {})
+        if instance.pk not in fragments and instance.pk is not None:
+            # Detail views and writes: a page of one
+            self.load_fragments([instance])
+            fragments = self._fragments
+        fragment = fragments.get(instance.pk)
+        if fragment is None:
+            return super().to_representation(instance)
+
+        fields = list(self._readable_fields)
+        live = self.represent_fields(instance, [field for field in fields if field.field_name not in self.fragment_fields])
+        return {
+            field.field_name: fragment[field.field_name] if field.field_name in fragment else live[field.field_name]
+            for field in fields
+            if field.field_name in fragment or field.field_name in live
+        }
+
+
+def touch_fragment_owner(model, **filters):
+    """
+    Give the matching rows a new updated_at, so their fragments get a new key
+    and their validators change (conditional.py), and drop the cached
+    responses showing them (response_cache.py).
+    """
+    from .response_cache import invalidate_objects
+
+    pks = list(model.objects.filter(**filters).values_list('pk', flat=True))
+    if pks:
+        model.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+        invalidate_objects(model, pks)
+
+
+def media_changed(sender, instance, **kwargs):
+    from django.contrib.contenttypes.models import ContentType
+    from .models import BaseModel, Property, Room
+
+    model = ContentType.objects.get_for_id(instance.content_type_id).model_class() if instance.content_type_id else None
+    if model is not None and issubclass(model, BaseModel):
+        touch_fragment_owner(model, pk=instance.object_id)
+    if model is Room:
+        touch_fragment_owner(Property, rooms__pk=instance.object_id)
+
+
+def room_changed(sender, instance, **kwargs):
+    from .models import Property
+    touch_fragment_owner(Property, pk=instance.property_id)
+
+
+def bid_changed(sender, instance, **kwargs):
+    from .models import Auction
+    touch_fragment_owner(Auction, pk=instance.auction_id)
+
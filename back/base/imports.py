@@ -0,0 +1,359 @@
+"""
+Bulk property import from CSV or JSONL.
+
+Rows are processed in batches. Each batch is validated in memory, then
+resolved and written with a fixed number of queries, whatever its size:
+
+- deed numbers are checked against the database in one query
+- locations are resolved with one natural-key lookup, and missing ones are
+  added with bulk_create
+- property numbers come from one sequence reservation per property type
+- unique slugs for the whole batch are computed from one query
+- properties, rooms and media rows are written with bulk_create
+
+Image optimization is not run inline. Imported media are queued for the
+process_media task once the batch commits.
+
+Invalid rows are reported with their row number and field errors; they never
+abort the rest of the import.
+
+Row format: property fields and location fields (city, state, country,
+postal_code, latitude, longitude) as columns or keys. rooms, media, features
+and amenities are lists; in CSV they are JSON-encoded cells. media entries are
+storage paths, or objects with file / media_type / is_primary / name.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .models import Location, Media, Property, Room
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 500
+
+PROPERTY_IMPORT_FIELDS = (
+    'title', 'property_type', 'building_type', 'status', 'deed_number', 'description',
+    'meta_description', 'search_keywords', 'size_sqm', 'floors', 'year_built', 'address',
+    'market_value', 'minimum_bid', 'features', 'amenities', 'is_published', 'is_featured',
+    'availability_date',
+)
+LOCATION_IMPORT_FIELDS = ('city', 'state', 'country', 'postal_code', 'latitude', 'longitude')
+ROOM_IMPORT_FIELDS = (
+    'name', 'room_type', 'floor', 'area_sqm', 'description', 'features', 'has_window', 'has_bathroom',
+)
+
+# Columns holding lists, JSON-encoded when they come from CSV
+JSON_COLUMNS = ('features', 'amenities', 'rooms', 'media')
+
+# Fields filled in by the importer rather than taken from the row
+GENERATED_PROPERTY_FIELDS = ['location', 'owner', 'slug', 'property_number']
+
+SLUG_MAX_LENGTH = 240
+SLUG_LOOKUP_CHUNK_SIZE = 100
+
+# Boolean columns, and the CSV spellings accepted for them
+BOOLEAN_COLUMNS = ('is_published', 'is_featured')
+BOOLEAN_STRINGS = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+
+def read_rows(fileobj, file_format):
+    """
+    Yield (row_number, data, error) for each row of a CSV or JSONL file.
+
+    Args:
+        fileobj: Binary or text file object
+        file_format: 'csv' or 'jsonl'
+    """
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig')
+
+    if file_format == 'csv':
+        for row_number, row in enumerate(csv.DictReader(fileobj), start=1):
+            data, error = {}, None
+            for key, value in row.items():
+                if key is None or value in (None, ''):
+                    continue
+                if key in JSON_COLUMNS:
+                    try:
+                        value = json.loads(value)
+                    except ValueError:
+                        error = f"Column '{key}' is not valid JSON"
+                elif key in BOOLEAN_COLUMNS:
+                    value = BOOLEAN_STRINGS.get(value.strip().lower(), value)
+                data[key.strip()] = value
+            yield row_number, data, error
+    elif file_format == 'jsonl':
+        row_number = 0
+        for line in fileobj:
+            line = line.strip().lstrip('\ufeff')
+            if not line:
+                continue
+            row_number += 1
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield row_number, {}, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(data, dict):
+                yield row_number, {}, "Each line must be a JSON object"
+                continue
+            yield row_number, {key: value for key, value in data.items() if value not in (None, '')}, None
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def _pick(data, fields):
+    return {field: data[field] for field in fields if field in data}
+
+
+class ImportRow:
+    """A validated row: unsaved Property, Location, Room and Media instances."""
+
+    __slots__ = ('number', 'property', 'location', 'rooms', 'media')
+
+    def __init__(self, number, property_obj, location, rooms, media):
+        self.number = number
+        self.property = property_obj
+        self.location = location
+        self.rooms = rooms
+        self.media = media
+
+
+class PropertyImporter:
+    """
+    Import properties in batches.
+
+    Usage:
+        importer = PropertyImporter(owner=user)
+        result = importer.run(read_rows(fileobj, 'csv'))
+        # {'total': 20000, 'created': 19980, 'errors': [{'row': 17, 'errors': {...}}, ...]}
+    """
+
+    def __init__(self, owner=None, batch_size=IMPORT_BATCH_SIZE, dry_run=False, process_media=True):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.process_media = process_media
+        self.seen_deed_numbers = set()
+        self.result = {'total': 0, 'created': 0, 'errors': []}
+
+    def add_error(self, row_number, errors):
+        self.result['errors'].append({'row': row_number, 'errors': errors})
+
+    def run(self, rows):
+        """Import all rows; returns the result summary."""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.result
+
+    # ---------------------------------------------------------------------
+    # Validation
+    # ---------------------------------------------------------------------
+
+    def validate_row(self, row_number, data):
+        """Build and clean the unsaved instances of one row (no queries)."""
+        location = Location(**_pick(data, LOCATION_IMPORT_FIELDS))
+        location.full_clean(validate_unique=False, validate_constraints=False)
+
+        property_obj = Property(owner=self.owner, **_pick(data, PROPERTY_IMPORT_FIELDS))
+        property_obj.full_clean(
+            exclude=GENERATED_PROPERTY_FIELDS, validate_unique=False, validate_constraints=False
+        )
+
+        rooms = []
+        for index, room_data in enumerate(data.get('rooms') or []):
+            room = Room(**_pick(room_data, ROOM_IMPORT_FIELDS))
+            try:
+                room.full_clean(exclude=['property'], validate_unique=False, validate_constraints=False)
+            except ValidationError as e:
+                raise ValidationError({f'rooms[{index}]': e.messages})
+            rooms.append(room)
+
+        media = []
+        for index, item in enumerate(data.get('media') or []):
+            item = {'file': item} if isinstance(item, str) else item
+            if not item.get('file'):
+                raise ValidationError({f'media[{index}]': ['A file path is required.']})
+            media.append(Media(
+                file=item['file'],
+                name=item.get('name') or os.path.basename(item['file']),
+                media_type=item.get('media_type', 'image'),
+                is_primary=bool(item.get('is_primary', index == 0)),
+                order=index,
+            ))
+
+        return ImportRow(row_number, property_obj, location, rooms, media)
+
+    def validate_batch(self, batch):
+        valid = []
+        for row_number, data, error in batch:
+            if error:
+                self.add_error(row_number, {'row': [error]})
+                continue
+            try:
+                valid.append(self.validate_row(row_number, data))
+            except ValidationError as e:
+                self.add_error(row_number, e.message_dict if hasattr(e, 'error_dict') else {'row': e.messages})
+            except (TypeError, AttributeError) as e:
+                self.add_error(row_number, {'row': [str(e)]})
+
+        # Deed numbers are unique: one query for the batch, plus duplicates within the import
+        deed_numbers = [row.property.deed_number for row in valid]
+        existing = set(Property.objects.filter(deed_number__in=deed_numbers).values_list('deed_number', flat=True))
+        unique_rows = []
+        for row in valid:
+            deed_number = row.property.deed_number
+            if deed_number in existing or deed_number in self.seen_deed_numbers:
+                self.add_error(row.number, {'deed_number': ['Property with this deed number already exists.']})
+                continue
+            self.seen_deed_numbers.add(deed_number)
+            unique_rows.append(row)
+        return unique_rows
+
+    # ---------------------------------------------------------------------
+    # Resolution
+    # ---------------------------------------------------------------------
+
+    def resolve_locations(self, rows):
+        """Attach saved Locations to the rows: one lookup, one bulk_create for missing ones."""
+        by_key = {}
+        for row in rows:
+            by_key.setdefault(row.location.natural_key(), row.location)
+
+        locations = Location.objects.get_many_by_natural_key(by_key)
+        missing = [location for key, location in by_key.items() if key not in locations]
+        if missing:
+            Location.objects.bulk_create(missing, ignore_conflicts=True)
+            locations.update(Location.objects.get_many_by_natural_key(
+                location.natural_key() for location in missing
+            ))
+
+        for row in rows:
+            row.property.location = locations[row.location.natural_key()]
+
+    def assign_numbers(self, rows):
+        """Reserve property numbers with one sequence reservation per property type."""
+        by_type = {}
+        for row in rows:
+            by_type.setdefault(row.property.property_type, []).append(row.property)
+        for property_type, properties in by_type.items():
+            numbers = Property.number_series(property_type).allocate(len(properties))
+            for property_obj, number in zip(properties, numbers):
+                property_obj.property_number = number
+
+    def assign_slugs(self, rows):
+        """
+        Give every property a unique slug.
+
+        Exact collisions with existing slugs are found with one query; the
+        numbered variants of colliding bases are fetched with one more query
+        per SLUG_LOOKUP_CHUNK_SIZE bases.
+        """
+        bases = {}
+        for row in rows:
+            base = slugify(row.property.title, allow_unicode=True)[:SLUG_MAX_LENGTH]
+            bases[row.number] = base or f"property-{row.property.property_number}"
+
+        taken = set(Property.objects.filter(slug__in=set(bases.values())).values_list('slug', flat=True))
+        colliding = sorted(taken)
+        for offset in range(0, len(colliding), SLUG_LOOKUP_CHUNK_SIZE):
+            numbered = Q()
+            for base in colliding[offset:offset + SLUG_LOOKUP_CHUNK_SIZE]:
+                numbered |= Q(slug__startswith=f"{base}-")
+            taken.update(Property.objects.filter(numbered).values_list('slug', flat=True))
+
+        for row in rows:
+            base = slug = bases[row.number]
+            counter = 1
+            while slug in taken:
+                slug = f"{base}-{counter}"
+                counter += 1
+            taken.add(slug)
+            row.property.slug = slug
+
+    # ---------------------------------------------------------------------
+    # Writing
+    # ---------------------------------------------------------------------
+
+    def create_rows(self, rows):
+        """bulk_create properties, then their rooms and media."""
+        properties = Property.objects.bulk_create([row.property for row in rows])
+
+        rooms, media = [], []
+        property_type = ContentType.objects.get_for_model(Property)
+        for row, property_obj in zip(rows, properties):
+            for room in row.rooms:
+                room.property = property_obj
+                rooms.append(room)
+            for item in row.media:
+                item.content_type = property_type
+                item.object_id = property_obj.pk
+                media.append(item)
+
+        Room.objects.bulk_create(rooms)
+        return Media.objects.bulk_create(media)
+
+    def queue_media_processing(self, media):
+        media_ids = [item.pk for item in media if item.media_type == 'image']
+        if not media_ids or not self.process_media:
+            return
+
+        def enqueue():
+            from .tasks import process_media
+            try:
+                process_media.delay(media_ids)
+            except Exception as e:
+                logger.warning(f"Could not queue processing for {len(media_ids)} imported media: {e}")
+
+        transaction.on_commit(enqueue)
+
+    def import_batch(self, batch):
+        self.result['total'] += len(batch)
+        rows = self.validate_batch(batch)
+        if not rows or self.dry_run:
+            return
+
+        try:
+            with transaction.atomic():
+                self.resolve_locations(rows)
+                self.assign_numbers(rows)
+                self.assign_slugs(rows)
+                media = self.create_rows(rows)
+                self.queue_media_processing(media)
+            self.result['created'] += len(rows)
+        except IntegrityError:
+            # A concurrent write won a unique value; retry row by row so only that row fails
+            logger.warning("Property import batch hit an integrity error, retrying row by row")
+            for row in rows:
+                self.import_row(row)
+
+    def import_row(self, row):
+        try:
+            with transaction.atomic():
+                # Primary keys may have been set by the rolled back batch insert
+                for instance in [row.property, *row.rooms, *row.media]:
+                    instance.pk = None
+                self.resolve_locations([row])
+                self.assign_numbers([row])
+                self.assign_slugs([row])
+                media = self.create_rows([row])
+                self.queue_media_processing(media)
+            self.result['created'] += 1
+        except IntegrityError as e:
+            self.add_error(row.number, {'row': [str(e)]})
@@ -0,0 +1,610 @@
+"""
+Index advisor.
+
+Statements come from a captured query log (the slow query log, or the SQL of
+stored request profiles) or from replaying the endpoint benchmarks on a
+generated dataset. For every statement the top-level WHERE clause is split
+into access paths (one per OR branch) and each path is reduced per table to:
+
+- equality columns (=, IN, IS NULL, bare booleans)
+- range columns (<, <=, >, >=, BETWEEN)
+- sort columns (ORDER BY on the main table)
+
+Paths with the same shape are aggregated, with their statement counts and
+time. Each shape becomes a candidate index ordered equality, sort, range.
+Candidates are compared with the indexes that exist in the database
+(introspection, so foreign key and unique indexes count too), and ranked by
+the time of the statements they serve times the share of examined rows they
+would save.
+
+Selectivity comes from table statistics: pg_class/pg_stats on PostgreSQL,
+counts over a sample of rows elsewhere. Equality on a known value uses that
+value's frequency, otherwise 1 / distinct values; a range predicate is
+assumed to keep a third of the rows. Low-cardinality columns compared to a
+constant are suggested as a partial index condition instead of a key column,
+unless statements compare the column to several constants: those share one
+index with the column as a key.
+"""
+
+import ast
+import hashlib
+import math
+import re
+import time
+from collections import namedtuple
+
+from django.apps import apps
+from django.db import connection
+
+# Rows read from a table to estimate distinct values and value frequencies
+SAMPLE_ROWS = 100000
+# PostgreSQL's default selectivity for an inequality (DEFAULT_INEQ_SEL)
+RANGE_SELECTIVITY = 1 / 3
+# A constant compared on a column with at most this many distinct values,
+# matching at most this share of rows, becomes a partial index condition
+PARTIAL_MAX_DISTINCT = 10
+PARTIAL_MAX_FRACTION = 0.5
+# Suggestions must cut the examined rows by at least this share
+MIN_IMPROVEMENT = 0.5
+# ... and at least this many rows per statement
+MIN_ROWS_SAVED = 50
+MIN_TABLE_ROWS = 100
+
+Statement = namedtuple('Statement', 'sql params count time_ms')
+Predicate = namedtuple('Predicate', 'table column kind value')
+
+_NO_VALUE = object()
+
+_KEYWORDS = re.compile(r'\b(WHERE|ORDER BY|GROUP BY|HAVING|LIMIT|OFFSET|RETURNING)\b', re.IGNORECASE)
+_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+"(\w+)"(?:\s+(?:AS\s+)?([A-Z]\d+))?', re.IGNORECASE)
+_COLUMN = r'(?:(?:"(?P<table>\w+)"|(?P<alias>[A-Z]\d+))\.)?"(?P<column>\w+)"'
+_PREDICATE = re.compile(
+    r'^(?P<negated>NOT\s+)?' + _COLUMN +
+    r'\s*(?P<op>=|>=|<=|<>|!=|<|>|NOT IN\b|IN\b|IS NOT NULL|IS NULL|BETWEEN\b|NOT LIKE\b|LIKE\b|ILIKE\b)?\s*(?P<rest>.*)$',
+    re.IGNORECASE | re.DOTALL,
+)
+_BETWEEN = re.compile(r'\bBETWEEN\b', re.IGNORECASE)
+_ORDER_COLUMN = re.compile(_COLUMN + r'(?:\s+(?P<direction>ASC|DESC))?', re.IGNORECASE)
+
+EQUALITY_OPS = {'=', 'IN', 'IS NULL'}
+RANGE_OPS = {'<', '<=', '>', '>=', 'BETWEEN'}
+
+
+# -------------------------------------------------------------------------
+# Statement sources
+# -------------------------------------------------------------------------
+
+def parse_params(text):
+    """Params from a "-- params: (...)" suffix, or None when they cannot be read back."""
+    try:
+        params = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return None
+    return tuple(params) if isinstance(params, (list, tuple)) else None
+
+
+def slow_log_statements():
+    """Statements of the slow query log, weighted by their count and total time."""
+    from accounts.models import SlowQuery
+
+    statements = []
+    for row in SlowQuery.objects.all():
+        sql, _, params = row.sample_sql.partition(' -- params: ')
+        statements.append(Statement(sql, parse_params(params), row.count, row.total_time_ms))
+    return statements
+
+
+def profile_statements():
+    """SQL recorded in stored request profiles (without parameters)."""
+    from accounts.models import RequestProfile
+
+    statements = []
+    for sql_queries in RequestProfile.objects.values_list('sql_queries', flat=True):
+        statements.extend(Statement(query['sql'], None, 1, query['time_ms']) for query in sql_queries)
+    return statements
+
+
+class StatementRecorder:
+    """Execute wrapper keeping every statement with its parameters and time."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not many:
+                elapsed = (time.perf_counter() - started) * 1000
+                self.statements.append(Statement(sql, tuple(params) if params else (), 1, elapsed))
+
+
+# -------------------------------------------------------------------------
+# SQL analysis
+# -------------------------------------------------------------------------
+
+def _depths(sql):
+    """Parenthesis depth of every character, ignoring quoted text."""
+    depths, depth, quote = [], 0, None
+    for char in sql:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            depths.append(depth)
+            continue
+        depths.append(depth)
+    return depths
+
+
+def _split(text, offset, depths, separator):
+    """Split text at top-level occurrences of AND/OR; yields (part, offset)."""
+    base = min(depths[offset:offset + len(text)], default=0)
+    pattern = re.compile(rf'\s{separator}\s', re.IGNORECASE)
+    start = 0
+    skipped_between = False
+    for match in pattern.finditer(text):
+        if depths[offset + match.start()] != base:
+            continue
+        if separator == 'AND' and not skipped_between and _BETWEEN.search(text[start:match.start()]):
+            # The AND of "BETWEEN x AND y"
+            skipped_between = True
+            continue
+        yield text[start:match.start()], offset + start
+        start = match.end()
+        skipped_between = False
+    yield text[start:], offset + start
+
+
+def _strip_parens(text, offset, depths):
+    """Remove parentheses wrapping the whole text."""
+    while True:
+        stripped = text.strip()
+        offset += len(text) - len(text.lstrip())
+        text = stripped
+        if not (text.startswith('(') and text.endswith(')')):
+            return text, offset
+        # The opening parenthesis must close at the very end
+        opening = depths[offset]
+        if any(depths[offset + index] < opening for index in range(1, len(text) - 1)):
+            return text, offset
+        text, offset = text[1:-1], offset + 1
+
+
+def _value(sql, rest, position, params):
+    """Constant compared by a predicate: a parameter, an inlined literal, or _NO_VALUE."""
+    rest = rest.strip()
+    if rest == '%s':
+        index = sql[:position].count('%s')
+        if params is not None and index < len(params):
+            return params[index]
+        return _NO_VALUE
+    try:
+        return ast.literal_eval(rest)
+    except (ValueError, SyntaxError):
+        return _NO_VALUE
+
+
+def _predicate(sql, text, offset, params, aliases, main_table):
+    match = _PREDICATE.match(text)
+    if not match:
+        return None
+    table = match.group('table') or aliases.get(match.group('alias')) or main_table
+    column = match.group('column')
+    op = (match.group('op') or '').upper()
+    rest = match.group('rest')
+
+    if not op:
+        # A bare boolean column, possibly negated
+        if rest.strip():
+            return None
+        return Predicate(table, column, 'eq', not match.group('negated'))
+    if match.group('negated'):
+        return None
+    if op in EQUALITY_OPS:
+        value = _value(sql, rest, offset + match.start('rest'), params) if op == '=' else _NO_VALUE
+        if op == 'IS NULL':
+            value = None
+        return Predicate(table, column, 'eq', value)
+    if op in RANGE_OPS:
+        return Predicate(table, column, 'range', _NO_VALUE)
+    return None
+
+
+def _access_paths(sql, text, offset, depths, params, aliases, main_table):
+    """Lists of predicates, one per OR branch of the clause."""
+    text, offset = _strip_parens(text, offset, depths)
+    branches = list(_split(text, offset, depths, 'OR'))
+    if len(branches) > 1:
+        paths = []
+        for branch, branch_offset in branches:
+            paths.extend(_access_paths(sql, branch, branch_offset, depths, params, aliases, main_table))
+        # "id = 1 OR id = 2 ..." on one column is an IN list
+        columns = {(p.table, p.column, p.kind) for path in paths for p in path}
+        if all(len(path) == 1 for path in paths) and len(columns) == 1:
+            table, column, kind = columns.pop()
+            return [[Predicate(table, column, kind, _NO_VALUE)]]
+        return paths
+
+    predicates = []
+    for part, part_offset in _split(text, offset, depths, 'AND'):
+        part, part_offset = _strip_parens(part, part_offset, depths)
+        if len(list(_split(part, part_offset, depths, 'OR'))) > 1:
+            # A nested OR cannot be served by one index range: ignore it
+            continue
+        predicate = _predicate(sql, part, part_offset, params, aliases, main_table)
+        if predicate:
+            predicates.append(predicate)
+    return [predicates]
+
+
+def analyze_statement(sql, params=None):
+    """
+    Access paths of a SELECT, UPDATE or DELETE.
+
+    Returns:
+        list: (table, equality predicates, range columns, sort columns) tuples
+    """
+    depths = _depths(sql)
+    top_level = [m for m in _KEYWORDS.finditer(sql) if depths[m.start()] == 0]
+    tables = [m for m in _TABLES.finditer(sql) if depths[m.start()] == 0]
+    if not tables:
+        update = re.match(r'\s*(?:UPDATE|DELETE FROM)\s+"(\w+)"', sql, re.IGNORECASE)
+        if not update:
+            return []
+        main_table, aliases = update.group(1), {}
+    else:
+        main_table = tables[0].group(1)
+        aliases = {m.group(2): m.group(1) for m in tables if m.group(2)}
+
+    clauses = {}
+    for index, match in enumerate(top_level):
+        end = top_level[index + 1].start() if index + 1 < len(top_level) else len(sql)
+        clauses.setdefault(match.group(1).upper(), (sql[match.end():end], match.end()))
+
+    sort = []
+    if 'ORDER BY' in clauses:
+        text, _ = clauses['ORDER BY']
+        for part in text.split(','):
+            match = _ORDER_COLUMN.match(part.strip())
+            if not match:
+                break
+            table = match.group('table') or aliases.get(match.group('alias')) or main_table
+            if table != main_table:
+                break
+            descending = (match.group('direction') or '').upper() == 'DESC'
+            sort.append(('-' if descending else '') + match.group('column'))
+
+    paths = [[]]
+    if 'WHERE' in clauses:
+        text, offset = clauses['WHERE']
+        paths = _access_paths(sql, text, offset, depths, params, aliases, main_table)
+
+    results = []
+    for predicates in paths:
+        by_table = {}
+        for predicate in predicates:
+            by_table.setdefault(predicate.table, []).append(predicate)
+        if sort:
+            by_table.setdefault(main_table, [])
+        for table, table_predicates in by_table.items():
+            equality = {}
+            for predicate in table_predicates:
+                if predicate.kind == 'eq':
+                    equality.setdefault(predicate.column, predicate.value)
+            ranges = sorted({p.column for p in table_predicates if p.kind == 'range'} - set(equality))
+            table_sort = tuple(sort) if table == main_table else ()
+            if equality or ranges or table_sort:
+                results.append((table, equality, tuple(ranges), table_sort))
+    return results
+
+
+# -------------------------------------------------------------------------
+# Table statistics
+# -------------------------------------------------------------------------
+
+class TableStatistics:
+    """Row counts, distinct values and value frequencies, cached per run."""
+
+    def __init__(self, using=connection):
+        self.connection = using
+        self.ops = using.ops
+        self._rows = {}
+        self._distinct = {}
+        self._frequency = {}
+
+    def _scalar(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _sample(self, table):
+        return f'(SELECT * FROM {self.ops.quote_name(table)} LIMIT {SAMPLE_ROWS}) sample'
+
+    def rows(self, table):
+        if table not in self._rows:
+            rows = None
+            if self.connection.vendor == 'postgresql':
+                rows = self._scalar('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            if not rows or rows < 0:
+                rows = self._scalar(f'SELECT COUNT(*) FROM {self.ops.quote_name(table)}')
+            self._rows[table] = rows or 0
+        return self._rows[table]
+
+    def distinct(self, table, column):
+        key = (table, column)
+        if key not in self._distinct:
+            distinct = None
+            if self.connection.vendor == 'postgresql':
+                n_distinct = self._scalar(
+                    'SELECT n_distinct FROM pg_stats WHERE tablename = %s AND attname = %s', [table, column]
+                )
+                if n_distinct is not None:
+                    # Negative: a fraction of the rows
+                    distinct = -n_distinct * self.rows(table) if n_distinct < 0 else n_distinct
+            if distinct is None:
+                distinct = self._scalar(
+                    f'SELECT COUNT(DISTINCT {self.ops.quote_name(column)}) FROM {self._sample(table)}'
+                )
+            self._distinct[key] = max(distinct or 1, 1)
+        return self._distinct[key]
+
+    def frequency(self, table, column, value):
+        """Share of rows equal to value (sampled)."""
+        key = (table, column, repr(value))
+        if key not in self._frequency:
+            column_sql = self.ops.quote_name(column)
+            sampled = self._scalar(f'SELECT COUNT(*) FROM {self._sample(table)}')
+            if value is None:
+                matching = self._scalar(f'SELECT COUNT(*) FROM {self._sample(table)} WHERE {column_sql} IS NULL')
+            else:
+                matching = self._scalar(
+                    f'SELECT COUNT(*) FROM {self._sample(table)} WHERE {column_sql} = %s', [value]
+                )
+            self._frequency[key] = (matching / sampled) if sampled else 1.0
+        return self._frequency[key]
+
+    def equality_selectivity(self, table, column, value=_NO_VALUE):
+        if value is not _NO_VALUE and not isinstance(value, (list, tuple, dict)):
+            try:
+                return self.frequency(table, column, value)
+            except Exception:
+                pass
+        return 1 / self.distinct(table, column)
+
+
+def existing_indexes(table, using=connection):
+    """{name: [columns]} of the indexes, unique constraints and primary key of a table."""
+    with using.cursor() as cursor:
+        constraints = using.introspection.get_constraints(cursor, table)
+    return {
+        name: constraint['columns']
+        for name, constraint in constraints.items()
+        if (constraint['index'] or constraint['unique'] or constraint['primary_key']) and constraint['columns']
+    }
+
+
+# -------------------------------------------------------------------------
+# Advisor
+# -------------------------------------------------------------------------
+
+class Candidate:
+    """An index shape and the statements it would serve."""
+
+    def __init__(self, table, equality, ranges, sort, partial):
+        self.table = table
+        self.equality = equality
+        self.ranges = ranges
+        self.sort = sort
+        self.partial = partial
+        self.statements = 0
+        self.time_ms = 0.0
+
+    def columns(self, statistics):
+        """Key columns: equality (most selective first), sort, then one range column."""
+        equality = sorted(self.equality, key=lambda column: statistics.equality_selectivity(self.table, column))
+        columns = equality + [column for column in self.sort if column.lstrip('-') not in self.equality]
+        if self.ranges and self.ranges[0] not in {column.lstrip('-') for column in columns}:
+            columns.append(self.ranges[0])
+        return columns
+
+
+def _model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def index_name(table, columns, partial=None):
+    """Index name, unique per table, key columns and partial condition."""
+    name = f"{table}_{'_'.join(column.lstrip('-') for column in columns)}"
+    if len(name) > 26 or partial:
+        digest = hashlib.sha1(f'{name}|{partial!r}'.encode()).hexdigest()[:4]
+        name = f'{name[:21]}_{digest}'
+    return f'{name}_idx'
+
+
+def _django_snippet(model, columns, partial, name):
+    fields_by_column = {field.column: field.name for field in model._meta.concrete_fields}
+    fields = [
+        ('-' if column.startswith('-') else '') + fields_by_column.get(column.lstrip('-'), column.lstrip('-'))
+        for column in columns
+    ]
+    snippet = f"models.Index(fields={fields!r}, name={name!r}"
+    if partial:
+        column, value = partial
+        snippet += f", condition=Q({fields_by_column.get(column, column)}={value!r})"
+    return snippet + ')'
+
+
+def _sql_snippet(table, columns, partial, name, ops):
+    keys = ', '.join(
+        f"{ops.quote_name(column.lstrip('-'))}{' DESC' if column.startswith('-') else ''}" for column in columns
+    )
+    sql = f'CREATE INDEX {ops.quote_name(name)} ON {ops.quote_name(table)} ({keys})'
+    if partial:
+        column, value = partial
+        sql += f' WHERE {ops.quote_name(column)} = {value!r}' if value is not None else f' WHERE {ops.quote_name(column)} IS NULL'
+    return sql
+
+
+def _prefix_selectivity(index_columns, candidate, statistics):
+    """Share of rows an existing index narrows the candidate's statements to."""
+    selectivity = 1.0
+    for column in index_columns:
+        if column in candidate.equality:
+            selectivity *= statistics.equality_selectivity(candidate.table, column, candidate.equality[column])
+        elif candidate.ranges and column == candidate.ranges[0]:
+            selectivity *= RANGE_SELECTIVITY
+            break
+        else:
+            break
+    return selectivity
+
+
+def build_candidates(statements, statistics):
+    candidates = {}
+    for statement in statements:
+        for table, equality, ranges, sort in analyze_statement(statement.sql, statement.params):
+            partial = None
+            for column, value in equality.items():
+                if value is _NO_VALUE or isinstance(value, (list, tuple, dict)) or len(equality) + len(ranges) + len(sort) < 2:
+                    continue
+                try:
+                    if statistics.rows(table) < MIN_TABLE_ROWS:
+                        break
+                    if (statistics.distinct(table, column) <= PARTIAL_MAX_DISTINCT
+                            and statistics.frequency(table, column, value) <= PARTIAL_MAX_FRACTION):
+                        partial = (column, value)
+                        break
+                except Exception:
+                    break
+            key_equality = {column: value for column, value in equality.items() if not partial or column != partial[0]}
+            key = (table, frozenset(key_equality), ranges, sort, repr(partial))
+            candidate = candidates.get(key)
+            if candidate is None:
+                candidate = candidates[key] = Candidate(table, key_equality, ranges, sort, partial)
+            candidate.statements += statement.count
+            candidate.time_ms += statement.time_ms
+    return _collapse_partials(candidates)
+
+
+def _collapse_partials(candidates):
+    """
+    Shapes that differ only in the constant of their partial condition share
+    one index with that column as a key, instead of one partial index per constant.
+    """
+    groups = {}
+    for key, candidate in candidates.items():
+        if candidate.partial:
+            table, equality, ranges, sort, _ = key
+            groups.setdefault((table, equality, ranges, sort, candidate.partial[0]), []).append(key)
+    for (table, equality, ranges, sort, column), keys in groups.items():
+        if len(keys) < 2:
+            continue
+        group = [candidates.pop(key) for key in keys]
+        key = (table, equality | {column}, ranges, sort, repr(None))
+        merged = candidates.get(key)
+        if merged is None:
+            merged = candidates[key] = Candidate(table, {**group[0].equality, column: _NO_VALUE}, ranges, sort, None)
+        for candidate in group:
+            merged.statements += candidate.statements
+            merged.time_ms += candidate.time_ms
+    return list(candidates.values())
+
+
+def advise(statements, using=connection, min_improvement=MIN_IMPROVEMENT, min_rows=MIN_TABLE_ROWS,
+           min_rows_saved=MIN_ROWS_SAVED, limit=20):
+    """
+    Ranked index suggestions for the statements.
+
+    Returns:
+        dict: 'suggestions' (list of dicts, best first), 'covered' (candidates
+        an existing index already serves) and 'statements'
+    """
+    statistics = TableStatistics(using)
+    suggestions, covered = {}, 0
+    table_names = set(using.introspection.table_names())
+
+    for candidate in build_candidates(statements, statistics):
+        if candidate.table not in table_names:
+            continue
+        rows = statistics.rows(candidate.table)
+        if rows < min_rows:
+            continue
+        columns = candidate.columns(statistics)
+        if not columns:
+            continue
+
+        new_selectivity = 1.0
+        for column in columns:
+            bare = column.lstrip('-')
+            if bare in candidate.equality:
+                new_selectivity *= statistics.equality_selectivity(candidate.table, bare, candidate.equality[bare])
+            elif bare in candidate.ranges:
+                new_selectivity *= RANGE_SELECTIVITY
+        if candidate.partial:
+            column, value = candidate.partial
+            new_selectivity *= statistics.equality_selectivity(candidate.table, column, value)
+
+        indexes = existing_indexes(candidate.table, using)
+        best_name, best_selectivity = None, 1.0
+        plain_columns = [column.lstrip('-') for column in columns]
+        for name, index_columns in indexes.items():
+            if index_columns[:len(plain_columns)] == plain_columns and not candidate.partial:
+                best_name, best_selectivity = name, new_selectivity
+                break
+            selectivity = _prefix_selectivity(index_columns, candidate, statistics)
+            if selectivity < best_selectivity:
+                best_name, best_selectivity = name, selectivity
+
+        sort_served = not candidate.sort or any(
+            index_columns[:len(plain_columns)] == plain_columns for index_columns in indexes.values()
+        )
+        improvement = 1 - new_selectivity / best_selectivity if best_selectivity else 0.0
+        rows_saved = rows * (best_selectivity - new_selectivity)
+        if sort_served and (improvement < min_improvement or rows_saved < min_rows_saved):
+            covered += 1
+            continue
+
+        name = index_name(candidate.table, columns, candidate.partial)
+        # Access paths that differ only in predicates the index does not cover share one suggestion
+        key = (name, repr(candidate.partial))
+        score = candidate.time_ms * max(improvement, 0.0) * math.log10(rows + 10)
+        if key in suggestions:
+            merged = suggestions[key]
+            merged['statements'] += candidate.statements
+            merged['time_ms'] = round(merged['time_ms'] + candidate.time_ms, 2)
+            merged['score'] += score
+            continue
+
+        model = _model_for_table(candidate.table)
+        suggestions[key] = {
+            'table': candidate.table,
+            'model': model._meta.label if model else None,
+            'columns': columns,
+            'partial': candidate.partial,
+            'statements': candidate.statements,
+            'time_ms': round(candidate.time_ms, 2),
+            'rows': rows,
+            'selectivity': new_selectivity,
+            'rows_examined': round(rows * best_selectivity),
+            'rows_with_index': max(1, round(rows * new_selectivity)),
+            'existing_index': best_name,
+            'improvement': improvement,
+            # Time of the statements served, weighted by the share of rows saved
+            'score': score,
+            'django': _django_snippet(model, columns, candidate.partial, name) if model else None,
+            'sql': _sql_snippet(candidate.table, columns, candidate.partial, name, using.ops),
+        }
+
+    ranked = sorted(suggestions.values(), key=lambda suggestion: (suggestion['score'], suggestion['statements']), reverse=True)
+    return {'suggestions': ranked[:limit], 'covered': covered, 'statements': len(statements)}
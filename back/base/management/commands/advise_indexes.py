@@ -0,0 +1,100 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from base.benchmarks import ENDPOINTS, BenchmarkContext, benchmark_database, benchmark_endpoint, scaled_counts
+from base.datasets import DATASET_SEED, DatasetGenerator
+from base.indexes import (
+    MIN_IMPROVEMENT, MIN_ROWS_SAVED, MIN_TABLE_ROWS, StatementRecorder, advise, profile_statements, slow_log_statements,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Suggest composite and partial indexes from the WHERE/ORDER BY column sets of captured queries '
+        '(slow query log, request profiles) or of a benchmark replay, ranked by estimated benefit.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=['slow-log', 'profiles', 'benchmark'], default='slow-log',
+                            help='Where the statements come from')
+        parser.add_argument('--scale', type=float, default=1,
+                            help='Dataset scale for --source benchmark (multiplier of the default row counts)')
+        parser.add_argument('--iterations', type=int, default=3,
+                            help='Requests per endpoint for --source benchmark')
+        parser.add_argument('--seed', type=int, default=DATASET_SEED, help='Dataset seed for --source benchmark')
+        parser.add_argument('--limit', type=int, default=20, help='Number of suggestions to show')
+        parser.add_argument('--min-improvement', type=float, default=MIN_IMPROVEMENT,
+                            help='Minimum share of examined rows an index must save')
+        parser.add_argument('--min-rows-saved', type=int, default=MIN_ROWS_SAVED,
+                            help='Minimum examined rows an index must save per statement')
+        parser.add_argument('--min-rows', type=int, default=MIN_TABLE_ROWS,
+                            help='Ignore tables with fewer rows')
+        parser.add_argument('--json', help='Also write the suggestions to this JSON file')
+
+    def handle(self, *args, **options):
+        advise_options = {
+            'min_improvement': options['min_improvement'],
+            'min_rows': options['min_rows'],
+            'min_rows_saved': options['min_rows_saved'],
+            'limit': options['limit'],
+        }
+        if options['source'] == 'benchmark':
+            report = self.advise_benchmark(options, advise_options)
+        else:
+            statements = slow_log_statements() if options['source'] == 'slow-log' else profile_statements()
+            if not statements:
+                raise CommandError(f"No statements captured in the {options['source']} source yet")
+            report = advise(statements, **advise_options)
+
+        self.print_report(report)
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2, default=str)
+            self.stdout.write(self.style.SUCCESS(f"Suggestions written to {options['json']}"))
+
+    def advise_benchmark(self, options, advise_options):
+        """Replay every benchmark endpoint on a throwaway dataset and analyze there."""
+        scale = options['scale']
+        setup_test_environment()
+        try:
+            with benchmark_database():
+                self.stdout.write(f'Generating the dataset (scale {scale:g})')
+                DatasetGenerator(scaled_counts(scale), seed=options['seed']).run()
+                context = BenchmarkContext()
+                recorder = StatementRecorder()
+                with connection.execute_wrapper(recorder):
+                    for endpoint in ENDPOINTS:
+                        if context.requires(endpoint):
+                            benchmark_endpoint(context, endpoint, iterations=options['iterations'], warmup=0)
+                self.stdout.write(f'Captured {len(recorder.statements)} statements')
+                # Table statistics must be read before the database is destroyed
+                return advise(recorder.statements, **advise_options)
+        finally:
+            teardown_test_environment()
+
+    def print_report(self, report):
+        suggestions = report['suggestions']
+        self.stdout.write(
+            f"Analyzed {report['statements']} statements: {len(suggestions)} suggestions, "
+            f"{report['covered']} access paths already served by an existing index"
+        )
+        for rank, suggestion in enumerate(suggestions, start=1):
+            partial = suggestion['partial']
+            condition = f" WHERE {partial[0]} = {partial[1]!r}" if partial else ''
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{rank:>2}. {suggestion['table']} ({', '.join(suggestion['columns'])}){condition}"
+            ))
+            self.stdout.write(
+                f"    {suggestion['statements']} statements, {suggestion['time_ms']:.1f}ms; "
+                f"selectivity {suggestion['selectivity']:.4f}: ~{suggestion['rows_examined']} -> "
+                f"~{suggestion['rows_with_index']} of {suggestion['rows']} rows examined "
+                f"({suggestion['improvement']:.0%} fewer)"
+            )
+            if suggestion['existing_index']:
+                self.stdout.write(f"    best existing index: {suggestion['existing_index']}")
+            if suggestion['django']:
+                self.stdout.write(f"    {suggestion['model']}: {suggestion['django']}")
+            self.stdout.write(f"    {suggestion['sql']}")
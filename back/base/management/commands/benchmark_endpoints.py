@@ -0,0 +1,79 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from base.benchmarks import (
+    BENCHMARK_ITERATIONS, BENCHMARK_SCALES, BENCHMARK_WARMUP, ENDPOINTS, REGRESSION_THRESHOLD,
+    compare_results, plot_scaling, run_benchmarks,
+)
+from base.datasets import DATASET_SEED
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark API endpoint latency, queries and response size on generated datasets of several sizes. '
+        'Each scale runs in a throwaway test database (set DATABASES TEST NAME to benchmark SQLite on disk).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default=','.join(str(scale) for scale in BENCHMARK_SCALES),
+                            help='Comma separated multipliers of the default dataset size')
+        parser.add_argument('--iterations', type=int, default=BENCHMARK_ITERATIONS,
+                            help='Measured requests per endpoint and scale')
+        parser.add_argument('--warmup', type=int, default=BENCHMARK_WARMUP,
+                            help='Unmeasured requests sent before measuring')
+        parser.add_argument('--seed', type=int, default=DATASET_SEED, help='Dataset seed')
+        parser.add_argument('--endpoint', action='append', choices=[endpoint.name for endpoint in ENDPOINTS],
+                            help='Only benchmark this endpoint (repeatable)')
+        parser.add_argument('--output', default='benchmark.json', help='Write the results to this JSON file')
+        parser.add_argument('--plot', help='Save scaling curves to this PNG file')
+        parser.add_argument('--compare', help='Baseline JSON file to diff the results against')
+        parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                            help='Growth factor over the baseline that counts as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error when a metric regressed')
+
+    def handle(self, *args, **options):
+        try:
+            scales = [float(scale) for scale in options['scales'].split(',') if scale.strip()]
+        except ValueError:
+            raise CommandError('--scales must be comma separated numbers')
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)
+
+        setup_test_environment()
+        try:
+            report = run_benchmarks(
+                scales=[int(scale) if scale.is_integer() else scale for scale in scales],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                seed=options['seed'],
+                endpoints=options['endpoint'],
+                log=self.stdout.write,
+            )
+        finally:
+            teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['plot']:
+            plot_scaling(report, options['plot'])
+            self.stdout.write(self.style.SUCCESS(f"Scaling curves saved to {options['plot']}"))
+
+        if baseline is None:
+            return
+        rows = compare_results(baseline, report, options['threshold'])
+        regressions = [row for row in rows if row['regressed']]
+        for row in rows:
+            line = (f"{row['endpoint']:<18} x{row['scale']:<6} {row['metric']:<8} "
+                    f"{row['baseline']:>12.4f} -> {row['current']:>12.4f} ({row['ratio']:.2f}x)")
+            self.stdout.write(self.style.ERROR(line) if row['regressed'] else line)
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} metrics regressed against {options["compare"]}')
+        self.stdout.write(f'{len(regressions)} of {len(rows)} metrics regressed')
@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from base.datasets import DATASET_BATCH_SIZE, DATASET_SEED, DEFAULT_COUNTS, DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic, seeded synthetic dataset with bulk inserts'
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_COUNTS.items():
+            parser.add_argument(f'--{name}', type=int, help=f'Number of {name} (default {default} x --scale)')
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier applied to the default counts')
+        parser.add_argument('--seed', type=int, default=DATASET_SEED,
+                            help='Random seed; the same seed and counts give the same data')
+        parser.add_argument('--anchor-date', type=date.fromisoformat,
+                            help='Date the generated history is relative to, YYYY-MM-DD (default today)')
+        parser.add_argument('--batch-size', type=int, default=DATASET_BATCH_SIZE,
+                            help='Number of rows per bulk insert')
+        parser.add_argument('--force', action='store_true',
+                            help='Allow running with DEBUG off')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Refusing to generate synthetic data with DEBUG off; pass --force to proceed')
+
+        counts = {
+            name: options[name] if options[name] is not None else round(default * options['scale'])
+            for name, default in DEFAULT_COUNTS.items()
+        }
+        generator = DatasetGenerator(
+            counts,
+            seed=options['seed'],
+            anchor_date=options['anchor_date'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        if generator.exists():
+            raise CommandError(f"A dataset with seed {options['seed']} already exists; use another --seed")
+
+        result = generator.run()
+        summary = ', '.join(f'{count} {name}' for name, count in result.items())
+        self.stdout.write(self.style.SUCCESS(f'Generated {summary}'))
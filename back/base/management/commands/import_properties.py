@@ -0,0 +1,63 @@
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from base.imports import IMPORT_BATCH_SIZE, PropertyImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import properties (with rooms and media) from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='File format (defaults to the file extension)')
+        parser.add_argument('--owner', help='Email of the user who will own the imported properties')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help='Number of rows validated and written per batch')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate every row without writing anything')
+        parser.add_argument('--skip-media-processing', action='store_true',
+                            help='Do not queue image optimization for imported media')
+        parser.add_argument('--errors-file', help='Write per-row errors to this JSONL file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise CommandError('Cannot infer the file format; pass --format csv|jsonl')
+
+        owner = None
+        if options['owner']:
+            try:
+                owner = get_user_model().objects.get(email=options['owner'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['owner']}")
+
+        importer = PropertyImporter(
+            owner=owner,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            process_media=not options['skip_media_processing'],
+        )
+        with open(path, 'rb') as fileobj:
+            result = importer.run(read_rows(fileobj, file_format))
+
+        errors = result['errors']
+        if options['errors_file']:
+            with open(options['errors_file'], 'w', encoding='utf-8') as errors_file:
+                for error in errors:
+                    errors_file.write(json.dumps(error, ensure_ascii=False, default=str) + '\n')
+        else:
+            for error in errors[:20]:
+                self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'], ensure_ascii=False, default=str)}")
+            if len(errors) > 20:
+                self.stderr.write(f"... {len(errors) - 20} more errors (use --errors-file)")
+
+        action = 'Validated' if options['dry_run'] else 'Imported'
+        count = result['total'] - len(errors) if options['dry_run'] else result['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {count} of {result['total']} rows ({len(errors)} errors)"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from base.analytics import MATERIALIZE_CHUNK_SIZE, refresh_property_analytics
+
+
+class Command(BaseCommand):
+    help = 'Materialize PropertyAnalytics rows for properties whose source data changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every property instead of only stale ones')
+        parser.add_argument('--chunk-size', type=int, default=MATERIALIZE_CHUNK_SIZE,
+                            help='Number of properties computed per chunk')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of chunks computed in parallel')
+
+    def handle(self, *args, **options):
+        written = refresh_property_analytics(
+            full=options['full'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Materialized analytics for {written} properties'))
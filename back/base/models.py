@@ -14,7 +14,7 @@ import logging
 from PIL import Image
 from io import BytesIO
 from django.core.files.base import ContentFile
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Count, Sum, Avg
 from datetime import timedelta
 
 # Get an instance of a logger
@@ -37,7 +37,23 @@ class BaseModel(models.Model):
         """Mark record as deleted instead of physically deleting it"""
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save(update_fields=['is_deleted', 'deleted_at'])
+        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+
+# -------------------------------------------------------------------------
+# Sequence Model
+# -------------------------------------------------------------------------
+class Sequence(models.Model):
+    """Per-prefix counter behind business numbers (see sequences.py)"""
+    name = models.CharField(_('الاسم'), max_length=50, unique=True)
+    last_value = models.PositiveBigIntegerField(_('آخر قيمة'), default=0)
+    updated_at = models.DateTimeField(_('تاريخ التحديث'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('تسلسل')
+        verbose_name_plural = _('التسلسلات')
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
 
 # -------------------------------------------------------------------------
 # Media Model
@@ -146,6 +162,26 @@ class LocationManager(models.Manager):
     def get_by_natural_key(self, city, state, country, postal_code):
         return self.get(city=city, state=state, country=country, postal_code=postal_code)
 
+    def get_many_by_natural_key(self, keys):
+        """
+        Fetch many locations by natural key in a single query.
+
+        Returns:
+            dict: {(city, state, country, postal_code): Location} for the keys that exist
+        """
+        keys = set(keys)
+        if not keys:
+            return {}
+        cities, states, countries, postal_codes = (set(parts) for parts in zip(*keys))
+        candidates = self.filter(
+            city__in=cities, state__in=states, country__in=countries, postal_code__in=postal_codes
+        )
+        return {
+            location.natural_key(): location
+            for location in candidates
+            if location.natural_key() in keys
+        }
+
 class Location(BaseModel):
     """Location model"""
     city = models.CharField(_('المدينة'), max_length=100)
@@ -285,23 +321,23 @@ class Property(BaseModel):
     def __str__(self):
         return self.title
 
-    def get_cache_key(self):
-        """Generate unique cache key for this property"""
-        return f'property_{self.id}'
+    @staticmethod
+    def number_series(property_type):
+        """Property numbers per type: RES-000001 (six digits, never clashing with legacy five-digit numbers)"""
+        from .sequences import NumberSeries
+        return NumberSeries(property_type[:3].upper(), width=6)
 
     def save(self, *args, **kwargs):
         # Auto-generate property number if not provided
         if not self.property_number:
-            prefix = self.property_type[:3].upper()
-            random_num = random.randint(10000, 99999)
-            self.property_number = f"{prefix}-{random_num}"
+            self.property_number = self.number_series(self.property_type).next()
 
         # Create slug if not provided
         if not self.slug:
             self.slug = self._generate_unique_slug()
         
+        # auto_now moves updated_at, so cached fragments (fragments.py) get a new key
         super().save(*args, **kwargs)
-        cache.delete(self.get_cache_key())
 
     def _generate_unique_slug(self):
         """Generate a unique slug for the property"""
@@ -561,7 +597,7 @@ class Auction(BaseModel):
         # Update property status if auction is active
         if self.is_published and self.status in ['scheduled', 'live'] and self.related_property:
             self.related_property.status = 'auction'
-            self.related_property.save(update_fields=['status'])
+            self.related_property.save(update_fields=['status', 'updated_at'])
 
         super().save(*args, **kwargs)
 
@@ -606,7 +642,7 @@ class Auction(BaseModel):
                     self.related_property.status = 'sold'
                 else:
                     self.related_property.status = 'available'
-                self.related_property.save(update_fields=['status'])
+                self.related_property.save(update_fields=['status', 'updated_at'])
         
         return self.status
 
@@ -1101,18 +1137,23 @@ class DashboardMetrics(BaseModel):
     @classmethod
     def get_or_calculate(cls, user, metric_type, cache_key='default', calculator_func=None, expires_in_hours=1):
         """Get cached metrics or calculate new ones"""
+        from accounts.metrics import DASHBOARD_LOOKUPS, DASHBOARD_RECOMPUTE
+
         try:
             metrics = cls.objects.get(user=user, metric_type=metric_type, cache_key=cache_key)
             if not metrics.is_expired():
+                DASHBOARD_LOOKUPS.labels(metric_type, 'hit').inc()
                 return metrics.metric_data
+            DASHBOARD_LOOKUPS.labels(metric_type, 'expired').inc()
         except cls.DoesNotExist:
-            pass
+            DASHBOARD_LOOKUPS.labels(metric_type, 'miss').inc()
         
         # Calculate new metrics
         if calculator_func:
             start_time = timezone.now()
             data = calculator_func(user)
             calculation_time = timezone.now() - start_time
+            DASHBOARD_RECOMPUTE.labels(metric_type).observe(calculation_time.total_seconds())
             
             # Convert Decimals to floats before caching
             converted_data = cls._convert_decimals_to_floats(data)
@@ -1252,26 +1293,9 @@ class RentalProperty(BaseModel):
     @property
     def occupancy_rate(self):
         """Calculate occupancy rate for the current year"""
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        current_year = timezone.now().year
-        year_start = timezone.datetime(current_year, 1, 1).date()
-        year_end = timezone.datetime(current_year, 12, 31).date()
-        
-        occupied_days = 0
-        total_days = (year_end - year_start).days + 1
-        
-        active_leases = self.leases.filter(
-            models.Q(start_date__lte=year_end) & models.Q(end_date__gte=year_start)
-        )
-        
-        for lease in active_leases:
-            lease_start = max(lease.start_date, year_start)
-            lease_end = min(lease.end_date, year_end)
-            occupied_days += (lease_end - lease_start).days + 1
-        
-        return (occupied_days / total_days) * 100 if total_days > 0 else 0
+        from .occupancy import compute_occupancy
+
+        return compute_occupancy([self.pk])[self.pk]['occupancy_rate']
 
     def calculate_annual_income(self):
         """Calculate expected annual income"""
@@ -1394,6 +1418,10 @@ class Tenant(BaseModel):
     @property
     def current_lease(self):
         """Get current active lease"""
+        if hasattr(self, 'current_leases'):
+            # Loaded for a whole page by occupancy.prefetch_current_leases()
+            return self.current_leases[0] if self.current_leases else None
+
         from django.utils import timezone
         return self.leases.filter(
             status='active',
@@ -1502,6 +1530,7 @@ class Lease(BaseModel):
             models.Index(fields=['start_date', 'end_date']),
             models.Index(fields=['tenant']),
             models.Index(fields=['rental_property']),
+            models.Index(fields=['rental_property', 'status', 'start_date', 'end_date']),
         ]
 
     def __str__(self):
@@ -1514,10 +1543,14 @@ class Lease(BaseModel):
 
     def _generate_lease_number(self):
         """Generate unique lease number"""
-        from django.utils import timezone
-        year = timezone.now().year
-        count = Lease.objects.filter(created_at__year=year).count() + 1
-        return f"LSE-{year}-{count:05d}"
+        return self.number_series().next()
+
+    @staticmethod
+    def number_series(year=None):
+        """Lease numbers per year: LSE-2025-00001"""
+        from .sequences import NumberSeries
+        year = year or timezone.now().year
+        return NumberSeries(f"LSE-{year}", width=5, model=Lease, field='lease_number')
 
     @property
     def duration_months(self):
@@ -1649,6 +1682,10 @@ class WorkerCategory(BaseModel):
         }
 
 
+# Maintenance statuses that count toward a worker's current workload
+WORKER_ACTIVE_JOB_STATUSES = ['assigned', 'in_progress', 'worker_assigned']
+
+
 class Worker(BaseModel):
     """Enhanced Workers/Staff for property maintenance and management"""
     EMPLOYMENT_TYPE_CHOICES = [
@@ -1801,9 +1838,17 @@ class Worker(BaseModel):
             models.Index(fields=['skill_level', 'rating']),
         ]
     
+    # Cached WorkerAnalyticsView payload; dropped when maintenance statuses change
+    ANALYTICS_CACHE_KEY = 'worker_analytics'
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.employee_id or self.national_id})"
     
+    @classmethod
+    def invalidate_analytics_cache(cls):
+        """Drop the cached worker performance analytics"""
+        cache.delete(cls.ANALYTICS_CACHE_KEY)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
@@ -1811,8 +1856,11 @@ class Worker(BaseModel):
     @property
     def current_active_jobs(self):
         """Get count of current active maintenance jobs"""
+        if hasattr(self, 'active_jobs_count'):
+            # Annotated by the worker list views
+            return self.active_jobs_count
         return self.assigned_maintenance.filter(
-            status__in=['assigned', 'in_progress', 'worker_assigned']
+            status__in=WORKER_ACTIVE_JOB_STATUSES
         ).count()
     
     @property
@@ -1876,24 +1924,17 @@ class Worker(BaseModel):
         
         return round(efficiency, 2)
     
+    @staticmethod
+    def number_series(year=None):
+        """Employee ids per year: WRK-2025-0001"""
+        from .sequences import NumberSeries
+        year = year or timezone.now().year
+        return NumberSeries(f"WRK-{year}", width=4, model=Worker, field='employee_id')
+
     def save(self, *args, **kwargs):
         # Auto-generate employee ID if not provided
         if not self.employee_id:
-            year = timezone.now().year
-            last_worker = Worker.objects.filter(
-                employee_id__startswith=f'WRK-{year}-'
-            ).order_by('employee_id').last()
-            
-            if last_worker and last_worker.employee_id:
-                try:
-                    last_num = int(last_worker.employee_id.split('-')[-1])
-                    new_num = last_num + 1
-                except (ValueError, IndexError):
-                    new_num = 1
-            else:
-                new_num = 1
-            
-            self.employee_id = f'WRK-{year}-{new_num:04d}'
+            self.employee_id = self.number_series().next()
         
         super().save(*args, **kwargs)
     
@@ -2298,8 +2339,11 @@ class MaintenanceRequest(BaseModel):
             self.due_date = self.reported_date + timedelta(hours=hours)
         
         # Update timestamps based on status changes
+        workload_changed = True
         if self.pk:
             old_instance = MaintenanceRequest.objects.get(pk=self.pk)
+            workload_changed = (old_instance.status != self.status or
+                                old_instance.assigned_worker_id != self.assigned_worker_id)
             if old_instance.status != self.status:
                 if self.status == 'in_progress' and not self.started_date:
                     self.started_date = timezone.now()
@@ -2307,6 +2351,8 @@ class MaintenanceRequest(BaseModel):
                     self.completed_date = timezone.now()
         
         super().save(*args, **kwargs)
+        if workload_changed:
+            Worker.invalidate_analytics_cache()
 
     def to_dict(self):
         """Return dictionary representation for API responses"""
@@ -3100,6 +3146,18 @@ class PropertyAnalytics(BaseModel):
     def __str__(self):
         return f"تحليلات {self.base_property.title} - {self.calculation_date}"
 
+    @classmethod
+    def mark_stale(cls, property_id=None, rental_property_id=None):
+        """
+        Drop the materialized row of a property so the next refresh recomputes it.
+        Updates are detected from updated_at; this covers hard deletes of source
+        rows (post_delete receivers below, wired in BaseConfig.ready).
+        """
+        if property_id:
+            cls.objects.filter(base_property_id=property_id).delete()
+        elif rental_property_id:
+            cls.objects.filter(base_property__rental_info=rental_property_id).delete()
+
     def to_dict(self):
         """Return dictionary representation for API responses"""
         return {
@@ -3147,6 +3205,7 @@ class Report(BaseModel):
     title = models.CharField(_('عنوان التقرير'), max_length=200)
     report_type = models.CharField(_('نوع التقرير'), max_length=20, choices=REPORT_TYPE_CHOICES)
     status = models.CharField(_('الحالة'), max_length=20, choices=STATUS_CHOICES, default='generating')
+    progress = models.PositiveSmallIntegerField(_('نسبة الإنجاز'), default=0)
     
     # Scope
     properties = models.ManyToManyField(Property, related_name='reports', verbose_name=_('العقارات'))
@@ -3191,6 +3250,7 @@ class Report(BaseModel):
             'report_type_display': self.get_report_type_display(),
             'status': self.status,
             'status_display': self.get_status_display(),
+            'progress': self.progress,
             'period_start': self.period_start.isoformat(),
             'period_end': self.period_end.isoformat(),
             'properties_count': self.properties.count(),
@@ -3475,10 +3535,16 @@ class Payment(models.Model):
     def save(self, *args, **kwargs):
         # Auto-generate payment ID if not provided
         if not self.payment_id:
-            timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-            random_num = random.randint(1000, 9999)
-            self.payment_id = f"PAY-{timestamp}-{random_num}"
+            self.payment_id = self.number_series().next()
         super().save(*args, **kwargs)
+
+    @staticmethod
+    def number_series(year=None):
+        """Payment ids per year: PAY-2025-000001"""
+        from .sequences import NumberSeries
+        year = year or timezone.now().year
+        return NumberSeries(f"PAY-{year}", width=6)
+
     
     @property
     def is_overdue(self):
@@ -3520,4 +3586,28 @@ class Payment(models.Model):
             'is_overdue': self.is_overdue,
             'days_overdue': self.days_overdue,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
\ No newline at end of file
+        }
+
+
+# -------------------------------------------------------------------------
+# Analytics Invalidation
+# -------------------------------------------------------------------------
+
+# post_delete receivers: they also run for cascades, QuerySet.delete() and the
+# admin's bulk delete, which skip Model.delete()
+
+def lease_deleted(sender, instance, **kwargs):
+    PropertyAnalytics.mark_stale(rental_property_id=instance.rental_property_id)
+
+
+def maintenance_request_deleted(sender, instance, **kwargs):
+    PropertyAnalytics.mark_stale(property_id=instance.maintenance_property_id)
+    Worker.invalidate_analytics_cache()
+
+
+def expense_deleted(sender, instance, **kwargs):
+    PropertyAnalytics.mark_stale(property_id=instance.expense_property_id)
+
+
+def payment_deleted(sender, instance, **kwargs):
+    PropertyAnalytics.mark_stale(property_id=instance.property_reference_id)
@@ -0,0 +1,194 @@
+"""
+Interval-based occupancy for rental properties.
+
+The lease intervals of a whole batch of rental properties are loaded in one
+query. Each property's intervals are sorted and merged in a single sweep, so
+overlapping or back-to-back leases are never counted twice. The occupied days
+of any date range are then the merged intervals clipped to that range.
+
+Availability is the complement: a unit is free for a date range when no
+booking lease overlaps it. This is checked with a NOT EXISTS anti-join that
+is served by the (rental_property, status, start_date, end_date) lease index,
+both for availability searches and to prevent double-booking.
+"""
+
+from datetime import date, timedelta
+
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.utils import timezone
+
+from .models import Lease
+
+# Lease statuses during which the unit is actually let (drafts never are)
+OCCUPYING_LEASE_STATUSES = ('active', 'expired', 'renewed', 'terminated')
+
+# Lease statuses that reserve a unit against other bookings
+BOOKING_LEASE_STATUSES = ('active',)
+
+
+def current_year_period(today=None):
+    """Return (January 1st, December 31st) of the current year."""
+    today = today or timezone.now().date()
+    return date(today.year, 1, 1), date(today.year, 12, 31)
+
+
+def merge_intervals(intervals):
+    """
+    Merge inclusive (start, end) date intervals.
+
+    Args:
+        intervals: Iterable of (start_date, end_date) pairs, in any order
+
+    Returns:
+        list: Sorted, non-overlapping [start, end] pairs. Intervals that touch
+        (one ends the day before the next starts) are joined.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def covered_days(merged, period_start, period_end):
+    """Count the days of [period_start, period_end] covered by merged intervals."""
+    days = 0
+    for start, end in merged:
+        if start > period_end:
+            break
+        overlap = (min(end, period_end) - max(start, period_start)).days + 1
+        if overlap > 0:
+            days += overlap
+    return days
+
+
+def _rental_property_ids(rental_properties):
+    return [getattr(rental_property, 'pk', rental_property) for rental_property in rental_properties]
+
+
+def compute_occupancy(rental_properties, period_start=None, period_end=None, today=None):
+    """
+    Compute occupancy for a batch of rental properties in one query.
+
+    Args:
+        rental_properties: RentalProperty instances or ids
+        period_start: First day of the period (defaults to January 1st)
+        period_end: Last day of the period (defaults to December 31st)
+        today: Reference day for the current tenant (defaults to today)
+
+    Returns:
+        dict: {rental_property_id: {'occupied_days', 'vacancy_days', 'total_days',
+        'occupancy_rate', 'is_occupied', 'current_tenant'}}
+    """
+    today = today or timezone.now().date()
+    default_start, default_end = current_year_period(today)
+    period_start = period_start or default_start
+    period_end = period_end or default_end
+    total_days = max((period_end - period_start).days + 1, 0)
+
+    ids = _rental_property_ids(rental_properties)
+    intervals = {rental_property_id: [] for rental_property_id in ids}
+    current = {}
+
+    rows = Lease.objects.filter(
+        rental_property_id__in=ids,
+        status__in=OCCUPYING_LEASE_STATUSES,
+    ).filter(
+        Q(start_date__lte=period_end, end_date__gte=period_start)
+        | Q(status='active', start_date__lte=today, end_date__gte=today)
+    ).order_by().values_list(
+        'rental_property_id', 'status', 'start_date', 'end_date', 'tenant_id',
+        'tenant__first_name', 'tenant__middle_name', 'tenant__last_name',
+        'tenant__email', 'tenant__phone',
+    )
+
+    for (rental_property_id, lease_status, start, end, tenant_id,
+         first_name, middle_name, last_name, email, phone) in rows:
+        if start <= period_end and end >= period_start:
+            intervals[rental_property_id].append((start, end))
+
+        # Same rule as RentalProperty.current_tenant: the latest active lease covering today
+        if lease_status == 'active' and start <= today <= end:
+            latest = current.get(rental_property_id)
+            if latest is None or start > latest[0]:
+                current[rental_property_id] = (start, {
+                    'id': tenant_id,
+                    'full_name': ' '.join(filter(None, [first_name, middle_name, last_name])),
+                    'email': email,
+                    'phone': phone,
+                })
+
+    occupancy = {}
+    for rental_property_id, property_intervals in intervals.items():
+        occupied_days = covered_days(merge_intervals(property_intervals), period_start, period_end)
+        current_tenant = current.get(rental_property_id, (None, None))[1]
+        occupancy[rental_property_id] = {
+            'occupied_days': occupied_days,
+            'vacancy_days': total_days - occupied_days,
+            'total_days': total_days,
+            'occupancy_rate': occupied_days * 100 / total_days if total_days else 0,
+            'is_occupied': current_tenant is not None,
+            'current_tenant': current_tenant,
+        }
+    return occupancy
+
+
+def prefetch_current_leases(lookup='leases', today=None):
+    """
+    Prefetch the active lease covering today, for Tenant.current_lease.
+
+    Args:
+        lookup: Path to the tenant's leases, e.g. 'tenant__leases' from a Lease queryset
+        today: Reference day (defaults to today)
+    """
+    today = today or timezone.now().date()
+    return Prefetch(
+        lookup,
+        queryset=Lease.objects.filter(
+            status='active', start_date__lte=today, end_date__gte=today
+        ).select_related('rental_property__base_property'),
+        to_attr='current_leases',
+    )
+
+
+def overlapping_leases(period_start, period_end, statuses=BOOKING_LEASE_STATUSES):
+    """Leases in `statuses` whose inclusive date range overlaps [period_start, period_end]."""
+    return Lease.objects.filter(
+        status__in=statuses,
+        start_date__lte=period_end,
+        end_date__gte=period_start,
+    )
+
+
+def available_rental_properties(queryset, period_start, period_end):
+    """
+    Restrict a RentalProperty queryset to units free for the whole period.
+
+    A unit is free when it is available from period_start (or has no
+    available_from date) and no booking lease overlaps the period.
+    """
+    booked = overlapping_leases(period_start, period_end).filter(rental_property=OuterRef('pk'))
+    return queryset.filter(
+        Q(available_from__isnull=True) | Q(available_from__lte=period_start),
+        ~Exists(booked),
+    )
+
+
+def find_booking_conflict(rental_property, period_start, period_end, exclude_lease=None):
+    """
+    Return the first booking lease that overlaps the period on a unit, if any.
+
+    Args:
+        rental_property: RentalProperty instance or id
+        period_start: First day of the new booking
+        period_end: Last day of the new booking
+        exclude_lease: Lease (or id) being updated, ignored in the check
+    """
+    leases = overlapping_leases(period_start, period_end).filter(
+        rental_property=rental_property
+    )
+    if exclude_lease is not None:
+        leases = leases.exclude(pk=getattr(exclude_lease, 'pk', exclude_lease))
+    return leases.order_by('start_date').first()
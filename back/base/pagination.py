@@ -0,0 +1,24 @@
+from functools import partial
+
+from django.core.paginator import Paginator as DjangoPaginator
+from rest_framework.pagination import PageNumberPagination
+
+
+class CountedPaginator(DjangoPaginator):
+    """Django paginator that takes the row count when the caller already has it."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class StandardPagination(PageNumberPagination):
+    """Page number pagination that honours the page_size the frontend sends, within a cap."""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Views that already counted the queryset (conditional.py) spare the COUNT(*)
+        self.django_paginator_class = partial(CountedPaginator, count=getattr(view, 'list_count', None))
+        return super().paginate_queryset(queryset, request, view=view)
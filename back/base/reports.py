@@ -0,0 +1,178 @@
+"""
+Chunked report generation.
+
+Reports are generated by a background task. The report's properties are
+processed in chunks with one grouped query per chunk and metric. Progress is
+written to the Report row after every chunk, and generation_time is recorded
+when the report completes or fails. Completed reports are then exported to
+XLSX and PDF (see exporters.py), from rows rebuilt the same way chunk by
+chunk (iter_report_rows), so exports never load report_data.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .exporters import export_report_files
+from .models import Expense, MaintenanceRequest, Property, Report
+
+logger = logging.getLogger(__name__)
+
+# Number of properties aggregated per chunk
+REPORT_CHUNK_SIZE = 500
+
+
+def _chunks(ids, size):
+    for offset in range(0, len(ids), size):
+        yield ids[offset:offset + size]
+
+
+def _base_rows(property_ids):
+    """Basic property columns for a chunk, keyed by property id."""
+    rows = Property.objects.filter(id__in=property_ids).order_by('id').values_list(
+        'id', 'title', 'address', 'rental_info__monthly_rent'
+    )
+    return {
+        prop_id: {'id': prop_id, 'title': title, 'address': address, '_monthly_rent': monthly_rent}
+        for prop_id, title, address, monthly_rent in rows
+    }
+
+
+def financial_rows(property_ids, period_start, period_end):
+    """Expenses and rental income for a chunk of properties."""
+    rows = _base_rows(property_ids)
+    expenses = dict(
+        Expense.objects.filter(
+            expense_property__in=property_ids,
+            expense_date__range=[period_start, period_end],
+        ).order_by().values('expense_property').annotate(
+            total=Sum('total_amount')
+        ).values_list('expense_property', 'total')
+    )
+    for prop_id, row in rows.items():
+        monthly_rent = float(row.pop('_monthly_rent') or 0)
+        row.update({
+            'total_expenses': float(expenses.get(prop_id) or 0),
+            'monthly_rent': monthly_rent,
+            'annual_income': monthly_rent * 12,
+        })
+    return list(rows.values())
+
+
+def maintenance_rows(property_ids, period_start, period_end):
+    """Maintenance request counts and costs for a chunk of properties."""
+    rows = _base_rows(property_ids)
+    start = timezone.make_aware(datetime.combine(period_start, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(period_end + timedelta(days=1), datetime.min.time()))
+    stats = {
+        prop_id: (total, completed, pending, cost)
+        for prop_id, total, completed, pending, cost in MaintenanceRequest.objects.filter(
+            maintenance_property__in=property_ids,
+            reported_date__gte=start,
+            reported_date__lt=end,
+        ).order_by().values('maintenance_property').annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            pending=Count('id', filter=Q(status='pending')),
+            cost=Sum('actual_cost'),
+        ).values_list('maintenance_property', 'total', 'completed', 'pending', 'cost')
+    }
+    for prop_id, row in rows.items():
+        row.pop('_monthly_rent')
+        total, completed, pending, cost = stats.get(prop_id, (0, 0, 0, 0))
+        row.update({
+            'total_requests': total,
+            'completed_requests': completed,
+            'pending_requests': pending,
+            'total_maintenance_cost': float(cost or 0),
+        })
+    return list(rows.values())
+
+
+def basic_rows(property_ids, period_start, period_end):
+    """Property identity columns only (report types without extra metrics)."""
+    rows = _base_rows(property_ids)
+    for row in rows.values():
+        row.pop('_monthly_rent')
+    return list(rows.values())
+
+
+REPORT_ROW_BUILDERS = {
+    'financial': financial_rows,
+    'maintenance': maintenance_rows,
+}
+
+# Numeric row columns summed into report_data['summary'] per report type
+REPORT_SUMMARY_FIELDS = {
+    'financial': ['total_expenses', 'monthly_rent', 'annual_income'],
+    'maintenance': ['total_requests', 'completed_requests', 'pending_requests', 'total_maintenance_cost'],
+}
+
+
+def iter_report_rows(report, chunk_size=REPORT_CHUNK_SIZE):
+    """Yield the row dicts of a report, built one chunk of properties at a time."""
+    build_rows = REPORT_ROW_BUILDERS.get(report.report_type, basic_rows)
+    property_ids = list(report.properties.order_by('id').values_list('id', flat=True))
+    for chunk in _chunks(property_ids, chunk_size):
+        yield from build_rows(chunk, report.period_start, report.period_end)
+
+
+def generate_report(report_id, chunk_size=REPORT_CHUNK_SIZE):
+    """
+    Generate report_data for a Report row.
+
+    Args:
+        report_id: Primary key of the Report to fill
+        chunk_size: Number of properties aggregated per chunk
+
+    Returns:
+        Report: The updated report
+    """
+    report = Report.objects.get(pk=report_id)
+    started = timezone.now()
+    build_rows = REPORT_ROW_BUILDERS.get(report.report_type, basic_rows)
+    summary_fields = REPORT_SUMMARY_FIELDS.get(report.report_type, [])
+
+    try:
+        property_ids = list(report.properties.order_by('id').values_list('id', flat=True))
+        rows = []
+        summary = {field: 0 for field in summary_fields}
+        processed = 0
+
+        for chunk in _chunks(property_ids, chunk_size):
+            chunk_rows = build_rows(chunk, report.period_start, report.period_end)
+            for row in chunk_rows:
+                for field in summary_fields:
+                    summary[field] += row[field]
+            rows.extend(chunk_rows)
+
+            processed += len(chunk)
+            # Progress only reaches 100 once the report is saved as completed
+            Report.objects.filter(pk=report.pk).update(
+                progress=min(99, int(processed * 100 / len(property_ids)))
+            )
+
+        summary['properties_count'] = len(rows)
+        report.report_data = {
+            'properties': rows,
+            'summary': summary,
+            'period': {'start': report.period_start.isoformat(), 'end': report.period_end.isoformat()},
+        }
+        report.status = 'completed'
+        report.progress = 100
+        report.error_message = ''
+    except Exception as e:
+        logger.exception(f"Report {report.pk} generation failed: {e}")
+        report.status = 'failed'
+        report.error_message = str(e)
+
+    report.generation_time = timezone.now() - started
+    report.save(update_fields=[
+        'report_data', 'status', 'progress', 'error_message', 'generation_time', 'updated_at'
+    ])
+
+    if report.status == 'completed':
+        export_report_files(report)
+    return report
@@ -0,0 +1,199 @@
+"""
+Response cache for anonymous GETs on the public listing and detail views.
+
+AnonymousResponseCacheMixin serves a stored response from dispatch(), before
+authentication, permissions, throttling and the view run. Only requests
+without credentials are looked up (no Authorization header, no session
+cookie), and a response is only stored when every permission of the view is
+AllowAny, DRF resolved an anonymous user, the status is 200 and no cookie is
+set. Authenticated and personalized responses are never cached.
+
+Keys are built from the path, the sorted query parameters, the active
+language and the request origin (media URLs are absolute). The rendered
+bytes are stored with the version of each tag the response depends on:
+
+- lists: a model tag ('property', 'auction')
+- details: object tags ('property:12', 'auction:3', 'location:5')
+
+invalidate_tags() gives tags a new version once the transaction commits;
+entries stored under an older version are ignored. Versions are read once
+the request is authenticated, before the handler reads its data (object tags
+right after, once the objects are known), so a concurrent write leaves the
+entry under the old version.
+
+Property, auction and location saves and deletes invalidate their tags
+(connected in BaseConfig.ready), and media, room and bid writes invalidate
+the property or auction they belong to through
+fragments.touch_fragment_owner. Entries expire after RESPONSE_CACHE_TIMEOUT
+anyway, which bounds time-based fields (time_remaining) and counters
+updated with queryset.update() (view_count). Stored responses keep their
+ETag and Last-Modified, so hits answer conditional requests with 304 too.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import translation
+from rest_framework.permissions import AllowAny
+
+from accounts.metrics import RESPONSE_CACHE
+
+from .conditional import stored_not_modified
+
+RESPONSE_CACHE_TIMEOUT = 60
+RESPONSE_KEY_PREFIX = 'response:'
+TAG_KEY_PREFIX = 'response_tag:'
+CACHE_STATUS_HEADER = 'X-Response-Cache'
+
+
+def response_cache_enabled():
+    return getattr(settings, 'RESPONSE_CACHE_ENABLED', True)
+
+
+def is_anonymous_request(request):
+    """True when the request carries no credentials of any enabled authentication class."""
+    from accounts.profiling import profiling_requested
+
+    return (
+        request.method == 'GET'
+        and 'HTTP_AUTHORIZATION' not in request.META
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and not profiling_requested(request)
+    )
+
+
+def response_cache_key(request):
+    query = sorted((name, values) for name, values in request.GET.lists())
+    origin = f'{request.scheme}://{request.get_host()}'
+    raw = f'{origin}|{request.path}|{query!r}|{translation.get_language()}'
+    return RESPONSE_KEY_PREFIX + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _tag_key(tag):
+    return f'{TAG_KEY_PREFIX}{tag}'
+
+
+def tag_versions(tags):
+    """Current version of each tag, creating the missing ones."""
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        for key, version in missing.items():
+            # Another process may have created it in the meantime
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key)
+            found[key] = version
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def invalidate_tags(*tags):
+    """Ignore every stored response depending on one of these tags, once committed."""
+    if tags:
+        transaction.on_commit(
+            lambda: cache.set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+        )
+
+
+def invalidate_objects(model, pks):
+    """Invalidate the list tag of the model and the object tags of these rows."""
+    label = model._meta.model_name
+    invalidate_tags(label, *(f'{label}:{pk}' for pk in pks))
+
+
+def cached_response(key):
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if cache.get_many([_tag_key(tag) for tag in entry['tags']]) != {
+        _tag_key(tag): version for tag, version in entry['tags'].items()
+    }:
+        return None
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    return response
+
+
+def store_response(key, response, versions):
+    entry = {
+        'content': response.content,
+        'status': response.status_code,
+        'headers': list(response.items()),
+        'tags': versions,
+    }
+    cache.set(key, entry, RESPONSE_CACHE_TIMEOUT)
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Cache the rendered responses of anonymous GETs (see the module docstring).
+
+    response_cache_tags: tags of every response of the view; detail views add
+    the tags of the object they loaded (self.object, see
+    ConditionalGetMixin.retrieve) by overriding response_cache_object_tags.
+    The rendered data may be a sparse fieldset (fieldsets.py), so tags are
+    never read from it.
+    """
+
+    response_cache_tags = ()
+
+    def response_cache_object_tags(self, instance):
+        return []
+
+    def response_cache_hit(self, request, *args, **kwargs):
+        """Side effects the view still owes a request answered from the cache."""
+
+    def is_public(self):
+        return all(isinstance(permission, AllowAny) for permission in self.get_permissions())
+
+    def dispatch(self, request, *args, **kwargs):
+        if not (response_cache_enabled() and is_anonymous_request(request)):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = response_cache_key(request)
+        response = cached_response(key)
+        if response is not None:
+            RESPONSE_CACHE.labels('hit').inc()
+            self.response_cache_hit(request, *args, **kwargs)
+            response = stored_not_modified(request, response) or response
+            response[CACHE_STATUS_HEADER] = 'HIT'
+            return response
+
+        self._response_cache_versions = None
+        response = super().dispatch(request, *args, **kwargs)
+        versions = self._response_cache_versions
+        if versions is not None and response.status_code == 200 and not response.cookies:
+            RESPONSE_CACHE.labels('miss').inc()
+            instance = getattr(self, 'object', None)
+            if instance is not None:
+                versions.update(tag_versions(self.response_cache_object_tags(instance)))
+            response.add_post_render_callback(lambda rendered: store_response(key, rendered, versions))
+            response[CACHE_STATUS_HEADER] = 'MISS'
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Authenticated now, and the handler has not read anything yet
+        if (
+            getattr(self, '_response_cache_versions', False) is None
+            and not request.user.is_authenticated and self.is_public()
+        ):
+            self._response_cache_versions = tag_versions(self.response_cache_tags)
+
+
+def property_changed(sender, instance, **kwargs):
+    # Auction lists embed their property
+    invalidate_tags('property', f'property:{instance.pk}', 'auction')
+
+
+def auction_changed(sender, instance, **kwargs):
+    invalidate_tags('auction', f'auction:{instance.pk}')
+
+
+def location_changed(sender, instance, **kwargs):
+    invalidate_tags('property', 'auction', f'location:{instance.pk}')
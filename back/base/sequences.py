@@ -0,0 +1,193 @@
+"""
+Sequence allocator for business numbers (lease, worker, property, payment).
+
+Every number series has a row in the Sequence counter table, keyed by its
+prefix (e.g. "LSE-2025"). Numbers are reserved by incrementing that row under
+a row lock, so allocation never scans the numbered table and never collides.
+
+To keep the counter row from becoming a hot spot, each process reserves a
+block of SEQUENCE_BLOCK_SIZE numbers and hands them out from memory:
+
+- A block reserved inside a transaction is only shared with other
+  transactions once that transaction commits. Until then its rest is kept
+  for the reserving thread, so later numbers of the same transaction come
+  from it instead of reserving (and locking) more blocks. If the transaction,
+  or the savepoint the block was reserved in, rolls back, the counter rolls
+  back too and the rest is dropped.
+- Committed blocks queue up per series, so a block committed while another
+  still has numbers left does not replace it.
+- Blocks are tied to the process id, so forked workers never share a block.
+- Numbers left in a block when a process exits are skipped. With
+  SEQUENCE_BLOCK_SIZE = 1 every number is reserved in the caller's
+  transaction and numbering is gap-free.
+
+Import jobs can reserve a contiguous range at once with
+NumberSeries.allocate(count).
+"""
+
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Sequence
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_BLOCK_SIZE = getattr(settings, 'SEQUENCE_BLOCK_SIZE', 20)
+
+# {sequence name: (pid, [iterators over committed blocks])}
+_blocks = {}
+_blocks_lock = threading.Lock()
+# Per thread: {sequence name: _PendingBlock reserved by the open transaction}
+_pending = threading.local()
+
+
+def reserve(name, count, seed=None):
+    """
+    Reserve `count` consecutive values of a sequence.
+
+    Args:
+        name: Sequence name (the number prefix)
+        count: Number of values to reserve
+        seed: Optional callable returning the last value already in use; only
+            called when the sequence row is created
+
+    Returns:
+        range: The reserved values
+    """
+    with transaction.atomic():
+        sequence = Sequence.objects.select_for_update().filter(name=name).first()
+        if sequence is None:
+            Sequence.objects.get_or_create(name=name, defaults={'last_value': seed() if seed else 0})
+            sequence = Sequence.objects.select_for_update().get(name=name)
+
+        start = sequence.last_value + 1
+        sequence.last_value += count
+        sequence.save(update_fields=['last_value', 'updated_at'])
+    return range(start, start + count)
+
+
+def _store_block(name, values):
+    with _blocks_lock:
+        pid, blocks = _blocks.get(name, (None, []))
+        if pid != os.getpid():
+            blocks = []
+        blocks.append(values)
+        _blocks[name] = (os.getpid(), blocks)
+
+
+def _committed_value(name):
+    with _blocks_lock:
+        pid, blocks = _blocks.get(name, (None, []))
+        if pid != os.getpid():
+            return None
+        while blocks:
+            value = next(blocks[0], None)
+            if value is not None:
+                return value
+            blocks.pop(0)
+    return None
+
+
+class _PendingBlock:
+    """The rest of a block reserved in the open transaction; its on_commit callback."""
+
+    def __init__(self, name, values):
+        self.name = name
+        self.values = iter(values)
+
+    def __call__(self):
+        _store_block(self.name, self.values)
+
+    def usable(self, connection):
+        # Still registered: the transaction is open and the savepoint the
+        # block was reserved in has not been rolled back
+        return any(func is self for _, func, _ in connection.run_on_commit)
+
+
+def _pending_value(name):
+    pending = getattr(_pending, 'blocks', {}).get(name)
+    if pending is None:
+        return None
+    if not pending.usable(transaction.get_connection()):
+        del _pending.blocks[name]
+        return None
+    return next(pending.values, None)
+
+
+def next_value(name, seed=None, block_size=None):
+    """Return the next value of a sequence, reserving a new block when needed."""
+    value = _committed_value(name)
+    if value is None:
+        value = _pending_value(name)
+    if value is not None:
+        return value
+
+    values = reserve(name, block_size or SEQUENCE_BLOCK_SIZE, seed)
+    if len(values) > 1:
+        pending = _PendingBlock(name, values[1:])
+        # Shared only once the reservation is durable; runs at once outside a transaction
+        transaction.on_commit(pending)
+        if transaction.get_connection().in_atomic_block:
+            if not hasattr(_pending, 'blocks'):
+                _pending.blocks = {}
+            _pending.blocks[name] = pending
+    return values[0]
+
+
+def max_existing_value(model, field, prefix):
+    """
+    Return the highest counter already used in `<prefix>-<counter>` values of a field.
+
+    Used once per series, when its Sequence row is first created, so that
+    numbers issued before the counter table existed are not reissued.
+    """
+    values = model._default_manager.filter(
+        **{f'{field}__startswith': f'{prefix}-'}
+    ).values_list(field, flat=True)
+
+    last_value = 0
+    for value in values.iterator():
+        try:
+            last_value = max(last_value, int(value[len(prefix) + 1:]))
+        except ValueError:
+            continue
+    return last_value
+
+
+class NumberSeries:
+    """
+    A series of formatted business numbers: "<prefix>-<zero padded counter>".
+
+    Usage:
+        series = NumberSeries('LSE-2025', width=5, model=Lease, field='lease_number')
+        series.next()         # 'LSE-2025-00042'
+        series.allocate(500)  # 500 consecutive numbers for a bulk import
+    """
+
+    def __init__(self, prefix, width, model=None, field=None):
+        self.prefix = prefix
+        self.width = width
+        self.model = model
+        self.field = field
+
+    def _seed(self):
+        if self.model is None:
+            return 0
+        return max_existing_value(self.model, self.field, self.prefix)
+
+    def format(self, value):
+        return f"{self.prefix}-{value:0{self.width}d}"
+
+    def next(self):
+        """Return the next number of the series."""
+        return self.format(next_value(self.prefix, seed=self._seed))
+
+    def allocate(self, count):
+        """Reserve `count` consecutive numbers (bypasses the per-process block)."""
+        if count <= 0:
+            return []
+        return [self.format(value) for value in reserve(self.prefix, count, seed=self._seed)]
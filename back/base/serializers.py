@@ -1,10 +1,13 @@
 # back/base/serializers.py
 from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
-from django.db import transaction
+from django.db import models, transaction
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
 from .models import *
+from .occupancy import BOOKING_LEASE_STATUSES, compute_occupancy, find_booking_conflict
+from .fieldsets import SparseFieldsetMixin
+from .fragments import FragmentCacheMixin, FragmentListSerializer
 
 import json, logging
 from django.utils import timezone
@@ -208,10 +211,27 @@ class MediaSerializer(serializers.ModelSerializer):
             logger.error(f"Error creating media: {str(e)}", exc_info=True)
             raise
 
+def media_prefetch(lookup='media'):
+    """Prefetch media with the content type MediaSerializer reads for each item"""
+    return models.Prefetch(lookup, queryset=Media.objects.select_related('content_type'))
+
+
+def property_prefetch(prefix=''):
+    """Everything PropertySerializer reads beyond the property row itself"""
+    return [media_prefetch(f'{prefix}media'), f'{prefix}rooms', media_prefetch(f'{prefix}rooms__media')]
+
+
+def auction_prefetch():
+    """Everything AuctionSerializer reads, including its nested property and bids"""
+    return [media_prefetch(), 'bids__bidder', *property_prefetch('related_property__')]
+
 # Continue with the rest of the serializers without print statements...
-class RoomSerializer(serializers.ModelSerializer):
+class RoomSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     room_type_display = serializers.CharField(source='get_room_type_display', read_only=True)
     media = serializers.SerializerMethodField()
+
+    expandable_fields = ('media',)
+    field_relations = {'media': ('media',)}
     
     class Meta:
         model = Room
@@ -219,10 +239,10 @@ class RoomSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
         
     def get_media(self, obj):
-        media_items = Media.objects.filter(content_type__model='room', object_id=obj.id)
-        return MediaSerializer(media_items, many=True, context=self.context).data
+        # .all() reads the prefetched media when the view prefetches them
+        return MediaSerializer(obj.media.all(), many=True, context=self.context).data
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(SparseFieldsetMixin, FragmentCacheMixin, serializers.ModelSerializer):
     property_type_display = serializers.CharField(source='get_property_type_display', read_only=True)
     building_type_display = serializers.CharField(source='get_building_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -233,17 +253,25 @@ class PropertySerializer(serializers.ModelSerializer):
     media = serializers.SerializerMethodField()
     main_image = serializers.SerializerMethodField()
 
+    # Cached per property version (see fragments.py); the other fields come from the row
+    fragment_fields = ('media', 'main_image', 'rooms')
+    fragment_prefetch = property_prefetch()
+    expandable_fields = ('media', 'rooms')
+    field_relations = {'location': ('location',), 'media': ('media',), 'main_image': ('media',), 'rooms': ('rooms',)}
+
     class Meta:
         model = Property
         fields = '__all__'
         read_only_fields = ['property_number', 'slug', 'owner', 'is_verified', 'view_count', 'created_at', 'updated_at']
+        list_serializer_class = FragmentListSerializer
 
     def get_media(self, obj):
-        media_items = Media.objects.filter(content_type__model='property', object_id=obj.id)
-        return MediaSerializer(media_items, many=True, context=self.context).data
+        return MediaSerializer(obj.media.all(), many=True, context=self.context).data
 
     def get_main_image(self, obj):
-        image = obj.get_main_image()
+        # Same rule as Property.get_main_image, applied to the (prefetched) media
+        images = [item for item in obj.media.all() if item.media_type == 'image' and not item.is_deleted]
+        image = next((item for item in images if item.is_primary), images[0] if images else None)
         return MediaSerializer(image, context=self.context).data if image else None
 
     def validate(self, data):
@@ -277,12 +305,21 @@ class PropertySerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
 
-class BidSerializer(serializers.ModelSerializer):
+class PropertyBriefSerializer(serializers.ModelSerializer):
+    location = LocationSerializer(read_only=True)
+
+    class Meta:
+        model = Property
+        fields = ['id', 'property_number', 'title', 'slug', 'property_type', 'address', 'location', 'market_value']
+
+class BidSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     bidder_info = serializers.SerializerMethodField()
     user_display_name = serializers.SerializerMethodField()  # Add this field
     auction_info = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
 
+    field_relations = {'bidder_info': ('bidder',), 'user_display_name': ('bidder',), 'auction_info': ('auction',)}
+
     class Meta:
         model = Bid
         fields = [
@@ -362,7 +399,7 @@ class BidSerializer(serializers.ModelSerializer):
         return value
 
         
-class AuctionSerializer(serializers.ModelSerializer):
+class AuctionSerializer(SparseFieldsetMixin, FragmentCacheMixin, serializers.ModelSerializer):
     auction_type_display = serializers.CharField(source='get_auction_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
@@ -376,6 +413,13 @@ class AuctionSerializer(serializers.ModelSerializer):
     time_remaining = serializers.SerializerMethodField()
     is_active = serializers.SerializerMethodField()
 
+    # The nested property is cached with the auction, so its version is part of the key
+    fragment_fields = ('media', 'bids', 'related_property')
+    fragment_dependencies = ('related_property', 'related_property__location')
+    fragment_prefetch = auction_prefetch()
+    expandable_fields = ('related_property', 'bids', 'media')
+    field_relations = {'related_property': ('related_property',), 'bids': ('bids',), 'media': ('media',)}
+
     class Meta:
         model = Auction
         fields = [
@@ -386,10 +430,10 @@ class AuctionSerializer(serializers.ModelSerializer):
             'view_count', 'media', 'bids', 'time_remaining', 'is_active', 'bid_count', 'created_at'
         ]
         read_only_fields = ['slug', 'current_bid', 'bid_count', 'view_count', 'created_at', 'updated_at']
+        list_serializer_class = FragmentListSerializer
 
     def get_media(self, obj):
-        media_items = Media.objects.filter(content_type__model='auction', object_id=obj.id)
-        return MediaSerializer(media_items, many=True, context=self.context).data
+        return MediaSerializer(obj.media.all(), many=True, context=self.context).data
 
     def get_time_remaining(self, obj):
         return obj.time_remaining
@@ -666,38 +710,57 @@ class RecentActivitySerializer(serializers.Serializer):
 # Property Management Serializers
 # -------------------------------------------------------------------------
 
-class RentalPropertySerializer(serializers.ModelSerializer):
+class RentalPropertyListSerializer(serializers.ListSerializer):
+    """Computes occupancy for the whole page at once (see occupancy.py)"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if any(name in self.child.fields for name in RentalPropertySerializer.occupancy_fields):
+            self.context['occupancy'] = compute_occupancy(items)
+        return super().to_representation(items)
+
+
+class RentalPropertySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for rental property management"""
-    property_details = PropertySerializer(source='property', read_only=True)
+    property_details = PropertyBriefSerializer(source='base_property', read_only=True)
     current_tenant = serializers.SerializerMethodField()
     occupancy_rate = serializers.SerializerMethodField()
+    vacancy_days = serializers.SerializerMethodField()
     annual_income = serializers.SerializerMethodField()
     is_occupied = serializers.SerializerMethodField()
+
+    # Read from the page-wide occupancy batch, computed only when one of them is rendered
+    occupancy_fields = ('current_tenant', 'occupancy_rate', 'vacancy_days', 'is_occupied')
+    expandable_fields = ('property_details',)
+    field_relations = {'property_details': ('base_property',)}
     
     class Meta:
         model = RentalProperty
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at', 'total_rental_income']
+        list_serializer_class = RentalPropertyListSerializer
+
+    def get_occupancy(self, obj):
+        """Occupancy of obj, from the page-wide batch when serializing a list"""
+        occupancy = self.context.setdefault('occupancy', {})
+        if obj.pk not in occupancy:
+            occupancy.update(compute_occupancy([obj]))
+        return occupancy[obj.pk]
         
     def get_current_tenant(self, obj):
-        tenant = obj.current_tenant
-        if tenant:
-            return {
-                'id': tenant.id,
-                'full_name': tenant.full_name,
-                'email': tenant.email,
-                'phone': tenant.phone,
-            }
-        return None
+        return self.get_occupancy(obj)['current_tenant']
         
     def get_occupancy_rate(self, obj):
-        return round(obj.occupancy_rate, 2)
+        return round(self.get_occupancy(obj)['occupancy_rate'], 2)
+
+    def get_vacancy_days(self, obj):
+        return self.get_occupancy(obj)['vacancy_days']
         
     def get_annual_income(self, obj):
         return obj.calculate_annual_income()
         
     def get_is_occupied(self, obj):
-        return obj.is_occupied
+        return self.get_occupancy(obj)['is_occupied']
 
     def validate(self, attrs):
         """Validate rental property data"""
@@ -715,12 +778,14 @@ class RentalPropertySerializer(serializers.ModelSerializer):
         return attrs
 
 
-class TenantSerializer(serializers.ModelSerializer):
+class TenantSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for tenant management"""
     full_name = serializers.SerializerMethodField()
     current_property = serializers.SerializerMethodField()
     current_lease = serializers.SerializerMethodField()
     user_email = serializers.CharField(source='user.email', read_only=True)
+
+    field_relations = {'current_property': ('leases',), 'current_lease': ('leases',), 'user_email': ('user',)}
     
     class Meta:
         model = Tenant
@@ -774,7 +839,7 @@ class TenantSerializer(serializers.ModelSerializer):
         return value
 
 
-class LeaseSerializer(serializers.ModelSerializer):
+class LeaseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for lease agreements"""
     tenant_details = TenantSerializer(source='tenant', read_only=True)
     property_details = serializers.SerializerMethodField()
@@ -782,6 +847,9 @@ class LeaseSerializer(serializers.ModelSerializer):
     total_rent_amount = serializers.SerializerMethodField()
     is_active = serializers.SerializerMethodField()
     days_remaining = serializers.SerializerMethodField()
+
+    expandable_fields = ('tenant_details', 'property_details')
+    field_relations = {'tenant_details': ('tenant',), 'property_details': ('rental_property',)}
     
     class Meta:
         model = Lease
@@ -791,9 +859,9 @@ class LeaseSerializer(serializers.ModelSerializer):
     def get_property_details(self, obj):
         if obj.rental_property:
             return {
-                'id': obj.rental_property.property.id,
-                'title': obj.rental_property.property.title,
-                'address': obj.rental_property.property.address,
+                'id': obj.rental_property.base_property.id,
+                'title': obj.rental_property.base_property.title,
+                'address': obj.rental_property.base_property.address,
                 'rental_id': obj.rental_property.id,
             }
         return None
@@ -822,9 +890,41 @@ class LeaseSerializer(serializers.ModelSerializer):
         monthly_rent = attrs.get('monthly_rent', 0)
         if monthly_rent <= 0:
             raise serializers.ValidationError("Monthly rent must be greater than zero")
-            
+
+        self.check_double_booking(attrs)
         return attrs
 
+    def check_double_booking(self, attrs, lock=False):
+        """Reject an active lease that overlaps another active lease on the same unit"""
+        def value(field):
+            return attrs.get(field, getattr(self.instance, field, None))
+
+        lease_status = value('status') or Lease._meta.get_field('status').default
+        rental_property, start_date, end_date = value('rental_property'), value('start_date'), value('end_date')
+        if lease_status not in BOOKING_LEASE_STATUSES or not (rental_property and start_date and end_date):
+            return
+
+        if lock:
+            # Serializes concurrent bookings of the same unit until commit
+            RentalProperty.objects.select_for_update().get(pk=rental_property.pk)
+
+        conflict = find_booking_conflict(rental_property, start_date, end_date, exclude_lease=self.instance)
+        if conflict:
+            raise serializers.ValidationError(
+                f"Unit is already leased from {conflict.start_date} to {conflict.end_date} "
+                f"(lease {conflict.lease_number})"
+            )
+
+    @transaction.atomic
+    def create(self, validated_data):
+        self.check_double_booking(validated_data, lock=True)
+        return super().create(validated_data)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        self.check_double_booking(validated_data, lock=True)
+        return super().update(instance, validated_data)
+
 
 class MaintenanceCategorySerializer(serializers.ModelSerializer):
     """Serializer for maintenance categories"""
@@ -836,10 +936,13 @@ class MaintenanceCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
         
     def get_request_count(self, obj):
+        # Annotated by the list views; counted per object otherwise
+        if hasattr(obj, 'request_count'):
+            return obj.request_count
         return obj.requests.count()
 
 
-class MaintenanceRequestSerializer(serializers.ModelSerializer):
+class MaintenanceRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for maintenance requests"""
     property_details = serializers.SerializerMethodField()
     category_details = MaintenanceCategorySerializer(source='category', read_only=True)
@@ -848,6 +951,12 @@ class MaintenanceRequestSerializer(serializers.ModelSerializer):
     is_overdue = serializers.SerializerMethodField()
     duration_days = serializers.SerializerMethodField()
     cost_variance = serializers.SerializerMethodField()
+
+    expandable_fields = ('property_details', 'category_details')
+    field_relations = {
+        'property_details': ('maintenance_property',), 'category_details': ('category',),
+        'requested_by_name': ('requested_by',), 'assigned_to_name': ('assigned_to',),
+    }
     
     class Meta:
         model = MaintenanceRequest
@@ -856,10 +965,10 @@ class MaintenanceRequestSerializer(serializers.ModelSerializer):
         
     def get_property_details(self, obj):
         return {
-            'id': obj.property.id,
-            'title': obj.property.title,
-            'address': obj.property.address,
-        } if obj.property else None
+            'id': obj.maintenance_property.id,
+            'title': obj.maintenance_property.title,
+            'address': obj.maintenance_property.address,
+        } if obj.maintenance_property else None
         
     def get_requested_by_name(self, obj):
         if obj.requested_by:
@@ -909,13 +1018,17 @@ class ExpenseCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
         
     def get_expense_count(self, obj):
+        if hasattr(obj, 'expense_count'):
+            return obj.expense_count
         return obj.expenses.count()
         
     def get_total_amount(self, obj):
+        if hasattr(obj, 'expense_total'):
+            return obj.expense_total or 0
         return obj.expenses.aggregate(total=Sum('total_amount'))['total'] or 0
 
 
-class ExpenseSerializer(serializers.ModelSerializer):
+class ExpenseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for expense management"""
     property_details = serializers.SerializerMethodField()
     category_details = ExpenseCategorySerializer(source='category', read_only=True)
@@ -923,6 +1036,12 @@ class ExpenseSerializer(serializers.ModelSerializer):
     approved_by_name = serializers.SerializerMethodField()
     is_overdue = serializers.SerializerMethodField()
     days_until_due = serializers.SerializerMethodField()
+
+    expandable_fields = ('property_details', 'category_details')
+    field_relations = {
+        'property_details': ('expense_property',), 'category_details': ('category',),
+        'created_by_name': ('created_by',), 'approved_by_name': ('approved_by',),
+    }
     
     class Meta:
         model = Expense
@@ -931,10 +1050,10 @@ class ExpenseSerializer(serializers.ModelSerializer):
         
     def get_property_details(self, obj):
         return {
-            'id': obj.property.id,
-            'title': obj.property.title,
-            'address': obj.property.address,
-        } if obj.property else None
+            'id': obj.expense_property.id,
+            'title': obj.expense_property.title,
+            'address': obj.expense_property.address,
+        } if obj.expense_property else None
         
     def get_created_by_name(self, obj):
         if obj.created_by:
@@ -987,7 +1106,7 @@ class ReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Report
         fields = '__all__'
-        read_only_fields = ['created_at', 'updated_at', 'generation_time']
+        read_only_fields = ['created_at', 'updated_at', 'generation_time', 'progress']
         
     def get_generated_by_name(self, obj):
         if obj.generated_by:
@@ -995,6 +1114,8 @@ class ReportSerializer(serializers.ModelSerializer):
         return None
         
     def get_properties_count(self, obj):
+        if hasattr(obj, 'properties_count'):
+            return obj.properties_count
         return obj.properties.count()
 
 
@@ -1002,6 +1123,19 @@ class ReportSerializer(serializers.ModelSerializer):
 # Dashboard Serializers for Property Management
 # -------------------------------------------------------------------------
 
+# Maintenance statuses counted as overdue once past their due date
+OPEN_MAINTENANCE_STATUSES = ['pending', 'assigned', 'in_progress']
+
+class PropertyDashboardListSerializer(serializers.ListSerializer):
+    """Computes occupancy for the rental units of the whole page at once"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        rentals = [item.rental_info for item in items if hasattr(item, 'rental_info')]
+        self.context['occupancy'] = compute_occupancy(rentals)
+        return super().to_representation(items)
+
+
 class PropertyDashboardSerializer(serializers.ModelSerializer):
     """Comprehensive dashboard serializer for properties with rental and maintenance info"""
     rental_info = serializers.SerializerMethodField()
@@ -1019,23 +1153,35 @@ class PropertyDashboardSerializer(serializers.ModelSerializer):
             'is_published', 'is_featured', 'is_verified', 'view_count', 'created_at',
             'days_since_created', 'rental_info', 'maintenance_status'
         ]
+        list_serializer_class = PropertyDashboardListSerializer
         
     def get_rental_info(self, obj):
         if hasattr(obj, 'rental_info'):
             rental = obj.rental_info
+            occupancy = self.context.setdefault('occupancy', {})
+            if rental.pk not in occupancy:
+                occupancy.update(compute_occupancy([rental]))
+            current_tenant = occupancy[rental.pk]['current_tenant']
             return {
                 'rental_status': rental.rental_status,
                 'monthly_rent': float(rental.monthly_rent),
-                'is_occupied': rental.is_occupied,
-                'current_tenant': rental.current_tenant.full_name if rental.current_tenant else None,
+                'is_occupied': occupancy[rental.pk]['is_occupied'],
+                'current_tenant': current_tenant['full_name'] if current_tenant else None,
             }
         return None
         
     def get_maintenance_status(self, obj):
+        # Annotated by DashboardPropertiesView; counted per object otherwise
+        if hasattr(obj, 'pending_requests'):
+            return {
+                'pending_requests': obj.pending_requests,
+                'overdue_requests': obj.overdue_requests,
+            }
+
         pending_requests = obj.maintenance_requests.filter(status='pending').count()
         overdue_requests = obj.maintenance_requests.filter(
             due_date__lt=timezone.now(),
-            status__in=['pending', 'assigned', 'in_progress']
+            status__in=OPEN_MAINTENANCE_STATUSES
         ).count()
         
         return {
@@ -1087,7 +1233,7 @@ class TenantDashboardSerializer(serializers.ModelSerializer):
 
 class MaintenanceDashboardSerializer(serializers.ModelSerializer):
     """Dashboard serializer for maintenance requests"""
-    property_title = serializers.CharField(source='property.title')
+    property_title = serializers.CharField(source='maintenance_property.title')
     category_name = serializers.CharField(source='category.name')
     days_since_reported = serializers.SerializerMethodField()
     
@@ -1115,6 +1261,8 @@ class WorkerCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_worker_count(self, obj):
+        if hasattr(obj, 'active_worker_count'):
+            return obj.active_worker_count
         return obj.workers.filter(status='active').count()
 
 class WorkerSerializer(serializers.ModelSerializer):
@@ -1181,7 +1329,7 @@ class PropertyManagementCompanySerializer(serializers.ModelSerializer):
 
 class WorkerPropertyAssignmentSerializer(serializers.ModelSerializer):
     worker_name = serializers.CharField(source='worker.full_name', read_only=True)
-    property_title = serializers.CharField(source='property.title', read_only=True)
+    property_title = serializers.CharField(source='assigned_property.title', read_only=True)
     
     class Meta:
         model = WorkerPropertyAssignment
@@ -5,4 +5,60 @@ from django.core.management import call_command
 def update_auction_statuses():
     """Periodic task to update auction statuses"""
     call_command('update_auction_statuses')
-    return "Auction statuses updated"
\ No newline at end of file
+    return "Auction statuses updated"
+
+# Also queued by the analytics views (analytics.queue_analytics_refresh)
+@shared_task(ignore_result=True)
+def refresh_property_analytics():
+    """Periodic task to recompute analytics for properties with changed data"""
+    from .analytics import refresh_property_analytics as refresh
+    written = refresh()
+    return f"Materialized analytics for {written} properties"
+
+
+@shared_task
+def materialize_property_analytics_chunk(property_ids):
+    """Recompute analytics for one chunk of properties"""
+    from .analytics import analytics_period, materialize_property_analytics
+    period_start, period_end = analytics_period()
+    return materialize_property_analytics(property_ids, period_start, period_end)
+
+
+@shared_task
+def rebuild_property_analytics(chunk_size=1000):
+    """Full rebuild: fan chunks of properties out to the workers"""
+    from celery import group
+    from .models import Property
+    property_ids = list(Property.objects.order_by('id').values_list('id', flat=True))
+    chunks = [property_ids[i:i + chunk_size] for i in range(0, len(property_ids), chunk_size)]
+    group(materialize_property_analytics_chunk.s(chunk) for chunk in chunks).apply_async()
+    return f"Queued {len(chunks)} analytics chunks"
+
+
+# Progress and outcome live on the Report row; no result means .delay() never
+# subscribes to the result backend from the request
+@shared_task(ignore_result=True)
+def generate_report(report_id):
+    """Generate report data in chunks, tracking progress on the Report row"""
+    from .reports import generate_report as build_report
+    report = build_report(report_id)
+    return f"Report {report.pk} {report.status}"
+
+
+@shared_task(ignore_result=True)
+def process_media(media_ids):
+    """Optimize images created without inline processing (e.g. bulk imports)"""
+    import logging
+    from .models import Media
+    from .utils import process_property_media
+
+    logger = logging.getLogger(__name__)
+    processed = 0
+    for media in Media.objects.filter(pk__in=media_ids, media_type='image'):
+        try:
+            media.file.save(media.file.name, process_property_media(media.file), save=False)
+            media.save(update_fields=['file', 'updated_at'])
+            processed += 1
+        except Exception as e:
+            logger.error(f"Error processing media {media.pk}: {e}")
+    return f"Processed {processed} of {len(media_ids)} media"
@@ -1,3 +1,384 @@
+"""
+Query budget tests for the API endpoints.
+
+Every list endpoint is requested with page_size=1 and page_size=50; the two
+requests must run the same number of queries, so a serializer that queries
+per row (an N+1) fails here instead of in production. Every list and detail
+endpoint must also stay within the budget declared for it in QUERY_BUDGETS.
+
+On failure, the SQL statements that repeat are printed, with literal values
+replaced by '?' so that the per-row copies of one query are grouped together.
+
+AnalyticsInvalidationTests check that deletes which skip Model.delete()
+(cascades, QuerySet.delete()) still invalidate materialized analytics.
+"""
+
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection, reset_queries
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .analytics import refresh_property_analytics
+from .datasets import DatasetGenerator
+from .models import (
+    Auction, BankAccount, Bid, Expense, ExpenseCategory, Lease, Location, MaintenanceCategory,
+    MaintenanceRequest, Media, Message, Payment, Property, PropertyAnalytics, PropertyMaintenanceWorkflow,
+    RentalProperty, Report, Room, Tenant, Worker, WorkerCategory, WorkerPropertyAssignment,
+)
+
+User = get_user_model()
+
+# Rows created per model, above the largest page size requested
+FIXTURE_ROWS = 60
+PAGE_SIZES = (1, 50)
+
+# (url name, fixture attribute holding the object of a detail url or None for lists, max queries)
+#
+# Requests run with an empty cache: properties and auctions include the
+# fragment cache lookup and the upsert storing the fragments (fragments.py),
+# and, as force_authenticate sends no credentials, the response cache lookup
+# (response_cache.py).
+#
+# management-companies is left out: PropertyManagementCompany.total_properties
+# reads a company -> property relation the models do not have yet.
+QUERY_BUDGETS = (
+    ('locations', None, 8),
+    ('location', 'location', 7),
+    ('media', None, 8),
+    ('media-detail', 'media', 7),
+    ('properties', None, 15),
+    ('property', 'property', 16),
+    ('property-by-slug', 'property', 16),
+    ('rooms', None, 9),
+    ('room', 'room', 8),
+    ('auctions', None, 19),
+    ('auction', 'auction', 19),
+    ('auction-by-slug', 'auction', 19),
+    ('bids', None, 8),
+    ('bid', 'bid', 7),
+    ('messages', None, 8),
+    ('message-detail', 'message', 7),
+    ('dashboard-properties', None, 9),
+    ('dashboard-auctions', None, 8),
+    ('dashboard-bids', None, 8),
+    ('rental-properties', None, 9),
+    ('rental-property', 'rental_property', 8),
+    ('tenants', None, 9),
+    ('tenant', 'tenant', 8),
+    ('leases', None, 9),
+    ('lease', 'lease', 8),
+    ('maintenance-categories', None, 8),
+    ('maintenance-category', 'maintenance_category', 7),
+    ('maintenance-requests', None, 9),
+    ('maintenance-request', 'maintenance_request', 8),
+    ('expense-categories', None, 8),
+    ('expense-category', 'expense_category', 7),
+    ('expenses', None, 9),
+    ('expense', 'expense', 8),
+    ('reports', None, 9),
+    ('report', 'report', 8),
+    ('worker-categories', None, 8),
+    ('worker-category', 'worker_category', 7),
+    ('workers', None, 10),
+    ('worker', 'worker', 9),
+    ('worker-assignments', None, 8),
+    ('worker-assignment', 'worker_assignment', 7),
+    ('maintenance-workflows', None, 9),
+    ('maintenance-workflow', 'workflow', 8),
+    ('bank-accounts', None, 7),
+    ('bank-account', 'bank_account', 7),
+    ('payments', None, 7),
+    ('payment', 'payment', 8),
+)
+
+LITERAL_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)'), '(?, ...)'),
+)
+
+
+def normalize_sql(sql):
+    """Replace literal values so that the same query with other parameters compares equal."""
+    for pattern, replacement in LITERAL_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def repeated_queries(queries, baseline=()):
+    """
+    Describe the statements of `queries` that run more often than in `baseline`
+    (or more than once, without a baseline), most repeated first. When none
+    repeat, every statement is listed.
+    """
+    counts = Counter(normalize_sql(query['sql']) for query in queries)
+    expected = Counter(normalize_sql(query['sql']) for query in baseline)
+    lines = []
+    for sql, count in counts.most_common():
+        if count > max(expected[sql], 1):
+            lines.append(f"  {count}x (was {expected[sql]}x): {sql}" if baseline else f"  {count}x: {sql}")
+    if not lines:
+        # Nothing repeats: the budget was exceeded by distinct statements, so list them all
+        lines = ['  (no repeated statements)'] + [f"  {sql}" for sql in counts]
+    return '\n'.join(lines)
+
+
+class QueryBudgetTests(TestCase):
+    """List query counts must not grow with page size, and every endpoint stays within budget."""
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetGenerator({
+            'users': 20, 'properties': 240, 'auctions': FIXTURE_ROWS, 'bids': 240, 'leases': 240,
+            'expenses': FIXTURE_ROWS, 'payments': FIXTURE_ROWS * 2, 'messages': 0,
+        }, seed=40).run()
+        cls.admin = User.objects.create_superuser(email='budget-admin@example.sa', password=None)
+        other = User.objects.exclude(pk=cls.admin.pk).order_by('pk').first()
+        now = timezone.now()
+        today = now.date()
+
+        properties = list(Property.objects.order_by('pk'))
+        auctions = list(Auction.objects.order_by('pk'))
+        rooms = Room.objects.bulk_create([
+            Room(property=property_obj, name='غرفة النوم', room_type='bedroom') for property_obj in properties
+        ])
+        for model, objects in ((Property, properties), (Auction, auctions), (Room, rooms)):
+            content_type = ContentType.objects.get_for_model(model)
+            Media.objects.bulk_create([
+                Media(file=f'test/{content_type.model}-{obj.pk}.jpg', name=f'{obj.pk}.jpg', media_type='image',
+                      is_primary=True, content_type=content_type, object_id=obj.pk)
+                for obj in objects
+            ])
+
+        maintenance_categories = MaintenanceCategory.objects.bulk_create([
+            MaintenanceCategory(name=f'فئة صيانة {index}') for index in range(FIXTURE_ROWS)
+        ])
+        expense_categories = ExpenseCategory.objects.bulk_create([
+            ExpenseCategory(name=f'فئة مصروفات {index}') for index in range(FIXTURE_ROWS)
+        ])
+        Expense.objects.update(category=expense_categories[0])
+        worker_categories = WorkerCategory.objects.bulk_create([
+            WorkerCategory(name=f'فئة عمال {index}') for index in range(FIXTURE_ROWS)
+        ])
+
+        workers = Worker.objects.bulk_create([
+            Worker(first_name='عامل', last_name=str(index), phone='966500000000',
+                   national_id=f'NID-{index}', employee_id=f'WRK-TEST-{index:05d}', supervisor=cls.admin)
+            for index in range(FIXTURE_ROWS)
+        ])
+        Worker.categories.through.objects.bulk_create([
+            Worker.categories.through(worker_id=worker.pk, workercategory_id=category.pk)
+            for worker, category in zip(workers, worker_categories)
+        ])
+        WorkerPropertyAssignment.objects.bulk_create([
+            WorkerPropertyAssignment(worker=worker, assigned_property=property_obj, assigned_by=cls.admin, start_date=today)
+            for worker, property_obj in zip(workers, properties)
+        ])
+
+        maintenance_requests = MaintenanceRequest.objects.bulk_create([
+            MaintenanceRequest(
+                maintenance_property=property_obj, category=category, title='تسريب مياه', description='تسريب في المطبخ',
+                requested_by=cls.admin, assigned_worker=worker, status='assigned',
+                due_date=now + timedelta(days=3),
+            )
+            for property_obj, category, worker in zip(properties, maintenance_categories, workers)
+        ])
+        workflows = PropertyMaintenanceWorkflow.objects.bulk_create([
+            PropertyMaintenanceWorkflow(maintenance_request=request) for request in maintenance_requests
+        ])
+        PropertyMaintenanceWorkflow.assigned_workers.through.objects.bulk_create([
+            PropertyMaintenanceWorkflow.assigned_workers.through(propertymaintenanceworkflow_id=workflow.pk, worker_id=worker.pk)
+            for workflow, worker in zip(workflows, workers)
+        ])
+
+        reports = Report.objects.bulk_create([
+            Report(title=f'تقرير {index}', report_type='financial', generated_by=cls.admin,
+                   period_start=today - timedelta(days=30), period_end=today, status='completed')
+            for index in range(FIXTURE_ROWS)
+        ])
+        Report.properties.through.objects.bulk_create([
+            Report.properties.through(report_id=report.pk, property_id=property_obj.pk)
+            for report in reports for property_obj in properties[:3]
+        ])
+
+        bank_accounts = BankAccount.objects.bulk_create([
+            BankAccount(user=cls.admin, bank_account_name='حساب التشغيل', bank_name='مصرف الراجحي',
+                        iban_number=f'SA{index:022d}')
+            for index in range(FIXTURE_ROWS)
+        ])
+        payment_ids = Payment.objects.order_by('pk').values_list('pk', flat=True)[:FIXTURE_ROWS]
+        Payment.objects.filter(pk__in=list(payment_ids)).update(user=cls.admin, bank_account=bank_accounts[0])
+        Message.objects.bulk_create([
+            Message(sender=other if index % 2 else cls.admin, recipient=cls.admin if index % 2 else other,
+                    subject='استفسار', body='هل العقار متاح؟', related_property=properties[index])
+            for index in range(FIXTURE_ROWS)
+        ])
+
+        # Objects requested by the detail urls
+        cls.location = Location.objects.order_by('pk').first()
+        cls.media = Media.objects.order_by('pk').first()
+        cls.property = Property.objects.filter(is_published=True).order_by('pk').first()
+        cls.room = rooms[0]
+        cls.auction = Auction.objects.order_by('-bid_count', 'pk').first()
+        cls.bid = Bid.objects.order_by('pk').first()
+        cls.message = Message.objects.order_by('pk').first()
+        cls.rental_property = RentalProperty.objects.order_by('pk').first()
+        cls.tenant = Tenant.objects.filter(status='active').order_by('pk').first()
+        cls.lease = Lease.objects.filter(status='active').order_by('pk').first()
+        cls.maintenance_category = maintenance_categories[0]
+        cls.maintenance_request = maintenance_requests[0]
+        cls.expense_category = expense_categories[0]
+        cls.expense = Expense.objects.order_by('pk').first()
+        cls.report = reports[0]
+        cls.worker_category = worker_categories[0]
+        cls.worker = workers[0]
+        cls.worker_assignment = WorkerPropertyAssignment.objects.order_by('pk').first()
+        cls.workflow = workflows[0]
+        cls.bank_account = bank_accounts[0]
+        cls.payment = Payment.objects.filter(user=cls.admin).order_by('pk').first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def request(self, url, **params):
+        """GET url; returns (response, captured queries)."""
+        cache.clear()
+        # The query log is a bounded deque: once full, captured counts would read zero
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, params)
+        return response, captured.captured_queries
+
+    def detail_url(self, url_name, fixture):
+        obj = getattr(self, fixture)
+        if url_name.endswith('-by-slug'):
+            return reverse(url_name, kwargs={'slug': obj.slug})
+        return reverse(url_name, kwargs={'pk': obj.pk})
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        for url_name, fixture, budget in QUERY_BUDGETS:
+            if fixture is not None:
+                continue
+            with self.subTest(endpoint=url_name):
+                url = reverse(url_name)
+                runs = {}
+                for page_size in PAGE_SIZES:
+                    response, queries = self.request(url, page_size=page_size)
+                    self.assertEqual(response.status_code, 200, f"{url_name}: {response.content[:300]!r}")
+                    runs[page_size] = response, queries
+
+                (small, small_queries), (large, large_queries) = runs[min(PAGE_SIZES)], runs[max(PAGE_SIZES)]
+                if isinstance(large.data, dict) and 'results' in large.data:
+                    self.assertGreater(len(large.data['results']), len(small.data['results']),
+                                       f"{url_name}: not enough fixture rows to compare page sizes")
+
+                self.assertEqual(
+                    len(large_queries), len(small_queries),
+                    f"{url_name}: {len(small_queries)} queries with page_size={min(PAGE_SIZES)}, "
+                    f"{len(large_queries)} with page_size={max(PAGE_SIZES)}. Statements that grew:\n"
+                    + repeated_queries(large_queries, small_queries),
+                )
+                self.assertLessEqual(
+                    len(large_queries), budget,
+                    f"{url_name}: {len(large_queries)} queries, budget {budget}. Repeated statements:\n"
+                    + repeated_queries(large_queries),
+                )
+
+    def test_detail_queries_within_budget(self):
+        for url_name, fixture, budget in QUERY_BUDGETS:
+            if fixture is None:
+                continue
+            with self.subTest(endpoint=url_name):
+                response, queries = self.request(self.detail_url(url_name, fixture))
+                self.assertEqual(response.status_code, 200, f"{url_name}: {response.content[:300]!r}")
+                self.assertLessEqual(
+                    len(queries), budget,
+                    f"{url_name}: {len(queries)} queries, budget {budget}. Repeated statements:\n"
+                    + repeated_queries(queries),
+                )
+
+    def test_cached_fragments_skip_relation_queries(self):
+        for url_name in ('properties', 'auctions'):
+            with self.subTest(endpoint=url_name):
+                url = reverse(url_name)
+                cold, cold_queries = self.request(url, page_size=50)
+                reset_queries()
+                with CaptureQueriesContext(connection) as warm_queries:
+                    warm = self.client.get(url, {'page_size': 50})
+
+                self.assertEqual(warm.data['results'][0]['media'], cold.data['results'][0]['media'])
+                self.assertFalse(
+                    [query for query in warm_queries.captured_queries if '"base_media"' in query['sql']],
+                    f"{url_name}: media queried although every fragment was cached",
+                )
+                self.assertLess(len(warm_queries), len(cold_queries))
+
+    def test_sparse_fieldsets_skip_unrequested_relations(self):
+        for url_name, fields in (('auctions', 'id,title,status'), ('leases', 'id,status')):
+            with self.subTest(endpoint=url_name):
+                url = reverse(url_name)
+                full, full_queries = self.request(url, page_size=50)
+                sparse, sparse_queries = self.request(url, page_size=50, fields=fields)
+
+                self.assertEqual(set(sparse.data['results'][0]), set(fields.split(',')))
+                self.assertEqual(len(sparse.data['results']), len(full.data['results']))
+                self.assertLess(
+                    len(sparse_queries), len(full_queries),
+                    f"{url_name}: {len(sparse_queries)} queries with ?fields=, {len(full_queries)} without",
+                )
+
+    def test_sparse_fieldsets_with_anonymous_response_cache(self):
+        anonymous = APIClient()
+        for url_name, fixture in (('property', 'property'), ('auction', 'auction')):
+            with self.subTest(endpoint=url_name):
+                cache.clear()
+                url = self.detail_url(url_name, fixture)
+                miss = anonymous.get(url, {'fields': 'title'})
+                hit = anonymous.get(url, {'fields': 'title'})
+
+                self.assertEqual(miss.status_code, 200, f"{url_name}: {miss.content[:300]!r}")
+                self.assertEqual(set(miss.json()), {'title'})
+                self.assertEqual(miss['X-Response-Cache'], 'MISS')
+                self.assertEqual(hit['X-Response-Cache'], 'HIT')
+                self.assertEqual(hit.content, miss.content)
+
+
+class AnalyticsInvalidationTests(TestCase):
+    """Deleting a source row drops the materialized analytics of its property, however it is deleted."""
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetGenerator({
+            'users': 10, 'properties': 20, 'auctions': 0, 'bids': 0, 'leases': 20,
+            'expenses': 20, 'payments': 20, 'messages': 0,
+        }, seed=27).run()
+
+    def setUp(self):
+        refresh_property_analytics(full=True)
+
+    def assertNotMaterialized(self, property_id):
+        self.assertFalse(PropertyAnalytics.objects.filter(base_property_id=property_id).exists())
+
+    def test_cascade_delete(self):
+        lease = Lease.objects.select_related('rental_property', 'tenant').order_by('pk').first()
+        self.assertTrue(PropertyAnalytics.objects.filter(base_property_id=lease.rental_property.base_property_id).exists())
+        lease.tenant.delete()
+        self.assertNotMaterialized(lease.rental_property.base_property_id)
 
-# Create your tests here.
+    def test_queryset_delete(self):
+        expense = Expense.objects.order_by('pk').first()
+        payment = Payment.objects.exclude(property_reference=None).order_by('pk').first()
+        Expense.objects.filter(pk=expense.pk).delete()
+        Payment.objects.filter(pk=payment.pk).delete()
+        self.assertNotMaterialized(expense.expense_property_id)
+        self.assertNotMaterialized(payment.property_reference_id)
@@ -50,6 +50,7 @@ urlpatterns = [
     # Bids
     path('bids/', views.BidListCreateView.as_view(), name='bids'),
     path('bids/<int:pk>/', views.BidDetailView.as_view(), name='bid'),
+    path('bids/export/<str:file_format>/', views.BidExportView.as_view(), name='bids-export'),
 
 
 
@@ -89,18 +90,21 @@ urlpatterns = [
     # Property Management - Leases
     path('leases/', views.LeaseListCreateView.as_view(), name='leases'),
     path('leases/<int:pk>/', views.LeaseDetailView.as_view(), name='lease'),
+    path('leases/export/<str:file_format>/', views.LeaseExportView.as_view(), name='leases-export'),
     
     # Property Management - Maintenance
     path('maintenance/categories/', views.MaintenanceCategoryListCreateView.as_view(), name='maintenance-categories'),
     path('maintenance/categories/<int:pk>/', views.MaintenanceCategoryDetailView.as_view(), name='maintenance-category'),
     path('maintenance/requests/', views.MaintenanceRequestListCreateView.as_view(), name='maintenance-requests'),
     path('maintenance/requests/<int:pk>/', views.MaintenanceRequestDetailView.as_view(), name='maintenance-request'),
+    path('maintenance/requests/export/<str:file_format>/', views.MaintenanceRequestExportView.as_view(), name='maintenance-requests-export'),
     
     # Property Management - Expenses
     path('expenses/categories/', views.ExpenseCategoryListCreateView.as_view(), name='expense-categories'),
     path('expenses/categories/<int:pk>/', views.ExpenseCategoryDetailView.as_view(), name='expense-category'),
     path('expenses/', views.ExpenseListCreateView.as_view(), name='expenses'),
     path('expenses/<int:pk>/', views.ExpenseDetailView.as_view(), name='expense'),
+    path('expenses/export/<str:file_format>/', views.ExpenseExportView.as_view(), name='expenses-export'),
     
     # Property Management - Analytics & Reports
     path('analytics/', views.PropertyAnalyticsView.as_view(), name='property-analytics'),
@@ -108,6 +112,8 @@ urlpatterns = [
     path('reports/', views.ReportListView.as_view(), name='reports'),
     path('reports/generate/', views.ReportGenerationView.as_view(), name='generate-report'),
     path('reports/<int:pk>/', views.ReportDetailView.as_view(), name='report'),
+    path('reports/<int:pk>/status/', views.ReportStatusView.as_view(), name='report-status'),
+    path('reports/<int:pk>/download/<str:file_format>/', views.ReportDownloadView.as_view(), name='report-download'),
     
     # Enhanced Analytics Views with Heat Maps and Bar Charts
     path('analytics/advanced/', views.AdvancedPropertyAnalyticsView.as_view(), name='advanced-property-analytics'),
@@ -141,5 +147,6 @@ urlpatterns = [
     path('bank-accounts/<int:pk>/', views.BankAccountDetailView.as_view(), name='bank-account'),
     path('payments/', views.PaymentListCreateView.as_view(), name='payments'),
     path('payments/<int:pk>/', views.PaymentDetailView.as_view(), name='payment'),
+    path('payments/export/<str:file_format>/', views.PaymentExportView.as_view(), name='payments-export'),
     
 ]
\ No newline at end of file
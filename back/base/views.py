@@ -7,23 +7,34 @@ from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from django.utils import timezone
 from django.db import transaction, models
 from django.http import Http404
-from rest_framework.exceptions import PermissionDenied
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.core.cache import cache
+from rest_framework.exceptions import PermissionDenied, ValidationError
 import django_filters.rest_framework as drf_django_filters
+from django_filters.utils import translate_validation
 from rest_framework.views import APIView
 
 from .models import *
 from .serializers import *
 from .permissions import *
-from .filters import AuctionFilterSet, PropertyFilterSet
+from .occupancy import prefetch_current_leases
+from .conditional import ConditionalGetMixin
+from .fieldsets import SparseFieldsetViewMixin
+from .response_cache import AnonymousResponseCacheMixin
+from .filters import (
+    AuctionFilterSet, BidFilterSet, ExpenseFilterSet, LeaseFilterSet,
+    MaintenanceRequestFilterSet, PaymentFilterSet, PropertyFilterSet, RentalPropertyFilterSet,
+)
 from accounts.permissions import IsOwnerOrAdmin
+from accounts.metrics import record_bid
 from accounts.utils import create_response
 
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 from django.db.models import Q, Count, Sum, Avg, Max, Min
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth import get_user_model
-import json
 # Data visualization imports moved to functions to avoid startup errors
 # import pandas as pd
 # import numpy as np  
@@ -33,7 +44,7 @@ import json
 
 logger = logging.getLogger(__name__)
 
-class BaseListCreateView(generics.ListCreateAPIView):
+class BaseListCreateView(SparseFieldsetViewMixin, ConditionalGetMixin, generics.ListCreateAPIView):
     filter_backends = [drf_django_filters.DjangoFilterBackend, filters.SearchFilter]
     
     def get_serializer_context(self):
@@ -41,7 +52,7 @@ class BaseListCreateView(generics.ListCreateAPIView):
         context.update({"request": self.request})
         return context
 
-class BaseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BaseDetailView(SparseFieldsetViewMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context.update({"request": self.request})
@@ -73,6 +84,7 @@ class BaseDashboardView(generics.ListAPIView):
 class LocationListCreateView(BaseListCreateView):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
+    conditional_dependencies = ()
     filterset_fields = ['city', 'state', 'country']
     search_fields = ['city', 'state', 'country']
 
@@ -82,6 +94,7 @@ class LocationListCreateView(BaseListCreateView):
 class LocationDetailView(BaseDetailView):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
+    conditional_dependencies = ()
     
     def get_permissions(self):
         return [drf_permissions.AllowAny()] if self.request.method in SAFE_METHODS else [IsAdminUser()]
@@ -94,6 +107,7 @@ class MediaListCreateView(BaseListCreateView):
     """
     queryset = Media.objects.select_related('content_type') # Optimizes DB query by fetching related ContentType.
     serializer_class = MediaSerializer
+    conditional_dependencies = ()
     permission_classes = [drf_permissions.AllowAny] # Base permission, refined by get_permissions for POST.
     filter_backends = [drf_django_filters.DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['media_type', 'is_primary']
@@ -152,6 +166,7 @@ class MediaDetailView(BaseDetailView):
     """
     queryset = Media.objects.select_related('content_type')
     serializer_class = MediaSerializer
+    conditional_dependencies = ()
 
     def get_permissions(self):
         if self.request.method in SAFE_METHODS:
@@ -165,13 +180,17 @@ class MediaDetailView(BaseDetailView):
         return context
 
 # Property Views
-class PropertyListCreateView(BaseListCreateView):
+
+class PropertyListCreateView(AnonymousResponseCacheMixin, BaseListCreateView):
     serializer_class = PropertySerializer
+    response_cache_tags = ('property',)
+    conditional_dependencies = ('location',)
     filterset_class = PropertyFilterSet
     search_fields = ['title', 'deed_number', 'location__city']
 
     def get_queryset(self):
-        return Property.objects.select_related('owner', 'location').prefetch_related('rooms').filter(is_published=True).order_by('-created_at')
+        # Relations are prefetched by the serializer, for the properties missing from the fragment cache
+        return Property.objects.select_related('owner', 'location').filter(is_published=True).order_by('-created_at')
 
     def get_permissions(self):
         return [drf_permissions.IsAuthenticated(), IsAppraiserOrDataEntry()] if self.request.method == 'POST' else [drf_permissions.AllowAny()]
@@ -179,29 +198,35 @@ class PropertyListCreateView(BaseListCreateView):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class PropertyDetailView(BaseDetailView):
+class PropertyDetailView(AnonymousResponseCacheMixin, BaseDetailView):
     serializer_class = PropertySerializer
+    conditional_dependencies = ('location',)
     lookup_field = 'pk'
 
+    def response_cache_object_tags(self, instance):
+        return [f'property:{instance.pk}', f'location:{instance.location_id}']
+
+    def response_cache_hit(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        Property.objects.filter(**{self.lookup_field: kwargs[lookup]}).update(view_count=models.F('view_count') + 1)
+
     def get_queryset(self):
-        return Property.objects.select_related('owner', 'location').prefetch_related('rooms')
+        return Property.objects.select_related('owner', 'location')
 
     def get_permissions(self):
         return [drf_permissions.AllowAny()] if self.request.method in SAFE_METHODS else [drf_permissions.IsAuthenticated(), IsPropertyOwnerOrAppraiserOrDataEntry()]
 
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
+    def perform_retrieve(self, instance):
         instance.increment_view_count()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
 
 class PropertySlugDetailView(PropertyDetailView):
     lookup_field = 'slug'
 
 # Room Views
 class RoomListCreateView(BaseListCreateView):
-    queryset = Room.objects.select_related('property', 'property__owner', 'property__location')
+    queryset = Room.objects.select_related('property', 'property__owner', 'property__location').prefetch_related(media_prefetch())
     serializer_class = RoomSerializer
+    conditional_dependencies = ()
     filterset_fields = ['property', 'room_type', 'name']
     search_fields = ['name', 'description']
 
@@ -209,45 +234,59 @@ class RoomListCreateView(BaseListCreateView):
         return [drf_permissions.IsAuthenticated()] if self.request.method == 'POST' else [drf_permissions.AllowAny()]
 
 class RoomDetailView(BaseDetailView):
-    queryset = Room.objects.select_related('property', 'property__owner', 'property__location')
+    queryset = Room.objects.select_related('property', 'property__owner', 'property__location').prefetch_related(media_prefetch())
     serializer_class = RoomSerializer
+    conditional_dependencies = ()
 
     def get_permissions(self):
         return [drf_permissions.AllowAny()] if self.request.method in SAFE_METHODS else [drf_permissions.IsAuthenticated(), IsPropertyOwnerOrAppraiserOrDataEntry()]
 
 # Auction Views
 
-class AuctionListCreateView(BaseListCreateView):
+class AuctionListCreateView(AnonymousResponseCacheMixin, BaseListCreateView):
     serializer_class = AuctionSerializer
+    # Property changes invalidate 'auction' too: auctions embed their property
+    response_cache_tags = ('auction',)
+    conditional_dependencies = ('related_property', 'related_property__location')
     filterset_class = AuctionFilterSet
     search_fields = ['title', 'description']
 
     def get_queryset(self):
-        # Remove the is_published filter to show all auctions
-        queryset = Auction.objects.select_related('related_property', 'related_property__location').prefetch_related('media', 'bids')
-        
-        # Auto-update status for all auctions
-        for auction in queryset:
+        # Auto-update status, only for the auctions whose start or end has passed
+        now = timezone.now()
+        due = Auction.objects.select_related('related_property').filter(
+            Q(status='scheduled', start_date__lte=now, end_date__gt=now, is_published=True)
+            | Q(status='live', end_date__lte=now)
+        )
+        for auction in due:
             auction.update_status_based_on_time()
-        
+
+        # Remove the is_published filter to show all auctions
+        queryset = Auction.objects.select_related('related_property', 'related_property__location')
         return queryset.order_by('-created_at')
     def get_permissions(self):
         return [drf_permissions.IsAuthenticated(), IsPropertyOwnerOrAppraiser()] if self.request.method == 'POST' else [drf_permissions.AllowAny()]
 
-class AuctionDetailView(BaseDetailView):
+class AuctionDetailView(AnonymousResponseCacheMixin, BaseDetailView):
     serializer_class = AuctionSerializer
+    conditional_dependencies = ('related_property', 'related_property__location')
+
+    def response_cache_object_tags(self, instance):
+        related = instance.related_property
+        return [f'auction:{instance.pk}', f'property:{related.pk}', f'location:{related.location_id}']
+
+    def response_cache_hit(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        Auction.objects.filter(**{self.lookup_field: kwargs[lookup]}).update(view_count=models.F('view_count') + 1)
 
     def get_queryset(self):
-        return Auction.objects.select_related('related_property').prefetch_related('bids')
+        return Auction.objects.select_related('related_property', 'related_property__location')
 
     def get_permissions(self):
         return [drf_permissions.AllowAny()] if self.request.method in SAFE_METHODS else [drf_permissions.IsAuthenticated(), IsPropertyOwnerOrAppraiser()]
 
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
+    def perform_retrieve(self, instance):
         instance.increment_view_count()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
 
 class AuctionSlugDetailView(AuctionDetailView):
     lookup_field = 'slug'
@@ -377,6 +416,7 @@ class BidListCreateView(BaseListCreateView):
             auction = Auction.objects.select_for_update().get(id=auction_id)
             bid_amount = float(bid_amount)
         except (Auction.DoesNotExist, ValueError, TypeError):
+            record_bid('http', 'INVALID_REQUEST')
             return Response({
                 'error': 'Invalid auction or bid amount',
                 'code': 'INVALID_REQUEST'
@@ -384,6 +424,7 @@ class BidListCreateView(BaseListCreateView):
         
         # Check if auction can accept bids (includes auto-activation)
         if not auction.is_biddable():
+            record_bid('http', 'AUCTION_NOT_ACTIVE')
             return Response({
                 'error': f'Auction is {auction.get_status_display().lower()} and not accepting bids',
                 'code': 'AUCTION_NOT_ACTIVE',
@@ -395,6 +436,7 @@ class BidListCreateView(BaseListCreateView):
         min_bid = float(current_high) + float(auction.minimum_increment)
         
         if bid_amount < min_bid:
+            record_bid('http', 'BID_TOO_LOW')
             return Response({
                 'error': f'Minimum bid is ${min_bid:,.2f}',
                 'code': 'BID_TOO_LOW',
@@ -404,13 +446,16 @@ class BidListCreateView(BaseListCreateView):
         
         # Create the bid
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            record_bid('http', 'VALIDATION_ERROR')
+            raise ValidationError(serializer.errors)
         bid = serializer.save(
             bidder=request.user,
             ip_address=request.META.get('REMOTE_ADDR'),
             is_verified=getattr(request.user, 'is_verified', False),
             status='accepted'  # Auto-accept valid bids
         )
+        record_bid('http')
         
         return Response({
             'message': 'Bid placed successfully',
@@ -1051,7 +1096,13 @@ class DashboardPropertiesView(BaseDashboardView):
     
     def get_queryset(self):
         user = self.request.user
-        queryset = user.get_accessible_properties().select_related('location')
+        queryset = user.get_accessible_properties().select_related('location', 'rental_info').annotate(
+            pending_requests=Count('maintenance_requests', filter=Q(maintenance_requests__status='pending')),
+            overdue_requests=Count('maintenance_requests', filter=Q(
+                maintenance_requests__due_date__lt=timezone.now(),
+                maintenance_requests__status__in=OPEN_MAINTENANCE_STATUSES,
+            )),
+        )
         
         # Filter by status if requested
         status = self.request.query_params.get('status')
@@ -1281,7 +1332,7 @@ class DashboardWorkflowsView(BaseDashboardView):
         accessible_properties = user.get_accessible_properties()
         return PropertyMaintenanceWorkflow.objects.filter(
             maintenance_request__maintenance_property__in=accessible_properties
-        ).select_related('maintenance_request')
+        ).select_related('maintenance_request').prefetch_related('assigned_workers')
     
     def list(self, request, *args, **kwargs):
         """Enhanced workflow list with status metrics"""
@@ -1313,9 +1364,9 @@ class DashboardWorkflowsView(BaseDashboardView):
 class RentalPropertyListCreateView(BaseListCreateView):
     """API for rental property management"""
     serializer_class = RentalPropertySerializer
-    filterset_fields = ['rental_status', 'rental_type', 'furnished', 'pets_allowed']
-    search_fields = ['property__title', 'property__address', 'property__location__city']
-    ordering_fields = ['monthly_rent', 'created_at', 'property__market_value']
+    filterset_class = RentalPropertyFilterSet
+    search_fields = ['base_property__title', 'base_property__address', 'base_property__location__city']
+    ordering_fields = ['monthly_rent', 'created_at', 'base_property__market_value']
     ordering = ['-created_at']
 
     def get_queryset(self):
@@ -1323,7 +1374,7 @@ class RentalPropertyListCreateView(BaseListCreateView):
         base_properties = user.get_accessible_properties()
         return RentalProperty.objects.filter(
             base_property__in=base_properties
-        ).select_related('base_property', 'base_property__location', 'base_property__owner').prefetch_related('leases')
+        ).select_related('base_property', 'base_property__location', 'base_property__owner')
 
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -1347,7 +1398,7 @@ class RentalPropertyDetailView(BaseDetailView):
         base_properties = user.get_accessible_properties()
         return RentalProperty.objects.filter(
             base_property__in=base_properties
-        ).select_related('base_property', 'base_property__location', 'base_property__owner').prefetch_related('leases')
+        ).select_related('base_property', 'base_property__location', 'base_property__owner')
 
     def get_permissions(self):
         if self.request.method in SAFE_METHODS:
@@ -1366,15 +1417,15 @@ class TenantListCreateView(BaseListCreateView):
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser or user.role in ['appraiser', 'data_entry']:
-            return Tenant.objects.all().select_related('user').prefetch_related('leases')
+            return Tenant.objects.all().select_related('user').prefetch_related(prefetch_current_leases())
         elif user.role == 'owner':
             # Owners can see tenants of their properties
             return Tenant.objects.filter(
                 leases__rental_property__property__owner=user
-            ).distinct().select_related('user').prefetch_related('leases')
+            ).distinct().select_related('user').prefetch_related(prefetch_current_leases())
         elif user.role == 'tenant':
             # Tenants can only see their own profile
-            return Tenant.objects.filter(user=user).select_related('user').prefetch_related('leases')
+            return Tenant.objects.filter(user=user).select_related('user').prefetch_related(prefetch_current_leases())
         return Tenant.objects.none()
 
     def get_permissions(self):
@@ -1405,13 +1456,13 @@ class TenantDetailView(BaseDetailView):
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser or user.role in ['appraiser', 'data_entry']:
-            return Tenant.objects.all().select_related('user').prefetch_related('leases')
+            return Tenant.objects.all().select_related('user').prefetch_related(prefetch_current_leases())
         elif user.role == 'owner':
             return Tenant.objects.filter(
                 leases__rental_property__property__owner=user
-            ).distinct().select_related('user').prefetch_related('leases')
+            ).distinct().select_related('user').prefetch_related(prefetch_current_leases())
         elif user.role == 'tenant':
-            return Tenant.objects.filter(user=user).select_related('user').prefetch_related('leases')
+            return Tenant.objects.filter(user=user).select_related('user').prefetch_related(prefetch_current_leases())
         return Tenant.objects.none()
 
     def get_permissions(self):
@@ -1424,22 +1475,22 @@ class LeaseListCreateView(BaseListCreateView):
     """API for lease management"""
     serializer_class = LeaseSerializer
     filterset_fields = ['status', 'tenant', 'rental_property']
-    search_fields = ['lease_number', 'tenant__first_name', 'tenant__last_name', 'rental_property__property__title']
+    search_fields = ['lease_number', 'tenant__first_name', 'tenant__last_name', 'rental_property__base_property__title']
     ordering_fields = ['start_date', 'end_date', 'monthly_rent', 'created_at']
     ordering = ['-created_at']
 
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser or user.role in ['appraiser', 'data_entry']:
-            return Lease.objects.all().select_related('tenant', 'rental_property__property', 'rental_property__property__location')
+            return Lease.objects.all().select_related('tenant', 'tenant__user', 'rental_property__base_property', 'rental_property__base_property__location').prefetch_related(prefetch_current_leases('tenant__leases'))
         elif user.role == 'owner':
             return Lease.objects.filter(
-                rental_property__property__owner=user
-            ).select_related('tenant', 'rental_property__property', 'rental_property__property__location')
+                rental_property__base_property__owner=user
+            ).select_related('tenant', 'tenant__user', 'rental_property__base_property', 'rental_property__base_property__location').prefetch_related(prefetch_current_leases('tenant__leases'))
         elif user.role == 'tenant':
             return Lease.objects.filter(
                 tenant__user=user
-            ).select_related('tenant', 'rental_property__property', 'rental_property__property__location')
+            ).select_related('tenant', 'tenant__user', 'rental_property__base_property', 'rental_property__base_property__location').prefetch_related(prefetch_current_leases('tenant__leases'))
         return Lease.objects.none()
 
     def get_permissions(self):
@@ -1451,7 +1502,7 @@ class LeaseListCreateView(BaseListCreateView):
         # Validate property ownership
         rental_property = serializer.validated_data['rental_property']
         if self.request.user.role == 'owner':
-            if rental_property.property.owner != self.request.user:
+            if rental_property.base_property.owner != self.request.user:
                 raise PermissionDenied("You can only create leases for your own properties")
         serializer.save()
 
@@ -1463,15 +1514,15 @@ class LeaseDetailView(BaseDetailView):
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser or user.role in ['appraiser', 'data_entry']:
-            return Lease.objects.all().select_related('tenant', 'rental_property__property')
+            return Lease.objects.all().select_related('tenant', 'tenant__user', 'rental_property__base_property').prefetch_related(prefetch_current_leases('tenant__leases'))
         elif user.role == 'owner':
             return Lease.objects.filter(
-                rental_property__property__owner=user
-            ).select_related('tenant', 'rental_property__property')
+                rental_property__base_property__owner=user
+            ).select_related('tenant', 'tenant__user', 'rental_property__base_property').prefetch_related(prefetch_current_leases('tenant__leases'))
         elif user.role == 'tenant':
             return Lease.objects.filter(
                 tenant__user=user
-            ).select_related('tenant', 'rental_property__property')
+            ).select_related('tenant', 'tenant__user', 'rental_property__base_property').prefetch_related(prefetch_current_leases('tenant__leases'))
         return Lease.objects.none()
 
     def get_permissions(self):
@@ -1482,7 +1533,7 @@ class LeaseDetailView(BaseDetailView):
 
 class MaintenanceCategoryListCreateView(BaseListCreateView):
     """API for maintenance categories"""
-    queryset = MaintenanceCategory.objects.filter(is_active=True)
+    queryset = MaintenanceCategory.objects.filter(is_active=True).annotate(request_count=Count('requests'))
     serializer_class = MaintenanceCategorySerializer
     filterset_fields = ['is_active', 'priority_level']
     search_fields = ['name', 'description']
@@ -1497,7 +1548,7 @@ class MaintenanceCategoryListCreateView(BaseListCreateView):
 
 class MaintenanceCategoryDetailView(BaseDetailView):
     """API for individual maintenance category"""
-    queryset = MaintenanceCategory.objects.all()
+    queryset = MaintenanceCategory.objects.annotate(request_count=Count('requests'))
     serializer_class = MaintenanceCategorySerializer
 
     def get_permissions(self):
@@ -1506,6 +1557,12 @@ class MaintenanceCategoryDetailView(BaseDetailView):
         return [drf_permissions.IsAuthenticated(), IsAppraiserOrDataEntry()]
 
 
+# The nested category_details, with the request count MaintenanceCategorySerializer shows
+MAINTENANCE_CATEGORY_PREFETCH = models.Prefetch(
+    'category', queryset=MaintenanceCategory.objects.annotate(request_count=Count('requests'))
+)
+
+
 class MaintenanceRequestListCreateView(BaseListCreateView):
     """API for maintenance requests"""
     serializer_class = MaintenanceRequestSerializer
@@ -1518,16 +1575,16 @@ class MaintenanceRequestListCreateView(BaseListCreateView):
         user = self.request.user
         if user.is_superuser or user.role in ['appraiser', 'data_entry']:
             return MaintenanceRequest.objects.all().select_related(
-                'maintenance_property', 'category', 'requested_by', 'assigned_to'
-            )
+                'maintenance_property', 'requested_by', 'assigned_to'
+            ).prefetch_related(MAINTENANCE_CATEGORY_PREFETCH)
         elif user.role == 'owner':
             return MaintenanceRequest.objects.filter(
                 maintenance_property__owner=user
-            ).select_related('maintenance_property', 'category', 'requested_by', 'assigned_to')
+            ).select_related('maintenance_property', 'requested_by', 'assigned_to').prefetch_related(MAINTENANCE_CATEGORY_PREFETCH)
         elif user.role == 'tenant':
             return MaintenanceRequest.objects.filter(
                 Q(requested_by=user) | Q(maintenance_property__rental_info__leases__tenant__user=user)
-            ).select_related('maintenance_property', 'category', 'requested_by', 'assigned_to')
+            ).select_related('maintenance_property', 'requested_by', 'assigned_to').prefetch_related(MAINTENANCE_CATEGORY_PREFETCH)
         return MaintenanceRequest.objects.none()
 
     def get_permissions(self):
@@ -1544,15 +1601,15 @@ class MaintenanceRequestDetailView(BaseDetailView):
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser or user.role in ['appraiser', 'data_entry']:
-            return MaintenanceRequest.objects.all().select_related('maintenance_property', 'category', 'requested_by', 'assigned_to')
+            return MaintenanceRequest.objects.all().select_related('maintenance_property', 'requested_by', 'assigned_to').prefetch_related(MAINTENANCE_CATEGORY_PREFETCH)
         elif user.role == 'owner':
             return MaintenanceRequest.objects.filter(
                 maintenance_property__owner=user
-            ).select_related('maintenance_property', 'category', 'requested_by', 'assigned_to')
+            ).select_related('maintenance_property', 'requested_by', 'assigned_to').prefetch_related(MAINTENANCE_CATEGORY_PREFETCH)
         elif user.role == 'tenant':
             return MaintenanceRequest.objects.filter(
                 Q(requested_by=user) | Q(maintenance_property__rental_info__leases__tenant__user=user)
-            ).select_related('maintenance_property', 'category', 'requested_by', 'assigned_to')
+            ).select_related('maintenance_property', 'requested_by', 'assigned_to').prefetch_related(MAINTENANCE_CATEGORY_PREFETCH)
         return MaintenanceRequest.objects.none()
 
     def get_permissions(self):
@@ -1561,9 +1618,16 @@ class MaintenanceRequestDetailView(BaseDetailView):
         return [drf_permissions.IsAuthenticated(), IsPropertyOwnerOrAppraiserOrDataEntry()]
 
 
+# Read by ExpenseCategorySerializer instead of counting per category
+EXPENSE_CATEGORY_TOTALS = {
+    'expense_count': Count('expenses'),
+    'expense_total': Sum('expenses__total_amount'),
+}
+
+
 class ExpenseCategoryListCreateView(BaseListCreateView):
     """API for expense categories"""
-    queryset = ExpenseCategory.objects.filter(is_active=True)
+    queryset = ExpenseCategory.objects.filter(is_active=True).annotate(**EXPENSE_CATEGORY_TOTALS)
     serializer_class = ExpenseCategorySerializer
     filterset_fields = ['is_active', 'is_tax_deductible', 'parent_category']
     search_fields = ['name', 'description']
@@ -1578,7 +1642,7 @@ class ExpenseCategoryListCreateView(BaseListCreateView):
 
 class ExpenseCategoryDetailView(BaseDetailView):
     """API for individual expense category"""
-    queryset = ExpenseCategory.objects.all()
+    queryset = ExpenseCategory.objects.annotate(**EXPENSE_CATEGORY_TOTALS)
     serializer_class = ExpenseCategorySerializer
 
     def get_permissions(self):
@@ -1587,11 +1651,16 @@ class ExpenseCategoryDetailView(BaseDetailView):
         return [drf_permissions.IsAuthenticated(), IsAppraiserOrDataEntry()]
 
 
+EXPENSE_CATEGORY_PREFETCH = models.Prefetch(
+    'category', queryset=ExpenseCategory.objects.annotate(**EXPENSE_CATEGORY_TOTALS)
+)
+
+
 class ExpenseListCreateView(BaseListCreateView):
     """API for expense management"""
     serializer_class = ExpenseSerializer
-    filterset_fields = ['status', 'expense_type', 'category', 'property', 'is_recurring', 'is_emergency']
-    search_fields = ['title', 'description', 'vendor_name', 'property__title']
+    filterset_fields = ['status', 'expense_type', 'category', 'expense_property', 'is_recurring', 'is_emergency']
+    search_fields = ['title', 'description', 'vendor_name', 'expense_property__title']
     ordering_fields = ['expense_date', 'amount', 'due_date', 'created_at']
     ordering = ['-expense_date']
 
@@ -1599,12 +1668,12 @@ class ExpenseListCreateView(BaseListCreateView):
         user = self.request.user
         if user.is_superuser or user.role in ['appraiser', 'data_entry']:
             return Expense.objects.all().select_related(
-                'property', 'category', 'created_by', 'approved_by'
-            )
+                'expense_property', 'created_by', 'approved_by'
+            ).prefetch_related(EXPENSE_CATEGORY_PREFETCH)
         elif user.role == 'owner':
             return Expense.objects.filter(
-                property__owner=user
-            ).select_related('property', 'category', 'created_by', 'approved_by')
+                expense_property__owner=user
+            ).select_related('expense_property', 'created_by', 'approved_by').prefetch_related(EXPENSE_CATEGORY_PREFETCH)
         return Expense.objects.none()
 
     def get_permissions(self):
@@ -1621,11 +1690,11 @@ class ExpenseDetailView(BaseDetailView):
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser or user.role in ['appraiser', 'data_entry']:
-            return Expense.objects.all().select_related('property', 'category', 'created_by', 'approved_by')
+            return Expense.objects.all().select_related('expense_property', 'created_by', 'approved_by').prefetch_related(EXPENSE_CATEGORY_PREFETCH)
         elif user.role == 'owner':
             return Expense.objects.filter(
-                property__owner=user
-            ).select_related('property', 'category', 'created_by', 'approved_by')
+                expense_property__owner=user
+            ).select_related('expense_property', 'created_by', 'approved_by').prefetch_related(EXPENSE_CATEGORY_PREFETCH)
         return Expense.objects.none()
 
     def get_permissions(self):
@@ -1647,122 +1716,96 @@ class PropertyAnalyticsView(APIView):
             import pandas as pd
             import plotly.graph_objects as go
             import plotly.express as px
-            from plotly.utils import PlotlyJSONEncoder
+            from .charts import ChartRenderer, get_chart_mode
         except ImportError:
             return Response({
                 'error': 'Data visualization libraries not installed. Please install: pip install pandas plotly'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+        from .analytics import load_materialized_frame, frame_to_records
+        
         user = request.user
+        properties = user.get_accessible_properties()
         
         if property_id:
             # Analytics for specific property
-            try:
-                property_obj = user.get_accessible_properties().get(id=property_id)
-            except Property.DoesNotExist:
+            properties = properties.filter(id=property_id)
+            if not properties.exists():
                 return Response({'error': 'Property not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            properties = [property_obj]
-        else:
-            # Analytics for all accessible properties
-            properties = user.get_accessible_properties()[:10]  # Limit for performance
         
-        if not properties:
+        # Read the whole portfolio from materialized analytics (current calendar year);
+        # only rental properties carry income metrics
+        frame = load_materialized_frame(properties)
+        if frame.empty:
             return Response({'error': 'No properties found'}, status=status.HTTP_404_NOT_FOUND)
+        df = frame[frame['has_rental']]
         
-        # Generate analytics data
-        analytics_data = []
-        
-        for prop in properties:
-            # Calculate metrics
-            rental_info = getattr(prop, 'rental_info', None)
-            if rental_info:
-                # Revenue data
-                monthly_rent = float(rental_info.monthly_rent)
-                annual_income = monthly_rent * 12
-                occupancy_rate = rental_info.occupancy_rate
-                
-                # Expense data
-                total_expenses = prop.expenses.filter(
-                    expense_date__year=datetime.now().year
-                ).aggregate(total=Sum('total_amount'))['total'] or 0
-                
-                # Maintenance data
-                maintenance_cost = prop.expenses.filter(
-                    expense_type='maintenance',
-                    expense_date__year=datetime.now().year
-                ).aggregate(total=Sum('total_amount'))['total'] or 0
-                
-                maintenance_requests = prop.maintenance_requests.count()
-                
-                analytics_data.append({
-                    'property_id': prop.id,
-                    'property_title': prop.title,
-                    'monthly_rent': monthly_rent,
-                    'annual_income': annual_income,
-                    'occupancy_rate': occupancy_rate,
-                    'total_expenses': float(total_expenses),
-                    'maintenance_cost': float(maintenance_cost),
-                    'maintenance_requests': maintenance_requests,
-                    'net_income': annual_income - float(total_expenses),
-                    'roi': ((annual_income - float(total_expenses)) / float(prop.market_value)) * 100 if prop.market_value else 0
-                })
+        analytics_data = frame_to_records(df, [
+            'property_id', 'property_title', 'monthly_rent', 'annual_income',
+            'occupancy_rate', 'total_expenses', 'maintenance_cost',
+            'maintenance_requests', 'net_income', 'roi',
+        ])
         
-        # Create charts
-        charts = {}
+        # Create charts (cached per dataset; ?charts=data returns columnar arrays)
+        charts = ChartRenderer(get_chart_mode(request))
         
-        if analytics_data:
-            df = pd.DataFrame(analytics_data)
-            
+        if not df.empty:
             # Revenue vs Expenses Chart
-            fig_revenue = go.Figure()
-            fig_revenue.add_trace(go.Bar(
-                name='Annual Income',
-                x=df['property_title'],
-                y=df['annual_income'],
-                marker_color='green'
-            ))
-            fig_revenue.add_trace(go.Bar(
-                name='Total Expenses',
-                x=df['property_title'],
-                y=df['total_expenses'],
-                marker_color='red'
-            ))
-            fig_revenue.update_layout(
-                title='Annual Income vs Expenses by Property',
-                xaxis_title='Property',
-                yaxis_title='Amount (SAR)',
-                barmode='group'
-            )
-            charts['revenue_expenses'] = json.dumps(fig_revenue, cls=PlotlyJSONEncoder)
+            def build_revenue(data, spec):
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    name='Annual Income',
+                    x=data['property_title'],
+                    y=data['annual_income'],
+                    marker_color='green'
+                ))
+                fig.add_trace(go.Bar(
+                    name='Total Expenses',
+                    x=data['property_title'],
+                    y=data['total_expenses'],
+                    marker_color='red'
+                ))
+                fig.update_layout(
+                    title=spec['title'],
+                    xaxis_title='Property',
+                    yaxis_title='Amount (SAR)',
+                    barmode='group'
+                )
+                return fig
+            
+            charts.add('revenue_expenses', df[['property_title', 'annual_income', 'total_expenses']], {
+                'type': 'bar', 'title': 'Annual Income vs Expenses by Property', 'barmode': 'group',
+                'x': 'property_title', 'y': ['annual_income', 'total_expenses'],
+            }, build_revenue)
             
             # Occupancy Rate Chart
-            fig_occupancy = px.bar(
-                df, x='property_title', y='occupancy_rate',
-                title='Occupancy Rate by Property',
-                labels={'occupancy_rate': 'Occupancy Rate (%)', 'property_title': 'Property'}
-            )
-            charts['occupancy'] = json.dumps(fig_occupancy, cls=PlotlyJSONEncoder)
+            charts.add('occupancy', df[['property_title', 'occupancy_rate']], {
+                'type': 'bar', 'title': 'Occupancy Rate by Property',
+                'x': 'property_title', 'y': 'occupancy_rate',
+                'labels': {'occupancy_rate': 'Occupancy Rate (%)', 'property_title': 'Property'},
+            }, lambda data, spec: px.bar(
+                data, x=spec['x'], y=spec['y'], title=spec['title'], labels=spec['labels']
+            ))
             
             # ROI Chart
-            fig_roi = px.bar(
-                df, x='property_title', y='roi',
-                title='Return on Investment by Property',
-                labels={'roi': 'ROI (%)', 'property_title': 'Property'},
-                color='roi',
-                color_continuous_scale='RdYlGn'
-            )
-            charts['roi'] = json.dumps(fig_roi, cls=PlotlyJSONEncoder)
+            charts.add('roi', df[['property_title', 'roi']], {
+                'type': 'bar', 'title': 'Return on Investment by Property',
+                'x': 'property_title', 'y': 'roi',
+                'labels': {'roi': 'ROI (%)', 'property_title': 'Property'},
+            }, lambda data, spec: px.bar(
+                data, x=spec['x'], y=spec['y'], title=spec['title'], labels=spec['labels'],
+                color='roi', color_continuous_scale='RdYlGn'
+            ))
         
         return Response({
             'analytics_data': analytics_data,
-            'charts': charts,
+            'charts': charts.charts,
             'summary': {
-                'total_properties': len(analytics_data),
-                'total_annual_income': sum(item['annual_income'] for item in analytics_data),
-                'total_expenses': sum(item['total_expenses'] for item in analytics_data),
-                'average_occupancy': sum(item['occupancy_rate'] for item in analytics_data) / len(analytics_data) if analytics_data else 0,
-                'average_roi': sum(item['roi'] for item in analytics_data) / len(analytics_data) if analytics_data else 0,
+                'total_properties': len(df),
+                'total_annual_income': float(df['annual_income'].sum()),
+                'total_expenses': float(df['total_expenses'].sum()),
+                'average_occupancy': float(df['occupancy_rate'].mean()) if len(df) else 0,
+                'average_roi': float(df['roi'].mean()) if len(df) else 0,
             }
         })
 
@@ -1781,6 +1824,15 @@ class ReportGenerationView(APIView):
                 'error': 'period_start and period_end are required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        try:
+            period_start, period_end = parse_date(period_start), parse_date(period_end)
+        except (TypeError, ValueError):
+            period_start = period_end = None
+        if not period_start or not period_end:
+            return Response({
+                'error': 'period_start and period_end must be dates (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Create report record
         report = Report.objects.create(
             title=f"{report_type.title()} Report - {period_start} to {period_end}",
@@ -1799,69 +1851,24 @@ class ReportGenerationView(APIView):
         
         report.properties.set(accessible_properties)
         
-        # Generate report data (this could be moved to a background task)
-        try:
-            report_data = self._generate_report_data(report_type, accessible_properties, period_start, period_end)
-            report.report_data = report_data
-            report.status = 'completed'
-            report.save()
-            
-            return Response(ReportSerializer(report).data, status=status.HTTP_201_CREATED)
-        except Exception as e:
-            report.status = 'failed'
-            report.error_message = str(e)
-            report.save()
-            return Response({
-                'error': 'Report generation failed',
-                'details': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    def _generate_report_data(self, report_type, properties, period_start, period_end):
-        """Generate report data based on type"""
-        data = {
-            'properties': [],
-            'summary': {},
-            'period': {'start': period_start, 'end': period_end}
-        }
+        # Generate report data in the background once the report row is committed
+        from .tasks import generate_report
         
-        for prop in properties:
-            prop_data = {
-                'id': prop.id,
-                'title': prop.title,
-                'address': prop.address,
-            }
-            
-            if report_type == 'financial':
-                # Financial report data
-                expenses = prop.expenses.filter(
-                    expense_date__range=[period_start, period_end]
-                )
-                rental_info = getattr(prop, 'rental_info', None)
-                
-                prop_data.update({
-                    'total_expenses': expenses.aggregate(total=Sum('total_amount'))['total'] or 0,
-                    'monthly_rent': float(rental_info.monthly_rent) if rental_info else 0,
-                    'annual_income': float(rental_info.monthly_rent) * 12 if rental_info else 0,
-                })
-            
-            elif report_type == 'maintenance':
-                # Maintenance report data
-                maintenance_requests = prop.maintenance_requests.filter(
-                    reported_date__range=[period_start, period_end]
-                )
-                
-                prop_data.update({
-                    'total_requests': maintenance_requests.count(),
-                    'completed_requests': maintenance_requests.filter(status='completed').count(),
-                    'pending_requests': maintenance_requests.filter(status='pending').count(),
-                    'total_maintenance_cost': maintenance_requests.aggregate(
-                        total=Sum('actual_cost')
-                    )['total'] or 0,
-                })
-            
-            data['properties'].append(prop_data)
+        def enqueue():
+            try:
+                generate_report.delay(report.id)
+            except Exception as e:
+                logger.error(f"Could not queue report {report.id}: {e}")
+                Report.objects.filter(pk=report.id).update(status='failed', error_message=str(e))
+        
+        transaction.on_commit(enqueue)
         
-        return data
+        return Response({
+            'id': report.id,
+            'status': report.status,
+            'progress': report.progress,
+            'status_url': reverse('report-status', kwargs={'pk': report.id}),
+        }, status=status.HTTP_202_ACCEPTED)
 
 
 class ReportListView(generics.ListAPIView):
@@ -1871,7 +1878,9 @@ class ReportListView(generics.ListAPIView):
     ordering = ['-created_at']
     
     def get_queryset(self):
-        return Report.objects.filter(generated_by=self.request.user)
+        return Report.objects.filter(generated_by=self.request.user).select_related(
+            'generated_by'
+        ).prefetch_related('properties').annotate(properties_count=Count('properties'))
 
 
 class ReportDetailView(generics.RetrieveAPIView):
@@ -1879,7 +1888,50 @@ class ReportDetailView(generics.RetrieveAPIView):
     serializer_class = ReportSerializer
     
     def get_queryset(self):
-        return Report.objects.filter(generated_by=self.request.user)
+        return Report.objects.filter(generated_by=self.request.user).select_related(
+            'generated_by'
+        ).prefetch_related('properties').annotate(properties_count=Count('properties'))
+
+
+class ReportStatusView(APIView):
+    """Generation status and progress of a report"""
+    
+    def get(self, request, pk):
+        report = Report.objects.filter(generated_by=request.user, pk=pk).values(
+            'id', 'status', 'progress', 'generation_time', 'error_message', 'updated_at'
+        ).first()
+        if not report:
+            return Response({'error': 'Report not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        generation_time = report['generation_time']
+        report['generation_time'] = generation_time.total_seconds() if generation_time else None
+        return Response(report)
+
+
+class ReportDownloadView(APIView):
+    """Download a report as XLSX or PDF (supports HTTP Range requests)"""
+
+    def get(self, request, pk, file_format):
+        from .exporters import REPORT_EXPORTERS, ranged_file_response
+
+        if file_format not in REPORT_EXPORTERS:
+            return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Exports are rebuilt from the properties when missing; report_data is never needed
+        report = Report.objects.filter(generated_by=request.user, pk=pk).defer('report_data').first()
+        if not report:
+            return Response({'error': 'Report not found'}, status=status.HTTP_404_NOT_FOUND)
+        if report.status != 'completed':
+            return Response({'error': 'Report is not ready'}, status=status.HTTP_409_CONFLICT)
+
+        field_name, exporter, content_type = REPORT_EXPORTERS[file_format]
+        field_file = getattr(report, field_name)
+        if not field_file:
+            # Reports generated before exports existed, or whose export failed
+            field_file = exporter(report, save=False)
+            report.save(update_fields=[field_name, 'updated_at'])
+
+        return ranged_file_response(request, field_file, field_file.name, content_type)
 
 
 # ========================================================================
@@ -2271,263 +2323,244 @@ class AdvancedPropertyAnalyticsView(APIView):
             import pandas as pd
             import plotly.graph_objects as go
             import plotly.express as px
-            from plotly.utils import PlotlyJSONEncoder
+            from .charts import ChartRenderer, get_chart_mode
         except ImportError:
             return Response({
                 'error': 'Data visualization libraries not installed. Please install: pip install pandas plotly numpy'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+        from .analytics import (
+            analytics_period, load_materialized_frame, frame_to_records, normalize_rows, truncate_labels
+        )
+        
         user = request.user
         
         # Get user's accessible properties
         user_properties = user.get_accessible_properties()
-        rental_properties = RentalProperty.objects.filter(base_property__in=user_properties)
-        
-        # Time period for analytics
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-        
-        # Prepare analytics data
-        analytics_data = []
         
-        for property_obj in user_properties:
-            try:
-                rental_prop = rental_properties.filter(base_property=property_obj).first()
-                
-                # Calculate financial metrics
-                monthly_rent = float(rental_prop.monthly_rent) if rental_prop else 0
-                annual_income = monthly_rent * 12
-                
-                # Get expenses for this property
-                property_expenses = Expense.objects.filter(
-                    base_property=property_obj,
-                    expense_date__range=[start_date, end_date]
-                ).aggregate(total=Sum('total_amount'))['total'] or 0
-                
-                # Calculate ROI
-                property_value = float(property_obj.market_value) if property_obj.market_value else 0
-                roi = ((annual_income - float(property_expenses)) / property_value * 100) if property_value > 0 else 0
-                
-                # Occupancy rate
-                occupancy_rate = 100 if rental_prop and rental_prop.rental_status == 'rented' else 0
-                
-                # Maintenance metrics
-                maintenance_requests = MaintenanceRequest.objects.filter(
-                    base_property=property_obj,
-                    reported_date__range=[start_date, end_date]
-                )
-                maintenance_count = maintenance_requests.count()
-                avg_maintenance_cost = maintenance_requests.aggregate(
-                    avg=Avg('actual_cost')
-                )['avg'] or 0
-                
-                analytics_data.append({
-                    'property_id': property_obj.id,
-                    'property_title': property_obj.title,
-                    'city': property_obj.location.city if property_obj.location else 'Unknown',
-                    'property_type': property_obj.property_type,
-                    'annual_income': annual_income,
-                    'total_expenses': float(property_expenses),
-                    'net_income': annual_income - float(property_expenses),
-                    'roi': round(roi, 2),
-                    'occupancy_rate': occupancy_rate,
-                    'property_value': property_value,
-                    'maintenance_requests': maintenance_count,
-                    'avg_maintenance_cost': float(avg_maintenance_cost),
-                    'latitude': float(property_obj.latitude) if property_obj.latitude else None,
-                    'longitude': float(property_obj.longitude) if property_obj.longitude else None,
-                })
-            except Exception as e:
-                logger.error(f"Error calculating analytics for property {property_obj.id}: {e}")
-                continue
+        # Time period for analytics (materialized for the current calendar year)
+        start_date, end_date = analytics_period()
         
-        # Generate enhanced visualizations
-        charts = {}
+        # Per-property metrics from materialized analytics
+        df = load_materialized_frame(user_properties)
         
-        if analytics_data:
-            df = pd.DataFrame(analytics_data)
-            
+        analytics_data = []
+        if not df.empty:
+            analytics_data = frame_to_records(df, [
+                'property_id', 'property_title', 'city', 'property_type',
+                'annual_income', 'total_expenses', 'net_income', 'roi',
+                'occupancy_rate', 'property_value', 'maintenance_requests',
+                'avg_maintenance_cost', 'latitude', 'longitude',
+            ])
+        
+        # Generate enhanced visualizations (cached per dataset; ?charts=data returns columnar arrays)
+        charts = ChartRenderer(get_chart_mode(request))
+        
+        if not df.empty:
             # 1. Performance Heat Map Matrix
             performance_metrics = ['roi', 'occupancy_rate', 'annual_income', 'maintenance_requests']
-            property_labels = [item['property_title'][:20] + '...' if len(item['property_title']) > 20 
-                             else item['property_title'] for item in analytics_data]
+            property_labels = truncate_labels(df['property_title'])
             
             # Normalize data for heat map (0-100 scale)
-            normalized_data = []
-            for metric in performance_metrics:
-                values = [item[metric] for item in analytics_data]
-                if values and max(values) > 0:
-                    normalized = [(v - min(values)) / (max(values) - min(values)) * 100 for v in values]
-                else:
-                    normalized = [0] * len(values)
-                normalized_data.append(normalized)
+            normalized_data = normalize_rows(df[performance_metrics].to_numpy(dtype='float64').T)
+            heatmap_data = pd.DataFrame(dict(zip(performance_metrics, normalized_data)))
+            heatmap_data.insert(0, 'property_label', property_labels)
             
-            # Create performance heat map
-            fig_heatmap = go.Figure(data=go.Heatmap(
-                z=normalized_data,
-                x=property_labels,
-                y=['ROI (%)', 'Occupancy (%)', 'Annual Income', 'Maintenance Requests'],
-                colorscale='RdYlGn',
-                colorbar=dict(title="Performance Score (0-100)"),
-                hoverongaps=False,
-                hovertemplate='Property: %{x}<br>Metric: %{y}<br>Score: %{z:.1f}<extra></extra>'
-            ))
+            def build_performance_heatmap(data, spec):
+                fig = go.Figure(data=go.Heatmap(
+                    z=data[spec['metrics']].to_numpy().T,
+                    x=data['property_label'],
+                    y=spec['metric_labels'],
+                    colorscale='RdYlGn',
+                    colorbar=dict(title="Performance Score (0-100)"),
+                    hoverongaps=False,
+                    hovertemplate='Property: %{x}<br>Metric: %{y}<br>Score: %{z:.1f}<extra></extra>'
+                ))
+                fig.update_layout(
+                    title=spec['title'],
+                    xaxis_title='Properties',
+                    yaxis_title='Performance Metrics',
+                    height=400,
+                    font=dict(size=10),
+                    xaxis={'tickangle': 45}
+                )
+                return fig
             
-            fig_heatmap.update_layout(
-                title='Property Performance Heat Map',
-                xaxis_title='Properties',
-                yaxis_title='Performance Metrics',
-                height=400,
-                font=dict(size=10),
-                xaxis={'tickangle': 45}
-            )
-            charts['performance_heatmap'] = json.dumps(fig_heatmap, cls=PlotlyJSONEncoder)
+            charts.add('performance_heatmap', heatmap_data, {
+                'type': 'heatmap', 'title': 'Property Performance Heat Map',
+                'x': 'property_label', 'metrics': performance_metrics,
+                'metric_labels': ['ROI (%)', 'Occupancy (%)', 'Annual Income', 'Maintenance Requests'],
+            }, build_performance_heatmap)
             
             # 2. Geographic Heat Map (if coordinates available)
-            if any(item['latitude'] and item['longitude'] for item in analytics_data):
-                locations_data = [item for item in analytics_data if item['latitude'] and item['longitude']]
+            located = df[df['latitude'].notna() & df['longitude'].notna()]
+            if not located.empty:
+                def build_geo_heatmap(data, spec):
+                    fig = px.density_mapbox(
+                        data,
+                        lat='latitude',
+                        lon='longitude',
+                        z='roi',
+                        radius=10,
+                        center=dict(lat=float(data['latitude'].iloc[0]), lon=float(data['longitude'].iloc[0])),
+                        zoom=10,
+                        mapbox_style="open-street-map",
+                        title=spec['title'],
+                        color_continuous_scale='Viridis'
+                    )
+                    fig.update_layout(height=500)
+                    return fig
                 
-                fig_geo_heat = px.density_mapbox(
-                    pd.DataFrame(locations_data),
-                    lat='latitude',
-                    lon='longitude',
-                    z='roi',
-                    radius=10,
-                    center=dict(lat=locations_data[0]['latitude'], lon=locations_data[0]['longitude']),
-                    zoom=10,
-                    mapbox_style="open-street-map",
-                    title='Geographic ROI Heat Map',
-                    color_continuous_scale='Viridis'
-                )
-                fig_geo_heat.update_layout(height=500)
-                charts['geographic_heatmap'] = json.dumps(fig_geo_heat, cls=PlotlyJSONEncoder)
+                charts.add('geographic_heatmap', located[['latitude', 'longitude', 'roi']], {
+                    'type': 'density_mapbox', 'title': 'Geographic ROI Heat Map',
+                    'lat': 'latitude', 'lon': 'longitude', 'z': 'roi',
+                }, build_geo_heatmap)
             
             # 3. Advanced Bar Charts
             
             # ROI by Property Type
             type_roi = df.groupby('property_type')['roi'].agg(['mean', 'count']).reset_index()
-            fig_roi_type = px.bar(
-                type_roi, 
-                x='property_type', 
-                y='mean',
-                title='Average ROI by Property Type',
-                labels={'mean': 'Average ROI (%)', 'property_type': 'Property Type'},
-                color='mean',
-                color_continuous_scale='Blues'
-            )
-            fig_roi_type.update_layout(height=400)
-            charts['roi_by_type'] = json.dumps(fig_roi_type, cls=PlotlyJSONEncoder)
             
-            # Financial Performance Comparison
-            fig_financial = go.Figure()
+            def build_roi_by_type(data, spec):
+                fig = px.bar(
+                    data, 
+                    x='property_type', 
+                    y='mean',
+                    title=spec['title'],
+                    labels=spec['labels'],
+                    color='mean',
+                    color_continuous_scale='Blues'
+                )
+                fig.update_layout(height=400)
+                return fig
             
-            # Add income bars
-            fig_financial.add_trace(go.Bar(
-                name='Annual Income',
-                x=property_labels,
-                y=[item['annual_income'] for item in analytics_data],
-                marker_color='lightblue',
-                yaxis='y'
-            ))
+            charts.add('roi_by_type', type_roi, {
+                'type': 'bar', 'title': 'Average ROI by Property Type', 'x': 'property_type', 'y': 'mean',
+                'labels': {'mean': 'Average ROI (%)', 'property_type': 'Property Type'},
+            }, build_roi_by_type)
             
-            # Add expense bars
-            fig_financial.add_trace(go.Bar(
-                name='Total Expenses',
-                x=property_labels,
-                y=[item['total_expenses'] for item in analytics_data],
-                marker_color='lightcoral',
-                yaxis='y'
-            ))
+            # Financial Performance Comparison
+            financial_data = df[['annual_income', 'total_expenses', 'net_income']].reset_index(drop=True)
+            financial_data.insert(0, 'property_label', property_labels)
             
-            # Add net income line
-            fig_financial.add_trace(go.Scatter(
-                name='Net Income',
-                x=property_labels,
-                y=[item['net_income'] for item in analytics_data],
-                mode='lines+markers',
-                line=dict(color='green', width=3),
-                yaxis='y'
-            ))
+            def build_financial(data, spec):
+                fig = go.Figure()
+                
+                # Add income bars
+                fig.add_trace(go.Bar(
+                    name='Annual Income',
+                    x=data['property_label'],
+                    y=data['annual_income'],
+                    marker_color='lightblue',
+                    yaxis='y'
+                ))
+                
+                # Add expense bars
+                fig.add_trace(go.Bar(
+                    name='Total Expenses',
+                    x=data['property_label'],
+                    y=data['total_expenses'],
+                    marker_color='lightcoral',
+                    yaxis='y'
+                ))
+                
+                # Add net income line
+                fig.add_trace(go.Scatter(
+                    name='Net Income',
+                    x=data['property_label'],
+                    y=data['net_income'],
+                    mode='lines+markers',
+                    line=dict(color='green', width=3),
+                    yaxis='y'
+                ))
+                
+                fig.update_layout(
+                    title=spec['title'],
+                    xaxis_title='Properties',
+                    yaxis_title='Amount (SAR)',
+                    height=500,
+                    barmode='group',
+                    xaxis={'tickangle': 45},
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+                )
+                return fig
             
-            fig_financial.update_layout(
-                title='Financial Performance Analysis',
-                xaxis_title='Properties',
-                yaxis_title='Amount (SAR)',
-                height=500,
-                barmode='group',
-                xaxis={'tickangle': 45},
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-            )
-            charts['financial_performance'] = json.dumps(fig_financial, cls=PlotlyJSONEncoder)
+            charts.add('financial_performance', financial_data, {
+                'type': 'bar+line', 'title': 'Financial Performance Analysis', 'x': 'property_label',
+                'bars': ['annual_income', 'total_expenses'], 'line': 'net_income',
+            }, build_financial)
             
             # 4. Maintenance Analytics Heat Map
-            maintenance_by_type = []
-            cities = list(set([item['city'] for item in analytics_data]))
-            property_types = list(set([item['property_type'] for item in analytics_data]))
-            
-            maintenance_matrix = []
-            for city in cities:
-                city_row = []
-                for prop_type in property_types:
-                    matching_items = [
-                        item['maintenance_requests'] for item in analytics_data 
-                        if item['city'] == city and item['property_type'] == prop_type
-                    ]
-                    avg_maintenance = sum(matching_items) / len(matching_items) if matching_items else 0
-                    city_row.append(avg_maintenance)
-                maintenance_matrix.append(city_row)
+            maintenance_matrix = df.pivot_table(
+                index='city', columns='property_type',
+                values='maintenance_requests', aggfunc='mean', fill_value=0
+            )
             
-            if maintenance_matrix and any(any(row) for row in maintenance_matrix):
-                fig_maintenance_heat = go.Figure(data=go.Heatmap(
-                    z=maintenance_matrix,
-                    x=property_types,
-                    y=cities,
-                    colorscale='Reds',
-                    colorbar=dict(title="Avg Maintenance Requests"),
-                    hovertemplate='City: %{y}<br>Type: %{x}<br>Avg Requests: %{z:.1f}<extra></extra>'
-                ))
+            if maintenance_matrix.to_numpy().any():
+                def build_maintenance_heatmap(data, spec):
+                    fig = go.Figure(data=go.Heatmap(
+                        z=data.to_numpy(),
+                        x=list(data.columns),
+                        y=list(data.index),
+                        colorscale='Reds',
+                        colorbar=dict(title="Avg Maintenance Requests"),
+                        hovertemplate='City: %{y}<br>Type: %{x}<br>Avg Requests: %{z:.1f}<extra></extra>'
+                    ))
+                    fig.update_layout(
+                        title=spec['title'],
+                        xaxis_title='Property Type',
+                        yaxis_title='City',
+                        height=400
+                    )
+                    return fig
                 
-                fig_maintenance_heat.update_layout(
-                    title='Maintenance Requests Heat Map by City and Property Type',
-                    xaxis_title='Property Type',
-                    yaxis_title='City',
-                    height=400
-                )
-                charts['maintenance_heatmap'] = json.dumps(fig_maintenance_heat, cls=PlotlyJSONEncoder)
+                charts.add('maintenance_heatmap', maintenance_matrix, {
+                    'type': 'heatmap', 'title': 'Maintenance Requests Heat Map by City and Property Type',
+                    'index': 'city', 'columns': 'property_type',
+                }, build_maintenance_heatmap)
             
             # 5. Occupancy and ROI Correlation Scatter Plot
-            fig_correlation = px.scatter(
-                df,
-                x='occupancy_rate',
-                y='roi',
-                size='property_value',
-                color='city',
-                hover_data=['property_title', 'annual_income'],
-                title='ROI vs Occupancy Rate Correlation',
-                labels={'occupancy_rate': 'Occupancy Rate (%)', 'roi': 'ROI (%)'}
-            )
-            fig_correlation.update_layout(height=500)
-            charts['roi_occupancy_correlation'] = json.dumps(fig_correlation, cls=PlotlyJSONEncoder)
+            def build_correlation(data, spec):
+                fig = px.scatter(
+                    data,
+                    x='occupancy_rate',
+                    y='roi',
+                    size='property_value',
+                    color='city',
+                    hover_data=['property_title', 'annual_income'],
+                    title=spec['title'],
+                    labels=spec['labels']
+                )
+                fig.update_layout(height=500)
+                return fig
+            
+            charts.add('roi_occupancy_correlation', df[[
+                'occupancy_rate', 'roi', 'property_value', 'city', 'property_title', 'annual_income'
+            ]], {
+                'type': 'scatter', 'title': 'ROI vs Occupancy Rate Correlation',
+                'x': 'occupancy_rate', 'y': 'roi', 'size': 'property_value', 'color': 'city',
+                'labels': {'occupancy_rate': 'Occupancy Rate (%)', 'roi': 'ROI (%)'},
+            }, build_correlation)
         
         # Calculate summary statistics
         summary_stats = {}
-        if analytics_data:
+        if not df.empty:
             summary_stats = {
-                'total_properties': len(analytics_data),
-                'total_annual_income': sum(item['annual_income'] for item in analytics_data),
-                'total_expenses': sum(item['total_expenses'] for item in analytics_data),
-                'average_roi': sum(item['roi'] for item in analytics_data) / len(analytics_data) if analytics_data else 0,
-                'average_occupancy': sum(item['occupancy_rate'] for item in analytics_data) / len(analytics_data) if analytics_data else 0,
-                'total_property_value': sum(item['property_value'] for item in analytics_data),
-                'total_maintenance_requests': sum(item['maintenance_requests'] for item in analytics_data),
-                'best_performing_property': max(analytics_data, key=lambda x: x['roi'])['property_title'] if analytics_data else None,
-                'cities_covered': len(set([item['city'] for item in analytics_data])),
-                'property_types': len(set([item['property_type'] for item in analytics_data])),
+                'total_properties': len(df),
+                'total_annual_income': float(df['annual_income'].sum()),
+                'total_expenses': float(df['total_expenses'].sum()),
+                'average_roi': float(df['roi'].mean()),
+                'average_occupancy': float(df['occupancy_rate'].mean()),
+                'total_property_value': float(df['property_value'].sum()),
+                'total_maintenance_requests': int(df['maintenance_requests'].sum()),
+                'best_performing_property': df.loc[df['roi'].idxmax(), 'property_title'],
+                'cities_covered': int(df['city'].nunique()),
+                'property_types': int(df['property_type'].nunique()),
             }
         
         return Response({
             'analytics_data': analytics_data,
-            'charts': charts,
+            'charts': charts.charts,
             'summary_stats': summary_stats,
             'period': {
                 'start_date': start_date.isoformat(),
@@ -2545,159 +2578,147 @@ class WorkerAnalyticsView(APIView):
             import pandas as pd
             import plotly.graph_objects as go
             import plotly.express as px
-            from plotly.utils import PlotlyJSONEncoder
+            from .charts import ChartRenderer, get_chart_mode
         except ImportError:
             return Response({
                 'error': 'Data visualization libraries not installed'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        user = request.user
-        
-        # Get worker performance data
-        workers = Worker.objects.filter(status='active').prefetch_related('categories', 'assigned_maintenance')
+        from .analytics import load_worker_frame, category_rollup, scale_rows_to_max, frame_to_records
         
         # Time period for analysis
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=90)  # Last 3 months
         
-        worker_data = []
-        for worker in workers:
-            maintenance_jobs = worker.assigned_maintenance.filter(
-                reported_date__range=[start_date, end_date]
+        # Worker statistics are cached until a maintenance request changes status
+        cached = cache.get(Worker.ANALYTICS_CACHE_KEY)
+        if cached and cached['period']['end_date'] == end_date.isoformat():
+            workers, skills_df, worker_data, summary_stats, period = (
+                cached['workers'], cached['skills'], cached['worker_data'],
+                cached['summary_stats'], cached['period']
             )
+        else:
+            # One annotated query for per-worker totals, one for their categories
+            workers, categories = load_worker_frame(start_date, end_date)
+            skills_df = category_rollup(workers, categories)
             
-            completed_jobs = maintenance_jobs.filter(status='completed')
-            avg_completion_time = completed_jobs.aggregate(
-                avg=Avg(models.F('completed_date') - models.F('started_date'))
-            )['avg']
+            worker_data = []
+            summary_stats = {}
+            if not workers.empty:
+                worker_categories = categories.groupby('worker_id')['category'].agg(list)
+                workers['categories'] = workers['worker_id'].map(worker_categories)
+                workers['categories'] = workers['categories'].apply(lambda value: value if isinstance(value, list) else [])
+                
+                worker_data = frame_to_records(workers, [
+                    'worker_id', 'worker_name', 'employee_id', 'categories', 'total_jobs',
+                    'completed_jobs', 'pending_jobs', 'completion_rate', 'avg_completion_days',
+                    'hourly_rate', 'rating', 'is_available', 'employment_type',
+                ])
+                
+                rated = workers.loc[workers['rating'] > 0, 'rating']
+                summary_stats = {
+                    'total_workers': len(workers),
+                    'available_workers': int(workers['is_available'].sum()),
+                    'average_completion_rate': float(workers['completion_rate'].mean()),
+                    'total_jobs_assigned': int(workers['total_jobs'].sum()),
+                    'total_completed_jobs': int(workers['completed_jobs'].sum()),
+                    'average_rating': float(rated.mean()) if len(rated) else 0,
+                    'skill_categories': len(skills_df),
+                }
             
-            worker_data.append({
-                'worker_id': worker.id,
-                'worker_name': worker.full_name,
-                'employee_id': worker.employee_id,
-                'categories': [cat.name for cat in worker.categories.all()],
-                'total_jobs': maintenance_jobs.count(),
-                'completed_jobs': completed_jobs.count(),
-                'pending_jobs': maintenance_jobs.filter(status__in=['assigned', 'in_progress']).count(),
-                'completion_rate': (completed_jobs.count() / maintenance_jobs.count() * 100) if maintenance_jobs.count() > 0 else 0,
-                'avg_completion_days': avg_completion_time.days if avg_completion_time else 0,
-                'hourly_rate': float(worker.hourly_rate),
-                'rating': float(worker.rating) if worker.rating else 0,
-                'is_available': worker.is_available,
-                'employment_type': worker.employment_type,
-            })
+            period = {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'days': (end_date - start_date).days
+            }
+            cache.set(Worker.ANALYTICS_CACHE_KEY, {
+                'workers': workers, 'skills': skills_df, 'worker_data': worker_data,
+                'summary_stats': summary_stats, 'period': period,
+            }, 60 * 60)
         
-        charts = {}
+        charts = ChartRenderer(get_chart_mode(request))
         
-        if worker_data:
-            df = pd.DataFrame(worker_data)
-            
+        if not workers.empty:
             # Worker Performance Heat Map
-            worker_names = [item['worker_name'] for item in worker_data]
+            worker_names = workers['worker_name'].tolist()
             performance_metrics = ['completion_rate', 'total_jobs', 'avg_completion_days', 'rating']
             
-            # Normalize data for heat map
-            normalized_data = []
-            for metric in performance_metrics:
-                values = [item[metric] for item in worker_data]
-                if values and max(values) > 0:
-                    if metric == 'avg_completion_days':  # Lower is better for completion time
-                        normalized = [100 - (v / max(values) * 100) for v in values]
-                    else:
-                        normalized = [(v / max(values) * 100) for v in values]
-                else:
-                    normalized = [0] * len(values)
-                normalized_data.append(normalized)
+            # Normalize data for heat map (lower is better for completion time)
+            normalized_data = scale_rows_to_max(
+                workers[performance_metrics].to_numpy(dtype='float64').T,
+                invert_rows=[performance_metrics.index('avg_completion_days')]
+            )
+            heatmap_data = pd.DataFrame(dict(zip(performance_metrics, normalized_data)))
+            heatmap_data.insert(0, 'worker_name', worker_names)
             
-            fig_worker_heat = go.Figure(data=go.Heatmap(
-                z=normalized_data,
-                x=worker_names,
-                y=['Completion Rate (%)', 'Total Jobs', 'Speed (inverted)', 'Rating'],
-                colorscale='RdYlGn',
-                colorbar=dict(title="Performance Score (0-100)"),
-                hovertemplate='Worker: %{x}<br>Metric: %{y}<br>Score: %{z:.1f}<extra></extra>'
-            ))
+            def build_worker_heatmap(data, spec):
+                fig = go.Figure(data=go.Heatmap(
+                    z=data[spec['metrics']].to_numpy().T,
+                    x=data['worker_name'],
+                    y=spec['metric_labels'],
+                    colorscale='RdYlGn',
+                    colorbar=dict(title="Performance Score (0-100)"),
+                    hovertemplate='Worker: %{x}<br>Metric: %{y}<br>Score: %{z:.1f}<extra></extra>'
+                ))
+                fig.update_layout(
+                    title=spec['title'],
+                    xaxis_title='Workers',
+                    yaxis_title='Performance Metrics',
+                    height=400,
+                    xaxis={'tickangle': 45}
+                )
+                return fig
             
-            fig_worker_heat.update_layout(
-                title='Worker Performance Heat Map',
-                xaxis_title='Workers',
-                yaxis_title='Performance Metrics',
-                height=400,
-                xaxis={'tickangle': 45}
-            )
-            charts['worker_performance_heatmap'] = json.dumps(fig_worker_heat, cls=PlotlyJSONEncoder)
+            charts.add('worker_performance_heatmap', heatmap_data, {
+                'type': 'heatmap', 'title': 'Worker Performance Heat Map',
+                'x': 'worker_name', 'metrics': performance_metrics,
+                'metric_labels': ['Completion Rate (%)', 'Total Jobs', 'Speed (inverted)', 'Rating'],
+            }, build_worker_heatmap)
             
             # Workload Distribution Bar Chart
-            fig_workload = px.bar(
-                df,
-                x='worker_name',
-                y=['completed_jobs', 'pending_jobs'],
-                title='Worker Workload Distribution',
-                labels={'value': 'Number of Jobs', 'worker_name': 'Worker'},
-                color_discrete_map={'completed_jobs': 'green', 'pending_jobs': 'orange'}
-            )
-            fig_workload.update_layout(height=400, xaxis={'tickangle': 45})
-            charts['workload_distribution'] = json.dumps(fig_workload, cls=PlotlyJSONEncoder)
-            
-            # Skills vs Performance Correlation
-            skills_performance = []
-            all_categories = set()
-            for worker in worker_data:
-                all_categories.update(worker['categories'])
+            def build_workload(data, spec):
+                fig = px.bar(
+                    data,
+                    x='worker_name',
+                    y=spec['y'],
+                    title=spec['title'],
+                    labels={'value': 'Number of Jobs', 'worker_name': 'Worker'},
+                    color_discrete_map={'completed_jobs': 'green', 'pending_jobs': 'orange'}
+                )
+                fig.update_layout(height=400, xaxis={'tickangle': 45})
+                return fig
             
-            for category in all_categories:
-                category_workers = [w for w in worker_data if category in w['categories']]
-                if category_workers:
-                    completion_rates = [w['completion_rate'] for w in category_workers]
-                    avg_completion_rate = sum(completion_rates) / len(completion_rates) if completion_rates else 0
-                    
-                    ratings = [w['rating'] for w in category_workers if w['rating'] > 0]
-                    avg_rating = sum(ratings) / len(ratings) if ratings else 0
-                    worker_count = len(category_workers)
-                    
-                    skills_performance.append({
-                        'category': category,
-                        'avg_completion_rate': avg_completion_rate,
-                        'avg_rating': avg_rating if avg_rating else 0,
-                        'worker_count': worker_count
-                    })
+            charts.add('workload_distribution', workers[['worker_name', 'completed_jobs', 'pending_jobs']], {
+                'type': 'bar', 'title': 'Worker Workload Distribution',
+                'x': 'worker_name', 'y': ['completed_jobs', 'pending_jobs'],
+            }, build_workload)
             
-            if skills_performance:
-                skills_df = pd.DataFrame(skills_performance)
-                fig_skills = px.scatter(
-                    skills_df,
-                    x='avg_completion_rate',
-                    y='avg_rating',
-                    size='worker_count',
-                    hover_data=['category'],
-                    title='Skills Performance Analysis',
-                    labels={'avg_completion_rate': 'Average Completion Rate (%)', 'avg_rating': 'Average Rating'}
-                )
-                fig_skills.update_layout(height=400)
-                charts['skills_performance'] = json.dumps(fig_skills, cls=PlotlyJSONEncoder)
-        
-        # Calculate summary statistics
-        summary_stats = {}
-        if worker_data:
-            summary_stats = {
-                'total_workers': len(worker_data),
-                'available_workers': len([w for w in worker_data if w['is_available']]),
-                'average_completion_rate': sum(w['completion_rate'] for w in worker_data) / len(worker_data) if worker_data else 0,
-                'total_jobs_assigned': sum(w['total_jobs'] for w in worker_data),
-                'total_completed_jobs': sum(w['completed_jobs'] for w in worker_data),
-                'average_rating': sum(w['rating'] for w in worker_data if w['rating'] > 0) / len([w for w in worker_data if w['rating'] > 0]) if [w for w in worker_data if w['rating'] > 0] else 0,
-                'skill_categories': len(all_categories) if 'all_categories' in locals() else 0,
-            }
+            # Skills vs Performance Correlation
+            if not skills_df.empty:
+                def build_skills(data, spec):
+                    fig = px.scatter(
+                        data,
+                        x='avg_completion_rate',
+                        y='avg_rating',
+                        size='worker_count',
+                        hover_data=['category'],
+                        title=spec['title'],
+                        labels=spec['labels']
+                    )
+                    fig.update_layout(height=400)
+                    return fig
+                
+                charts.add('skills_performance', skills_df, {
+                    'type': 'scatter', 'title': 'Skills Performance Analysis',
+                    'x': 'avg_completion_rate', 'y': 'avg_rating', 'size': 'worker_count',
+                    'labels': {'avg_completion_rate': 'Average Completion Rate (%)', 'avg_rating': 'Average Rating'},
+                }, build_skills)
         
         return Response({
             'worker_data': worker_data,
-            'charts': charts,
+            'charts': charts.charts,
             'summary_stats': summary_stats,
-            'period': {
-                'start_date': start_date.isoformat(),
-                'end_date': end_date.isoformat(),
-                'days': (end_date - start_date).days
-            }
+            'period': period
         })
 
 
@@ -2709,16 +2730,15 @@ class PaymentAnalyticsView(APIView):
             import pandas as pd
             import plotly.graph_objects as go
             import plotly.express as px
-            from plotly.utils import PlotlyJSONEncoder
+            from .charts import ChartRenderer, get_chart_mode
         except ImportError:
             return Response({
                 'error': 'Data visualization libraries not installed'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        user = request.user
+        from .analytics import RECENT_PAYMENTS_LIMIT, load_payment_aggregates, overdue_bucket_totals
         
-        # Get payment data
-        from .models import Payment
+        user = request.user
         
         # Time period for analysis
         end_date = timezone.now().date()
@@ -2732,138 +2752,169 @@ class PaymentAnalyticsView(APIView):
         
         payments = payments.filter(payment_date__range=[start_date, end_date])
         
+        # Grouped SQL over status, payment_date and due_date; only aggregates reach Python
+        aggregates = load_payment_aggregates(payments, end_date)
+        by_status = aggregates['by_status']
+        by_month_type = aggregates['by_month_type']
+        overdue = aggregates['overdue']
+        
+        # Only the latest payments are listed; charts and totals cover the whole period
+        status_labels = dict(Payment.STATUS_CHOICES)
+        type_labels = dict(Payment.PAYMENT_TYPE_CHOICES)
+        payment_rows = payments.order_by('-payment_date', '-id').values_list(
+            'payment_id', 'amount', 'currency', 'payment_type', 'status',
+            'payment_date', 'due_date', 'property_reference__title'
+        )[:RECENT_PAYMENTS_LIMIT]
+        
         payment_data = []
-        for payment in payments:
+        for payment_id, amount, currency, payment_type, payment_status, payment_date, due_date, property_title in payment_rows:
+            days_overdue = (end_date - due_date).days if (
+                due_date and payment_status in ['pending', 'partial'] and end_date > due_date
+            ) else 0
             payment_data.append({
-                'payment_id': payment.payment_id,
-                'amount': float(payment.amount),
-                'currency': payment.currency,
-                'payment_type': payment.payment_type,
-                'payment_type_display': payment.get_payment_type_display(),
-                'status': payment.status,
-                'status_display': payment.get_status_display(),
-                'payment_date': payment.payment_date,
-                'due_date': payment.due_date,
-                'is_overdue': payment.is_overdue,
-                'days_overdue': payment.days_overdue,
-                'property_title': payment.property_reference.title if payment.property_reference else None,
-                'month': payment.payment_date.strftime('%Y-%m'),
-                'quarter': f"Q{((payment.payment_date.month-1)//3)+1} {payment.payment_date.year}",
+                'payment_id': payment_id,
+                'amount': float(amount),
+                'currency': currency,
+                'payment_type': payment_type,
+                'payment_type_display': str(type_labels.get(payment_type, payment_type)),
+                'status': payment_status,
+                'status_display': str(status_labels.get(payment_status, payment_status)),
+                'payment_date': payment_date,
+                'due_date': due_date,
+                'is_overdue': days_overdue > 0,
+                'days_overdue': days_overdue,
+                'property_title': property_title,
+                'month': payment_date.strftime('%Y-%m'),
+                'quarter': f"Q{((payment_date.month-1)//3)+1} {payment_date.year}",
             })
         
-        charts = {}
+        charts = ChartRenderer(get_chart_mode(request))
         
-        if payment_data:
-            df = pd.DataFrame(payment_data)
-            
+        if not by_status.empty:
             # Payment Status Distribution
-            status_counts = df['status'].value_counts()
-            fig_status = px.pie(
-                values=status_counts.values,
-                names=status_counts.index,
-                title='Payment Status Distribution',
+            status_counts = by_status.set_index('status')['count'].sort_values(ascending=False)
+            charts.add('payment_status_distribution', status_counts, {
+                'type': 'pie', 'title': 'Payment Status Distribution',
+            }, lambda data, spec: px.pie(
+                values=data.values,
+                names=data.index,
+                title=spec['title'],
                 color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            charts['payment_status_distribution'] = json.dumps(fig_status, cls=PlotlyJSONEncoder)
+            ))
             
             # Payment Types Heat Map by Month
-            payment_type_month = df.groupby(['month', 'payment_type']).agg({
-                'amount': 'sum'
-            }).reset_index()
+            pivot_data = by_month_type.pivot_table(
+                index='month', columns='payment_type', values='amount', aggfunc='sum', fill_value=0
+            )
             
-            if len(payment_type_month) > 0:
-                pivot_data = payment_type_month.pivot(index='month', columns='payment_type', values='amount').fillna(0)
-                
-                fig_type_heat = go.Figure(data=go.Heatmap(
-                    z=pivot_data.values,
-                    x=pivot_data.columns,
-                    y=pivot_data.index,
+            def build_type_heatmap(data, spec):
+                fig = go.Figure(data=go.Heatmap(
+                    z=data.values,
+                    x=data.columns,
+                    y=data.index,
                     colorscale='Blues',
                     colorbar=dict(title="Amount (SAR)"),
                     hovertemplate='Month: %{y}<br>Type: %{x}<br>Amount: %{z:,.0f} SAR<extra></extra>'
                 ))
-                
-                fig_type_heat.update_layout(
-                    title='Payment Types Heat Map by Month',
+                fig.update_layout(
+                    title=spec['title'],
                     xaxis_title='Payment Type',
                     yaxis_title='Month',
                     height=400
                 )
-                charts['payment_types_heatmap'] = json.dumps(fig_type_heat, cls=PlotlyJSONEncoder)
-            
-            # Monthly Payment Trends
-            monthly_totals = df.groupby('month').agg({
-                'amount': 'sum',
-                'payment_id': 'count'
-            }).reset_index()
+                return fig
             
-            fig_trends = go.Figure()
+            charts.add('payment_types_heatmap', pivot_data, {
+                'type': 'heatmap', 'title': 'Payment Types Heat Map by Month',
+                'index': 'month', 'columns': 'payment_type', 'values': 'amount',
+            }, build_type_heatmap)
             
-            # Add amount trend
-            fig_trends.add_trace(go.Scatter(
-                x=monthly_totals['month'],
-                y=monthly_totals['amount'],
-                mode='lines+markers',
-                name='Total Amount',
-                line=dict(color='blue', width=3),
-                yaxis='y'
-            ))
+            # Monthly Payment Trends
+            monthly_totals = by_month_type.groupby('month')[['amount', 'count']].sum().reset_index()
             
-            # Add count trend
-            fig_trends.add_trace(go.Scatter(
-                x=monthly_totals['month'],
-                y=monthly_totals['payment_id'],
-                mode='lines+markers',
-                name='Payment Count',
-                line=dict(color='red', width=2),
-                yaxis='y2'
-            ))
+            def build_trends(data, spec):
+                fig = go.Figure()
+                
+                # Add amount trend
+                fig.add_trace(go.Scatter(
+                    x=data['month'],
+                    y=data['amount'],
+                    mode='lines+markers',
+                    name='Total Amount',
+                    line=dict(color='blue', width=3),
+                    yaxis='y'
+                ))
+                
+                # Add count trend
+                fig.add_trace(go.Scatter(
+                    x=data['month'],
+                    y=data['count'],
+                    mode='lines+markers',
+                    name='Payment Count',
+                    line=dict(color='red', width=2),
+                    yaxis='y2'
+                ))
+                
+                fig.update_layout(
+                    title=spec['title'],
+                    xaxis_title='Month',
+                    yaxis=dict(title='Amount (SAR)', side='left'),
+                    yaxis2=dict(title='Payment Count', side='right', overlaying='y'),
+                    height=400,
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+                )
+                return fig
             
-            fig_trends.update_layout(
-                title='Monthly Payment Trends',
-                xaxis_title='Month',
-                yaxis=dict(title='Amount (SAR)', side='left'),
-                yaxis2=dict(title='Payment Count', side='right', overlaying='y'),
-                height=400,
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-            )
-            charts['monthly_trends'] = json.dumps(fig_trends, cls=PlotlyJSONEncoder)
+            charts.add('monthly_trends', monthly_totals, {
+                'type': 'line', 'title': 'Monthly Payment Trends',
+                'x': 'month', 'y': 'amount', 'y2': 'count',
+            }, build_trends)
             
-            # Overdue Payments Analysis
-            overdue_data = df[df['is_overdue'] == True]
-            if len(overdue_data) > 0:
-                fig_overdue = px.histogram(
-                    overdue_data,
-                    x='days_overdue',
-                    nbins=20,
-                    title='Overdue Payments Distribution',
-                    labels={'days_overdue': 'Days Overdue', 'count': 'Number of Payments'},
-                    color_discrete_sequence=['red']
-                )
-                fig_overdue.update_layout(height=400)
-                charts['overdue_distribution'] = json.dumps(fig_overdue, cls=PlotlyJSONEncoder)
+            # Overdue Payments Analysis (counts per due date, binned by days overdue)
+            if not overdue.empty:
+                def build_overdue(data, spec):
+                    fig = px.histogram(
+                        data,
+                        x='days_overdue',
+                        y='count',
+                        histfunc='sum',
+                        nbins=spec['nbins'],
+                        title=spec['title'],
+                        labels={'days_overdue': 'Days Overdue', 'count': 'Number of Payments'},
+                        color_discrete_sequence=['red']
+                    )
+                    fig.update_layout(height=400)
+                    return fig
+                
+                charts.add('overdue_distribution', overdue[['days_overdue', 'count']], {
+                    'type': 'histogram', 'title': 'Overdue Payments Distribution',
+                    'x': 'days_overdue', 'y': 'count', 'nbins': 20,
+                }, build_overdue)
         
         # Calculate summary statistics
         summary_stats = {}
-        if payment_data:
-            total_amount = sum(p['amount'] for p in payment_data)
-            paid_amount = sum(p['amount'] for p in payment_data if p['status'] == 'paid')
-            overdue_count = len([p for p in payment_data if p['is_overdue']])
+        if not by_status.empty:
+            total_count = int(by_status['count'].sum())
+            total_amount = float(by_status['amount'].sum())
+            paid = by_status[by_status['status'] == 'paid']
+            paid_amount = float(paid['amount'].sum())
             
             summary_stats = {
-                'total_payments': len(payment_data),
+                'total_payments': total_count,
                 'total_amount': total_amount,
                 'paid_amount': paid_amount,
                 'pending_amount': total_amount - paid_amount,
-                'overdue_payments': overdue_count,
-                'payment_types': len(set(p['payment_type'] for p in payment_data)),
-                'average_payment': total_amount / len(payment_data) if payment_data else 0,
-                'payment_success_rate': (len([p for p in payment_data if p['status'] == 'paid']) / len(payment_data) * 100) if payment_data else 0,
+                'overdue_payments': int(overdue['count'].sum()),
+                'overdue_buckets': overdue_bucket_totals(overdue),
+                'payment_types': int(by_month_type['payment_type'].nunique()),
+                'average_payment': total_amount / total_count if total_count else 0,
+                'payment_success_rate': (int(paid['count'].sum()) / total_count * 100) if total_count else 0,
             }
         
         return Response({
             'payment_data': payment_data,
-            'charts': charts,
+            'payment_data_total': int(by_status['count'].sum()) if not by_status.empty else 0,
+            'charts': charts.charts,
             'summary_stats': summary_stats,
             'period': {
                 'start_date': start_date.isoformat(),
@@ -2877,24 +2928,30 @@ class PaymentAnalyticsView(APIView):
 # Worker Management Views
 # -------------------------------------------------------------------------
 
+# Read by WorkerCategorySerializer and Worker.current_active_jobs instead of counting per row
+WORKER_CATEGORY_COUNTS = {'active_worker_count': Count('workers', filter=Q(workers__status='active'))}
+WORKER_JOB_COUNTS = {
+    'active_jobs_count': Count('assigned_maintenance', filter=Q(assigned_maintenance__status__in=WORKER_ACTIVE_JOB_STATUSES)),
+}
+
 class WorkerCategoryListCreateView(BaseListCreateView):
-    queryset = WorkerCategory.objects.filter(is_active=True)
+    queryset = WorkerCategory.objects.filter(is_active=True).annotate(**WORKER_CATEGORY_COUNTS)
     serializer_class = WorkerCategorySerializer
     filterset_fields = ['is_active']
     search_fields = ['name', 'description']
 
 class WorkerCategoryDetailView(BaseDetailView):
-    queryset = WorkerCategory.objects.all()
+    queryset = WorkerCategory.objects.annotate(**WORKER_CATEGORY_COUNTS)
     serializer_class = WorkerCategorySerializer
 
 class WorkerListCreateView(BaseListCreateView):
-    queryset = Worker.objects.select_related('management_company').prefetch_related('categories', 'property_assignments__assigned_property')
+    queryset = Worker.objects.select_related('management_company', 'supervisor').prefetch_related('categories', 'assigned_properties').annotate(**WORKER_JOB_COUNTS)
     serializer_class = WorkerSerializer
     filterset_fields = ['status', 'employment_type', 'is_available', 'categories']
     search_fields = ['first_name', 'last_name', 'employee_id', 'email', 'phone']
 
 class WorkerDetailView(BaseDetailView):
-    queryset = Worker.objects.select_related('management_company').prefetch_related('categories', 'property_assignments__assigned_property')
+    queryset = Worker.objects.select_related('management_company', 'supervisor').prefetch_related('categories', 'assigned_properties').annotate(**WORKER_JOB_COUNTS)
     serializer_class = WorkerSerializer
 
 
@@ -2916,7 +2973,7 @@ class WorkerPropertyAssignmentListCreateView(BaseListCreateView):
     queryset = WorkerPropertyAssignment.objects.select_related('worker', 'worker__management_company', 'assigned_property', 'assigned_property__location')
     serializer_class = WorkerPropertyAssignmentSerializer
     permission_classes = [CanManageWorkers]  # Override base permission
-    filterset_fields = ['worker', 'property', 'is_active', 'status']
+    filterset_fields = ['worker', 'assigned_property', 'is_active', 'status']
 
 class WorkerPropertyAssignmentDetailView(BaseDetailView):
     queryset = WorkerPropertyAssignment.objects.select_related('worker', 'worker__management_company', 'assigned_property', 'assigned_property__location')
@@ -2924,12 +2981,12 @@ class WorkerPropertyAssignmentDetailView(BaseDetailView):
     permission_classes = [CanManageWorkers]  # Override base permission
 
 class PropertyMaintenanceWorkflowListView(generics.ListAPIView):
-    queryset = PropertyMaintenanceWorkflow.objects.select_related('property', 'property__location', 'assigned_to', 'created_by').prefetch_related('maintenance_requests')
+    queryset = PropertyMaintenanceWorkflow.objects.select_related('maintenance_request').prefetch_related('assigned_workers')
     serializer_class = PropertyMaintenanceWorkflowSerializer
     filterset_fields = ['current_status', 'workflow_type']
 
 class PropertyMaintenanceWorkflowDetailView(BaseDetailView):
-    queryset = PropertyMaintenanceWorkflow.objects.select_related('property', 'property__location', 'assigned_to', 'created_by').prefetch_related('maintenance_requests')
+    queryset = PropertyMaintenanceWorkflow.objects.select_related('maintenance_request').prefetch_related('assigned_workers')
     serializer_class = PropertyMaintenanceWorkflowSerializer
     # Permission handled by BaseDashboardView
 
@@ -2943,7 +3000,7 @@ class BankAccountListCreateView(APIView):
     
     def get(self, request):
         from .serializers import BankAccountSerializer
-        bank_accounts = BankAccount.objects.filter(user=request.user)
+        bank_accounts = BankAccount.objects.filter(user=request.user).select_related('user')
         serializer = BankAccountSerializer(bank_accounts, many=True)
         return create_response(data={'bank_accounts': serializer.data})
     
@@ -2968,7 +3025,7 @@ class BankAccountDetailView(APIView):
     
     def get_object(self, pk, user):
         try:
-            bank_account = BankAccount.objects.get(pk=pk, user=user)
+            bank_account = BankAccount.objects.select_related('user').get(pk=pk, user=user)
             return bank_account
         except BankAccount.DoesNotExist:
             return None
@@ -3030,7 +3087,9 @@ class PaymentListCreateView(APIView):
     
     def get(self, request):
         from .serializers import PaymentSerializer
-        payments = Payment.objects.filter(user=request.user).order_by('-payment_date')
+        payments = request.user.get_accessible_payments().select_related(
+            'user', 'property_reference', 'tenant_reference', 'bank_account'
+        ).order_by('-payment_date')
         serializer = PaymentSerializer(payments, many=True)
         return create_response(data={'payments': serializer.data})
     
@@ -3055,7 +3114,9 @@ class PaymentDetailView(APIView):
     
     def get_object(self, pk, user):
         try:
-            payment = Payment.objects.get(pk=pk, user=user)
+            payment = user.get_accessible_payments().select_related(
+                'user', 'property_reference', 'tenant_reference', 'bank_account'
+            ).get(pk=pk)
             return payment
         except Payment.DoesNotExist:
             return None
@@ -3105,4 +3166,127 @@ class PaymentDetailView(APIView):
             )
         
         payment.delete()
-        return create_response(message="Payment deleted successfully")
\ No newline at end of file
+        return create_response(message="Payment deleted successfully")
+
+# -------------------------------------------------------------------------
+# Data Export Views
+# -------------------------------------------------------------------------
+
+class BaseExportView(generics.GenericAPIView):
+    """
+    Stream a role-scoped, filtered queryset as CSV or JSONL.
+
+    Subclasses define get_queryset() (GenericAPIView asserts one is set),
+    filterset_class and export_fields.
+    Query parameters are the filterset's, as on the list endpoints.
+    """
+    permission_classes = [drf_permissions.IsAuthenticated]
+    filterset_class = None
+    export_fields = ()
+    export_name = 'export'
+
+    def get(self, request, file_format):
+        from .exporters import EXPORT_STREAMS, streaming_export_response
+
+        if file_format not in EXPORT_STREAMS:
+            return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+        if self.filterset_class is not None:
+            filterset = self.filterset_class(request.query_params, queryset=queryset, request=request)
+            if not filterset.is_valid():
+                raise translate_validation(filterset.errors)
+            queryset = filterset.qs
+
+        filename = f"{self.export_name}-{timezone.now():%Y%m%d-%H%M%S}"
+        return streaming_export_response(queryset, self.export_fields, file_format, filename)
+
+
+class BidExportView(BaseExportView):
+    filterset_class = BidFilterSet
+    export_name = 'bids'
+    export_fields = (
+        'id', 'auction_id', 'auction__title', 'bidder_id', 'bidder__email',
+        'bid_amount', 'max_bid_amount', 'bid_time', 'status', 'is_verified',
+    )
+
+    def get_queryset(self):
+        return self.request.user.get_accessible_bids()
+
+
+class PaymentExportView(BaseExportView):
+    filterset_class = PaymentFilterSet
+    export_name = 'payments'
+    export_fields = (
+        'id', 'payment_id', 'user_id', 'amount', 'currency', 'payment_type', 'status',
+        'property_reference_id', 'tenant_reference_id', 'payment_date', 'due_date', 'created_at',
+    )
+
+    def get_queryset(self):
+        # Same scope as the payment list
+        return self.request.user.get_accessible_payments()
+
+
+class ExpenseExportView(BaseExportView):
+    permission_classes = [drf_permissions.IsAuthenticated, IsPropertyOwnerOrAppraiserOrDataEntry]
+    filterset_class = ExpenseFilterSet
+    export_name = 'expenses'
+    export_fields = (
+        'id', 'expense_property_id', 'expense_property__title', 'category__name', 'title',
+        'expense_type', 'status', 'approval_status', 'amount', 'tax_amount', 'discount_amount',
+        'total_amount', 'currency', 'vendor_name', 'invoice_number', 'expense_date', 'due_date',
+        'payment_date', 'is_recurring', 'is_emergency',
+    )
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser or user.role in ['appraiser', 'data_entry']:
+            return Expense.objects.all()
+        elif user.role == 'owner':
+            return Expense.objects.filter(expense_property__owner=user)
+        return Expense.objects.none()
+
+
+class LeaseExportView(BaseExportView):
+    filterset_class = LeaseFilterSet
+    export_name = 'leases'
+    export_fields = (
+        'id', 'lease_number', 'status', 'tenant_id', 'tenant__first_name', 'tenant__last_name',
+        'rental_property_id', 'rental_property__base_property__title', 'start_date', 'end_date',
+        'monthly_rent', 'security_deposit', 'payment_frequency', 'payment_due_day',
+    )
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser or user.role in ['appraiser', 'data_entry']:
+            return Lease.objects.all()
+        elif user.role == 'owner':
+            return Lease.objects.filter(rental_property__base_property__owner=user)
+        elif user.role == 'tenant':
+            return Lease.objects.filter(tenant__user=user)
+        return Lease.objects.none()
+
+
+class MaintenanceRequestExportView(BaseExportView):
+    filterset_class = MaintenanceRequestFilterSet
+    export_name = 'maintenance-requests'
+    export_fields = (
+        'id', 'maintenance_property_id', 'maintenance_property__title', 'category__name', 'title',
+        'request_type', 'priority', 'status', 'assigned_worker_id', 'reported_date', 'due_date',
+        'completed_date', 'estimated_cost', 'actual_cost', 'emergency_repair',
+    )
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser or user.role in ['appraiser', 'data_entry']:
+            return MaintenanceRequest.objects.all()
+        elif user.role == 'owner':
+            return MaintenanceRequest.objects.filter(maintenance_property__owner=user)
+        elif user.role == 'tenant':
+            # Subquery instead of a join so rows are not duplicated per lease
+            return MaintenanceRequest.objects.filter(
+                Q(requested_by=user) | Q(maintenance_property__in=Property.objects.filter(
+                    rental_info__leases__tenant__user=user
+                ))
+            )
+        return MaintenanceRequest.objects.none()
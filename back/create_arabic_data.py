@@ -19,58 +19,10 @@ from accounts.models import CustomUser, UserProfile
 from base.models import *
 from django.contrib.contenttypes.models import ContentType
 
-# Arabic test data
-ARABIC_CITIES = [
-    'الرياض', 'جدة', 'مكة المكرمة', 'المدينة المنورة', 'الدمام', 'الخبر', 'الطائف', 
-    'بريدة', 'تبوك', 'حائل', 'أبها', 'الأحساء', 'نجران', 'جازان', 'ينبع', 'عرعر'
-]
-
-ARABIC_STATES = [
-    'منطقة الرياض', 'منطقة مكة المكرمة', 'المنطقة الشرقية', 'منطقة المدينة المنورة',
-    'منطقة القصيم', 'منطقة تبوك', 'منطقة حائل', 'منطقة عسير', 'منطقة الأحساء',
-    'منطقة نجران', 'منطقة جازان', 'منطقة الباحة', 'منطقة عرعر', 'منطقة الجوف'
-]
-
-ARABIC_FIRST_NAMES = [
-    'أحمد', 'محمد', 'عبدالله', 'عبدالرحمن', 'خالد', 'سعد', 'فهد', 'عبدالعزيز',
-    'طلال', 'وليد', 'ماجد', 'نواف', 'بندر', 'تركي', 'فيصل', 'سلطان', 'راشد',
-    'فاطمة', 'عائشة', 'خديجة', 'مريم', 'زينب', 'نورا', 'سارة', 'هند', 'أمل',
-    'منال', 'رانيا', 'ريم', 'لينا', 'دانا', 'جواهر', 'أسماء'
-]
-
-ARABIC_LAST_NAMES = [
-    'العبدالله', 'المحمد', 'الأحمد', 'السعد', 'الخالد', 'الفهد', 'العتيبي',
-    'الشمري', 'القحطاني', 'الغامدي', 'الحربي', 'المطيري', 'العنزي', 'الدوسري',
-    'الزهراني', 'الثقفي', 'الأسمري', 'العمري', 'الجهني', 'البقمي', 'الرشيدي'
-]
-
-ARABIC_PROPERTY_TYPES = [
-    ('villa', 'فيلا'),
-    ('apartment', 'شقة'),
-    ('office', 'مكتب'),
-    ('shop', 'متجر'),
-    ('warehouse', 'مستودع'),
-    ('land', 'قطعة أرض'),
-    ('building', 'مبنى'),
-    ('compound', 'مجمع'),
-]
-
-ARABIC_PROPERTY_DESCRIPTIONS = [
-    'فيلا فاخرة بتشطيبات عالية الجودة',
-    'شقة واسعة في موقع مميز',
-    'مكتب تجاري في منطقة الأعمال',
-    'متجر في شارع تجاري حيوي',
-    'مستودع واسع للتخزين والتوزيع',
-    'قطعة أرض للاستثمار العقاري',
-    'مبنى تجاري متكامل الخدمات',
-    'مجمع سكني بمرافق حديثة'
-]
-
-ARABIC_ROOM_NAMES = [
-    'غرفة المعيشة', 'غرفة النوم الرئيسية', 'غرفة النوم الثانية', 'غرفة النوم الثالثة',
-    'المطبخ', 'الحمام الرئيسي', 'حمام الضيوف', 'مجلس الرجال', 'مجلس النساء',
-    'غرفة الطعام', 'المكتبة', 'غرفة التخزين', 'الحديقة', 'السطح', 'الباركينج'
-]
+from base.arabic_data import (
+    ARABIC_CITIES, ARABIC_STATES, ARABIC_FIRST_NAMES, ARABIC_LAST_NAMES,
+    ARABIC_PROPERTY_TYPES, ARABIC_PROPERTY_DESCRIPTIONS, ARABIC_ROOM_NAMES,
+)
 
 def create_arabic_users():
     """Create Arabic test users with different roles"""
@@ -66,5 +66,8 @@ if [ "$DEBUG" = "true" ]; then
     python manage.py runserver 0.0.0.0:8000
 else
     echo "🚀 Running in PRODUCTION mode with Gunicorn"
-    gunicorn back.wsgi:application --bind 0.0.0.0:8000 --workers 3
+    # Workers share Prometheus metrics through this directory; stale files from a previous run would be re-aggregated
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    gunicorn back.wsgi:application --config gunicorn.conf.py
 fi
\ No newline at end of file
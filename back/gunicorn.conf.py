@@ -0,0 +1,18 @@
+"""
+Gunicorn settings, loaded automatically from the working directory.
+
+Prometheus metrics are shared between workers through files in
+PROMETHEUS_MULTIPROC_DIR (see accounts/metrics.py). entrypoint.sh creates
+the directory empty before gunicorn starts.
+"""
+
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 3))
+
+
+def child_exit(server, worker):
+    # Live gauges (WebSocket and DB connections) must not keep a dead worker's values
+    from accounts.metrics import mark_process_dead
+    mark_process_dead(worker.pid)